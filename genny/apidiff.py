@@ -0,0 +1,159 @@
+from genny.codeparser import CodeParser
+from genny.filesystem import FileSystem
+import json
+
+STRUCTURE_CACHE_NAMESPACE = "structures"
+
+
+class ApiDiff:
+    """
+    Compare the public API of two git revisions.
+
+    Files are read straight from git objects. Paths whose blob is identical
+    in both trees are skipped without parsing, and parsed structures are
+    cached by blob SHA so they can be reused by later diffs. Definitions
+    that did not change between the two blobs of a file are only extracted once.
+    """
+
+    def __init__(self, version_control, cache=None, log_callback=None):
+        self.version_control = version_control
+        self.cache = cache
+        self.log_callback = log_callback
+        self.parser = CodeParser(FileSystem())
+        # The two versions of a modified file mostly share their definitions
+        self.parser.definition_cache = {}
+
+    def diff(self, old_ref, new_ref):
+        """
+        Compute the API changes between two revisions.
+
+        Returns:
+            - A list of change dicts with 'module', 'kind', 'name', 'change'
+              ('added', 'removed' or 'changed') and 'details'.
+        """
+        old_tree = self.version_control.list_tree(old_ref)
+        new_tree = self.version_control.list_tree(new_ref)
+
+        changed_paths = sorted(path for path in set(old_tree) | set(new_tree)
+                               if old_tree.get(path) != new_tree.get(path))
+        modified_paths = [path for path in changed_paths if path in old_tree and path in new_tree]
+        structures = self.get_structures(
+            [old_tree[path] for path in modified_paths] + [new_tree[path] for path in modified_paths])
+
+        changes = []
+        for path in changed_paths:
+            if path not in old_tree:
+                changes.append(self._change(path, 'module', path, 'added'))
+            elif path not in new_tree:
+                changes.append(self._change(path, 'module', path, 'removed'))
+            else:
+                changes.extend(self.diff_modules(
+                    path, structures.get(old_tree[path], {}), structures.get(new_tree[path], {})))
+        return changes
+
+    def get_structures(self, shas):
+        """
+        Get the parsed structure of each blob, from the cache where possible.
+        Missing blobs are read with one `git cat-file --batch` call.
+        """
+        structures = {}
+        missing = []
+        for sha in shas:
+            cached = self.cache.get(STRUCTURE_CACHE_NAMESPACE, sha) if self.cache else None
+            if cached is None:
+                missing.append(sha)
+            else:
+                structures[sha] = cached
+
+        for sha, source_code in self.version_control.read_blobs(missing).items():
+            try:
+                structures[sha] = self.parser.parse_source(source_code).to_dict()
+            except (SyntaxError, ValueError) as e:
+                if self.log_callback:
+                    self.log_callback(f"Could not parse blob {sha}: {e}")
+                structures[sha] = {}
+            if self.cache:
+                self.cache.set(STRUCTURE_CACHE_NAMESPACE, sha, structures[sha])
+        return structures
+
+    def diff_modules(self, path, old, new):
+        changes = []
+        old_classes = self._by_name(old.get('classes', []))
+        new_classes = self._by_name(new.get('classes', []))
+        for name in self._ordered_union(old_classes, new_classes):
+            if name not in old_classes:
+                changes.append(self._change(path, 'class', name, 'added'))
+            elif name not in new_classes:
+                changes.append(self._change(path, 'class', name, 'removed'))
+            else:
+                old_class, new_class = old_classes[name], new_classes[name]
+                details = []
+                if old_class.get('base_classes') != new_class.get('base_classes'):
+                    details.append(
+                        f"base classes ({', '.join(old_class.get('base_classes') or [])})"
+                        f" -> ({', '.join(new_class.get('base_classes') or [])})")
+                if old_class.get('docstring') != new_class.get('docstring'):
+                    details.append("docstring changed")
+                if details:
+                    changes.append(self._change(path, 'class', name, 'changed', details))
+                changes.extend(self._diff_functions(
+                    path, 'method', old_class.get('methods', []),
+                    new_class.get('methods', []), prefix=f"{name}."))
+
+        changes.extend(self._diff_functions(
+            path, 'function', old.get('functions', []), new.get('functions', [])))
+        return changes
+
+    def _diff_functions(self, path, kind, old_functions, new_functions, prefix=""):
+        changes = []
+        old_by_name = self._by_name(old_functions)
+        new_by_name = self._by_name(new_functions)
+        for name in self._ordered_union(old_by_name, new_by_name):
+            if name not in old_by_name:
+                changes.append(self._change(path, kind, prefix + name, 'added'))
+            elif name not in new_by_name:
+                changes.append(self._change(path, kind, prefix + name, 'removed'))
+            else:
+                old_params = old_by_name[name].get('parameters') or []
+                new_params = new_by_name[name].get('parameters') or []
+                details = []
+                if old_params != new_params:
+                    details.append(f"parameters ({', '.join(old_params)}) -> ({', '.join(new_params)})")
+                if old_by_name[name].get('docstring') != new_by_name[name].get('docstring'):
+                    details.append("docstring changed")
+                if details:
+                    changes.append(self._change(path, kind, prefix + name, 'changed', details))
+        return changes
+
+    def _by_name(self, items):
+        by_name = {}
+        for item in items:
+            by_name.setdefault(item.get('name'), item)
+        return by_name
+
+    def _ordered_union(self, old, new):
+        return list(old) + [name for name in new if name not in old]
+
+    def _change(self, module, kind, name, change, details=None):
+        return {'module': module, 'kind': kind, 'name': name,
+                'change': change, 'details': details or []}
+
+    def format_markdown(self, changes, old_ref, new_ref):
+        """Generate a Markdown changelog from a list of changes."""
+        lines = [f"# API changes: {old_ref} -> {new_ref}\n"]
+        if not changes:
+            lines.append("No API changes.\n")
+        module = None
+        for change in changes:
+            if change['module'] != module:
+                module = change['module']
+                lines.append(f"## {module}\n")
+            line = f"- **{change['change'].capitalize()}** {change['kind']} `{change['name']}`"
+            if change['details']:
+                line += ": " + "; ".join(change['details'])
+            lines.append(line)
+        return '\n'.join(lines) + '\n'
+
+    def format_json(self, changes, old_ref, new_ref):
+        """Generate a JSON changelog from a list of changes."""
+        return json.dumps({'old': old_ref, 'new': new_ref, 'changes': changes}, indent=4)
@@ -0,0 +1,99 @@
+from genny.filesystem import FILE_MODE
+import io
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+
+# Archive formats by file suffix, mapped to the tarfile write mode (None for zip)
+ARCHIVE_SUFFIXES = {'.zip': None, '.tar': 'w', '.tar.gz': 'w:gz', '.tgz': 'w:gz'}
+# Members that are already compressed are stored as-is in zip archives
+PRECOMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz')
+
+
+def is_archive_path(path):
+    return any(path.endswith(suffix) for suffix in ARCHIVE_SUFFIXES)
+
+
+class ArchiveWriter:
+    """
+    Stream files into a single zip or tar archive instead of a directory tree.
+
+    Members are appended sequentially through one file handle. The archive is
+    written to a temporary file and moved into place when it is closed, and
+    every member gets the same timestamp (SOURCE_DATE_EPOCH if set) so that
+    identical sites produce identical archives.
+    """
+
+    def __init__(self, archive_path):
+        suffix = next((suffix for suffix in ARCHIVE_SUFFIXES if archive_path.endswith(suffix)), None)
+        if suffix is None:
+            raise ValueError(f"Unsupported archive '{archive_path}'."
+                             f" Use one of: {', '.join(ARCHIVE_SUFFIXES)}.")
+        self.archive_path = archive_path
+        self.timestamp = int(os.environ.get('SOURCE_DATE_EPOCH', time.time()))
+        self.names = set()
+
+        directory = os.path.dirname(os.path.abspath(archive_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(archive_path)}.",
+                                              suffix=".tmp")
+        self.file = os.fdopen(fd, 'wb')
+        if ARCHIVE_SUFFIXES[suffix] is None:
+            self.zip_file = zipfile.ZipFile(self.file, 'w', compression=zipfile.ZIP_DEFLATED)
+            self.tar_file = None
+        else:
+            self.zip_file = None
+            self.tar_file = tarfile.open(fileobj=self.file, mode=ARCHIVE_SUFFIXES[suffix])
+
+    def write(self, name, data):
+        """
+        Add a member to the archive.
+
+        Parameters:
+            - name: The member path, using '/' separators.
+            - data: The member content (str or bytes).
+        """
+        if name in self.names:
+            raise ValueError(f"'{name}' was already written to {self.archive_path}.")
+        self.names.add(name)
+        content = data.encode('utf-8') if isinstance(data, str) else data
+        if self.zip_file:
+            info = zipfile.ZipInfo(name, date_time=time.gmtime(max(self.timestamp, 315532800))[:6])
+            info.external_attr = 0o644 << 16
+            info.compress_type = (zipfile.ZIP_STORED if name.endswith(PRECOMPRESSED_SUFFIXES)
+                                  else zipfile.ZIP_DEFLATED)
+            self.zip_file.writestr(info, content)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mtime = self.timestamp
+            info.mode = 0o644
+            self.tar_file.addfile(info, io.BytesIO(content))
+
+    def close(self):
+        """Finish the archive and move it into place."""
+        (self.zip_file or self.tar_file).close()
+        self.file.close()
+        os.chmod(self.temp_path, FILE_MODE)
+        os.replace(self.temp_path, self.archive_path)
+
+    def discard(self):
+        """Abandon a partially written archive."""
+        try:
+            (self.zip_file or self.tar_file).close()
+            self.file.close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
@@ -0,0 +1,702 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from genny.archive import ArchiveWriter, is_archive_path
+from genny.blobstore import BlobStore
+from genny.docgen import Docgen, FORMAT_EXTENSIONS, DEFAULT_TEMPLATE, FRAGMENT_CACHE_NAMESPACE
+from genny.filesystem import FileSystem
+from genny.codeparser import MAX_VALUE_LENGTH
+from genny.cache import Cache
+from genny.compression import Precompressor, MIN_COMPRESS_SIZE
+from genny.symbolindex import SymbolIndex
+from genny.searchindex import SearchIndexBuilder, SEARCH_DIR, SEARCH_STATE_FILE
+from genny.templater import Templater
+from genny.sources import SourceArchive, is_source_archive
+from genny.xref import SymbolTable
+from genny.pipeline import AsyncPipeline, DEFAULT_IO_THREADS
+from genny.profiling import Profiler
+from genny.events import Event
+from genny import events, profiling
+import functools
+import heapq
+import json
+import multiprocessing
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import time
+
+INDEX_FILE = "genny-index.json"
+SYMBOL_INDEX_FILE = "genny-symbols.db"
+# File timestamps are coarser than time.time(), so cache entries used at the very
+# start of a run can look this many seconds older than the run
+CACHE_CLOCK_SLACK = 2.0
+
+# One Docgen per worker process, created by _init_worker
+_worker_docgen = None
+# The stage timings of a worker process, sent back with each result
+_worker_profiler = None
+# A queue that streams the events of a worker process to the parent, when it has subscribers
+_worker_events = None
+
+
+def _init_worker(blame, cache_dir, profile=False, event_queue=None):
+    global _worker_docgen, _worker_profiler, _worker_events
+    _worker_docgen = Docgen(blame=blame, cache=Cache(cache_dir) if cache_dir else None)
+    _worker_profiler = Profiler() if profile else None
+    _worker_events = event_queue
+    if event_queue is not None:
+        # Subscribers inherited from a forked parent would only see this process's events
+        events.unsubscribe_all()
+
+
+def _send_event(event):
+    _worker_events.put(event.to_dict())
+
+
+def _instrumented(file_events=False):
+    """
+    Attribute the stages a task runs to its file and, in a worker process,
+    return its timings as result['timings'] and stream its events to the parent.
+    With file_events, the task is reported by file_started and file_finished
+    events, tagged with the id of the worker process.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(task):
+            with events.subscribed(_send_event if _worker_events is not None else None), \
+                    profiling.enabled(_worker_profiler), profiling.current_file(task['path']):
+                if file_events:
+                    events.emit(events.FILE_STARTED, task['path'], size=task['size'], worker=os.getpid())
+                start = time.perf_counter()
+                result = function(task)
+                if file_events:
+                    events.emit(events.FILE_FINISHED, task['path'], time.perf_counter() - start,
+                                task['size'], worker=os.getpid(), error=result['error'],
+                                degraded=result.get('degraded'))
+            if _worker_profiler:
+                result['timings'] = _worker_profiler.drain()
+            return result
+        return wrapper
+    return decorator
+
+
+@_instrumented(file_events=True)
+def _render_file(task):
+    """
+    Generate and format the documentation of a single file.
+
+    Returns:
+        A result dict with 'path', 'output' (None on failure), 'parts', 'error' and
+        'degraded' (why only top-level names were documented, if a limit was hit),
+        plus 'sha', 'structure' and 'line_numbers' when the structure was requested.
+    """
+    rel_path = task['path']
+    result = {'path': rel_path, 'output': None, 'error': None, 'degraded': None}
+    errors = []
+    _worker_docgen.log_callback = errors.append
+    _worker_docgen.templater.log_callback = errors.append
+    _worker_docgen.generated_docs = {}
+    _worker_docgen.page_context = task['page_context']
+    _worker_docgen.split_pages = task['split_pages']
+    _worker_docgen.fragment_cache = task['fragment_cache']
+    _worker_docgen.limits = task['limits']
+    _worker_docgen.parser.max_value_length = task['max_value_length']
+    try:
+        _worker_docgen.generate_docs(os.path.join(task['root'], rel_path), task['template'],
+                                     source_code=task['source'], parsed=task['parsed'])
+        if not _worker_docgen.generated_docs:
+            result['error'] = errors[-1] if errors else "No documentation generated."
+            return result
+        result['output'] = _worker_docgen.format_docs(task['format'])
+        result['parts'] = dict(_worker_docgen.parts) if task['format'] == 'html' else {}
+        result['degraded'] = _worker_docgen.degraded
+        if result['output'] is None:
+            result['error'] = "Nothing was rendered."
+        elif task['with_structure']:
+            result['sha'] = _worker_docgen.source_hash
+            result['structure'] = _worker_docgen.code_structure
+            result['line_numbers'] = _worker_docgen.line_numbers
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+@_instrumented()
+def _parse_file(task):
+    """
+    Parse a single file, for the symbol table of a cross-referenced run.
+
+    Returns:
+        A result dict with 'path', 'error' and 'parsed' (the 'sha', 'structure',
+        'line_numbers' and 'degraded' that _render_file can reuse instead of parsing again).
+    """
+    result = {'path': task['path'], 'parsed': None, 'error': None}
+    try:
+        source_code = task['source']
+        if source_code is None:
+            source_code = _worker_docgen.file_system.read_file(os.path.join(task['root'], task['path']))
+        _worker_docgen.degraded = None
+        _worker_docgen.parser.max_value_length = task['max_value_length']
+        _worker_docgen.parser.render_values = _worker_docgen.shows_attributes(task['template'])
+        if task['limits']:
+            _worker_docgen.limits = task['limits']
+            structure, line_numbers = _worker_docgen.parse_within_limits(task['path'], source_code)
+        else:
+            parsed_structure = _worker_docgen.parser.parse_source(source_code)
+            structure, line_numbers = parsed_structure.to_dict(), dict(parsed_structure.line_numbers)
+        result['parsed'] = {
+            'sha': SymbolIndex.content_hash(source_code),
+            'structure': structure,
+            'line_numbers': line_numbers,
+            'degraded': _worker_docgen.degraded
+        }
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+class BatchGenerator:
+    """
+    Generate documentation for every Python file under a directory,
+    optionally in parallel and optionally for one shard of the file set.
+    """
+
+    def __init__(self, template='current', output_format='markdown', jobs=1,
+                 blame=False, cache_dir=None, symbol_index=False, search_index=False,
+                 shared_assets=False, compress=(), compress_min_size=MIN_COMPRESS_SIZE,
+                 blob_store=None, version=None, split_pages=0, cross_references=False,
+                 profiler=None, limits=None, max_value_length=MAX_VALUE_LENGTH, async_io=False,
+                 io_threads=DEFAULT_IO_THREADS, fragment_cache=False, log_callback=None):
+        if output_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported format: {output_format}")
+        if search_index and output_format != 'html':
+            raise ValueError("A search index can only be built for html output.")
+        if shared_assets and output_format != 'html':
+            raise ValueError("Shared assets can only be used for html output.")
+        self.template = template
+        self.output_format = output_format
+        self.jobs = jobs
+        self.blame = blame
+        self.cache_dir = cache_dir
+        # Reuse rendered html fragments from cache_dir; pages not rendered by a full run are pruned
+        self.fragment_cache = fragment_cache
+        self.symbol_index = symbol_index
+        self.search_index = search_index
+        self.shared_assets = shared_assets
+        self.split_pages = split_pages
+        self.cross_references = cross_references
+        # Collects the stage timings of the main and worker processes when set
+        self.profiler = profiler
+        # Per-file ResourceLimits, enforced in the worker processes
+        self.limits = limits
+        # Longest rendered attribute value (None for no limit)
+        self.max_value_length = max_value_length
+        # Read sources and write outputs in a thread pool while the workers parse and render
+        self.async_io = async_io
+        self.io_threads = io_threads
+        # The AsyncPipeline of the running generation, if async_io is set
+        self.pipeline = None
+        # Outputs are counted from I/O threads in async mode
+        self.write_lock = threading.Lock()
+        self.assets = {}
+        # With a blob store, identical files are stored once and hardlinked into each version
+        self.blob_store = BlobStore(blob_store) if blob_store else None
+        self.file_system = self.blob_store or FileSystem()
+        self.version = version
+        self.precompressor = (Precompressor(compress, compress_min_size, jobs, self.file_system)
+                              if compress else None)
+        # Files of the site written by this run, compressed at the end
+        self.site_files = []
+        # Outputs of the last run that were rewritten or already up to date
+        self.written = 0
+        self.unchanged = 0
+        # Set while a run streams its output into a zip/tar archive
+        self.archive = None
+        self.log_callback = log_callback
+
+    def discover(self, root):
+        """
+        Find the Python files under root, a directory or a wheel/sdist/zip archive.
+
+        Returns:
+            - A sorted list of (relative path, size in bytes) tuples.
+        """
+        if is_source_archive(root):
+            return SourceArchive(root).list_files()
+        files = []
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names[:] = sorted(d for d in dir_names if not d.startswith('.') and d != '__pycache__')
+            for file_name in file_names:
+                if file_name.endswith('.py'):
+                    path = os.path.join(dir_path, file_name)
+                    files.append((os.path.relpath(path, root).replace(os.sep, '/'), os.path.getsize(path)))
+        return sorted(files)
+
+    @staticmethod
+    def parse_shard(shard):
+        """
+        Parse a 'i/N' shard specification (1 <= i <= N).
+
+        Returns:
+            - A (shard index, shard count) tuple.
+        """
+        try:
+            index, count = (int(part) for part in shard.split('/'))
+        except ValueError:
+            raise ValueError(f"Invalid shard '{shard}', expected the form i/N.")
+        if not 1 <= index <= count:
+            raise ValueError(f"Invalid shard '{shard}', i must be between 1 and N.")
+        return index, count
+
+    def partition(self, files, shard_index, shard_count):
+        """
+        Deterministically split files into shard_count slices balanced by size
+        (largest files first, each to the currently lightest shard).
+
+        Returns:
+            - The sorted (relative path, size) tuples of shard shard_index (1-based).
+        """
+        shards = [(0, i) for i in range(shard_count)]
+        assigned = [[] for _ in range(shard_count)]
+        for rel_path, size in sorted(files, key=lambda item: (-item[1], item[0])):
+            total, i = heapq.heappop(shards)
+            assigned[i].append((rel_path, size))
+            heapq.heappush(shards, (total + size, i))
+        return sorted(assigned[shard_index - 1])
+
+    def output_path(self, rel_path):
+        return os.path.splitext(rel_path)[0] + FORMAT_EXTENSIONS[self.output_format]
+
+    def generate(self, root, destination, shard=None):
+        """
+        Generate documentation for root into the destination directory and write
+        an index of the generated files next to it.
+
+        Parameters:
+            - root: The directory containing the code, or a .whl, .zip or
+              .tar.gz archive whose Python files are read without extracting it.
+            - destination: The output directory, or a .zip/.tar/.tar.gz archive
+              to stream the whole site into.
+            - shard: An optional (shard index, shard count) tuple.
+
+        Returns:
+            - The index as a dict.
+        """
+        if shard and is_archive_path(destination):
+            raise ValueError("Shard outputs must be directories so they can be merged.")
+        with profiling.enabled(self.profiler), self._output(destination):
+            return self._generate(root, destination, shard)
+
+    def _generate(self, root, destination, shard):
+        all_files = files = self.discover(root)
+        if shard:
+            files = self.partition(files, *shard)
+
+        index = {
+            'format': self.output_format,
+            'template': self.template,
+            'shard': list(shard) if shard else None,
+            'files': {},
+            'assets': [],
+            'parts': {},
+            'errors': {},
+            'degraded': {}
+        }
+        self.assets = {}
+        if self.shared_assets:
+            template_name = self.template if self.template != 'current' else DEFAULT_TEMPLATE
+            extra_static = (['search.js'] if self.search_index else []) + (['split.js'] if self.split_pages else [])
+            site_assets = Templater().site_assets(template_name, extra_static)
+            self.assets = {name: asset_path for name, (asset_path, _) in site_assets.items()}
+            for asset_path, content in site_assets.values():
+                self._write_site_file(destination, asset_path, content)
+                index['assets'].append(asset_path)
+        sizes = dict(files)
+        if is_source_archive(root):
+            sources = SourceArchive(root).read_files([rel_path for rel_path, _ in files])
+        else:
+            sources = ((rel_path, None) for rel_path, _ in files)
+        tasks = [{
+            'root': root,
+            'path': rel_path,
+            'size': sizes[rel_path],
+            'source': source_code,
+            'parsed': None,
+            'template': self.template,
+            'format': self.output_format,
+            'with_structure': self.symbol_index or self.search_index,
+            'page_context': self.page_context(rel_path),
+            'split_pages': self.split_pages,
+            'fragment_cache': self.fragment_cache,
+            'limits': self.limits,
+            'max_value_length': self.max_value_length
+        } for rel_path, source_code in sources]
+        events.emit(events.RUN_STARTED, root, size=sum(task['size'] for task in tasks), files=len(tasks),
+                    workers=self.jobs if len(tasks) > 1 else 1)
+        started = time.perf_counter()
+        started_at = time.time()
+        if self.cross_references:
+            self.link_tasks(tasks, all_files)
+        search_index = SearchIndexBuilder() if self.search_index else None
+        symbol_index = self._open_symbol_index(destination) if self.symbol_index else None
+        try:
+            add_result = functools.partial(self._add_result, destination=destination, index=index,
+                                           search_index=search_index, symbol_index=symbol_index)
+            if self.async_io:
+                self._run_pipeline(tasks, add_result)
+            else:
+                for result in self._run(tasks):
+                    add_result(result)
+            if symbol_index:
+                symbol_index.remove_files(set(symbol_index.indexed_paths()) - set(index['files']))
+        finally:
+            if symbol_index:
+                self._close_symbol_index(symbol_index, destination)
+
+        if search_index:
+            self.write_search_index(search_index, destination)
+        if self.fragment_cache and self.cache_dir and self.output_format == 'html' and not shard:
+            # Only a full run knows every page; a shard would drop the other shards' pages
+            removed = Cache(self.cache_dir).prune(FRAGMENT_CACHE_NAMESPACE, started_at - CACHE_CLOCK_SLACK)
+            if removed and self.log_callback:
+                self.log_callback(f"Pruned {removed} unused cached pages")
+        self.compress_site_files()
+        self._write(destination, INDEX_FILE, json.dumps(index, indent=4))
+        events.emit(events.RUN_FINISHED, root, time.perf_counter() - started, files=len(index['files']),
+                    errors=len(index['errors']))
+        return index
+
+    def _add_result(self, result, destination, index, search_index, symbol_index):
+        """Write the output of one file and add it to the index, search index and symbol index."""
+        rel_path = result['path']
+        if result['error']:
+            index['errors'][rel_path] = result['error']
+            if self.log_callback:
+                self.log_callback(f"Failed to generate docs for {rel_path}: {result['error']}")
+            return
+        out_path = self.output_path(rel_path)
+        self._write_site_file(destination, out_path, result['output'])
+        index['files'][rel_path] = out_path
+        if result['degraded']:
+            index['degraded'][rel_path] = result['degraded']
+            if self.log_callback:
+                self.log_callback(f"Only top-level names of {rel_path} were documented: {result['degraded']}")
+        if result['parts']:
+            index['parts'][rel_path] = []
+            for name, content in result['parts'].items():
+                part_path = posixpath.join(posixpath.dirname(out_path), name)
+                self._write_site_file(destination, part_path, content)
+                index['parts'][rel_path].append(part_path)
+        if search_index:
+            search_index.add_module(SymbolIndex.module_name(rel_path), result['structure'], out_path)
+        if symbol_index and not symbol_index.is_current(rel_path, result['sha'], out_path):
+            symbol_index.update_module(rel_path, result['sha'], result['structure'],
+                                       result['line_numbers'], out_path)
+
+    def link_tasks(self, tasks, all_files):
+        """
+        Parse every file once, build the project-wide symbol table from the
+        results and attach the resolved links to each render task. The parsed
+        structures travel with the tasks, so files are not parsed twice.
+
+        Modules of other shards are linked too, since their URLs follow from
+        their paths; their classes and functions are only known to their shard.
+        """
+        table = SymbolTable()
+        for rel_path, _ in all_files:
+            table.add_module(SymbolIndex.module_name(rel_path), self.output_path(rel_path))
+        parsed = {}
+        for result in self._run(tasks, _parse_file):
+            # Files that fail to parse are left to _render_file to report
+            if result['parsed']:
+                parsed[result['path']] = result['parsed']
+                table.add_module(SymbolIndex.module_name(result['path']), self.output_path(result['path']),
+                                 result['parsed']['structure'])
+
+        for task in tasks:
+            if task['path'] not in parsed:
+                continue
+            structure, import_links = table.link_module(
+                SymbolIndex.module_name(task['path']), self.output_path(task['path']),
+                parsed[task['path']]['structure'])
+            task['parsed'] = dict(parsed[task['path']], structure=structure)
+            task['source'] = None
+            if import_links:
+                task['page_context'] = dict(task['page_context'], import_links=import_links)
+
+    def page_context(self, rel_path):
+        """
+        Template variables for a page of the site; site_root is the relative
+        URL from the page back to the destination directory.
+        """
+        if not (self.search_index or self.shared_assets):
+            return {}
+        site_root = '../' * rel_path.count('/')
+        context = {'site_root': site_root, 'search': self.search_index}
+        template_name = self.template if self.template != 'current' else DEFAULT_TEMPLATE
+        if f"{template_name}.css" in self.assets:
+            context['stylesheet'] = site_root + self.assets[f"{template_name}.css"]
+        if 'search.js' in self.assets:
+            context['search_script'] = site_root + self.assets['search.js']
+        if 'split.js' in self.assets:
+            context['split_script'] = site_root + self.assets['split.js']
+        return context
+
+    def write_search_index(self, search_index, destination):
+        for rel_path, data in search_index.build().items():
+            self._write_site_file(destination, rel_path, data)
+        if 'search.js' not in self.assets:
+            # Pages load the shared, fingerprinted copy when there is one
+            self._write_site_file(destination, f"{SEARCH_DIR}/search.js", Templater().read_static("search.js"))
+        self._write(destination, SEARCH_STATE_FILE, search_index.to_json())
+
+    def _run(self, tasks, function=_render_file):
+        if self.jobs > 1 and len(tasks) > 1:
+            with self._event_relay() as event_queue, \
+                    ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                        initargs=(self.blame, self.cache_dir, self.profiler is not None,
+                                                  event_queue)) as executor:
+                for result in executor.map(function, tasks, chunksize=max(1, len(tasks) // (self.jobs * 4))):
+                    if self.profiler:
+                        self.profiler.merge(result.pop('timings', ()))
+                    yield result
+        else:
+            _init_worker(self.blame, self.cache_dir)
+            for task in tasks:
+                yield function(task)
+
+    def _run_pipeline(self, tasks, handle, function=_render_file):
+        """
+        Run tasks through an AsyncPipeline: sources are read and outputs written
+        in a thread pool while the worker processes parse and render, so I/O
+        latency (e.g. of network storage) is hidden behind the computation.
+        Results are still handled in the order of the tasks.
+        """
+        def merged(result):
+            if self.profiler:
+                self.profiler.merge(result.pop('timings', ()))
+            handle(result)
+
+        with self._event_relay() as event_queue, \
+                ProcessPoolExecutor(max_workers=max(1, self.jobs), initializer=_init_worker,
+                                    initargs=(self.blame, self.cache_dir, self.profiler is not None,
+                                              event_queue)) as executor:
+            self.pipeline = AsyncPipeline(executor, self.jobs, self.io_threads)
+            try:
+                self.pipeline.run(tasks, self._read_source, function, merged)
+            finally:
+                self.pipeline = None
+
+    def _read_source(self, task):
+        """Read the source of a task ahead of its worker; a file that cannot be read is left to the worker to report."""
+        if task['source'] is not None or task['parsed'] is not None:
+            return task
+        try:
+            return dict(task, source=self.file_system.read_file(os.path.join(task['root'], task['path'])))
+        except (OSError, UnicodeDecodeError):
+            return task
+
+    @contextmanager
+    def _event_relay(self):
+        """
+        Stream the events of worker processes to this process's subscribers from
+        a thread, so they arrive while files are being processed rather than in
+        batches with the results. Yields the queue workers send events to, or
+        None if nobody is subscribed.
+        """
+        if not events.has_subscribers():
+            yield None
+            return
+        event_queue = multiprocessing.Queue()
+
+        def relay():
+            for event in iter(event_queue.get, None):
+                events.dispatch(Event.from_dict(event))
+
+        thread = threading.Thread(target=relay, daemon=True)
+        thread.start()
+        try:
+            yield event_queue
+        finally:
+            # The workers have exited and flushed their events by now
+            event_queue.put(None)
+            thread.join()
+            event_queue.close()
+
+    @contextmanager
+    def _output(self, destination):
+        self.site_files = []
+        self.written = self.unchanged = 0
+        is_archive = is_archive_path(destination)
+        if is_archive and self.blob_store:
+            raise ValueError("A blob store cannot be used with an archive destination.")
+        self.archive = ArchiveWriter(destination) if is_archive else None
+        if self.blob_store:
+            self.blob_store.files = {}
+        try:
+            yield
+            if self.archive:
+                self.archive.close()
+            if self.blob_store:
+                version = self.version or os.path.basename(os.path.normpath(destination))
+                self.blob_store.save_manifest(version, destination)
+        except BaseException:
+            if self.archive:
+                self.archive.discard()
+            raise
+        finally:
+            self.archive = None
+
+    def _open_symbol_index(self, destination):
+        if self.archive or self.blob_store:
+            # SQLite needs a real file; it is added to the archive or the store when closed.
+            # A stored index is a shared, read-only blob, so it is updated in a copy
+            fd, db_path = tempfile.mkstemp(suffix=".db")
+            os.close(fd)
+            current = os.path.join(destination, SYMBOL_INDEX_FILE)
+            if self.blob_store and os.path.exists(current):
+                shutil.copyfile(current, db_path)
+        else:
+            os.makedirs(destination, exist_ok=True)
+            db_path = os.path.join(destination, SYMBOL_INDEX_FILE)
+        return SymbolIndex(db_path)
+
+    def _close_symbol_index(self, symbol_index, destination):
+        symbol_index.close()
+        if self.archive or self.blob_store:
+            try:
+                with open(symbol_index.db_path, 'rb') as file:
+                    self._write(destination, SYMBOL_INDEX_FILE, file.read())
+            finally:
+                os.remove(symbol_index.db_path)
+
+    def compress_site_files(self):
+        """Write compressed siblings of the pages, search shards and assets of this run."""
+        if self.precompressor and self.site_files:
+            compressed = self.precompressor.compress(self.site_files)
+            if self.log_callback:
+                self.log_callback(f"Compressed {len(compressed)} changed files")
+        self.site_files = []
+
+    def _write_site_file(self, destination, rel_path, data):
+        if not self.archive:
+            self._write(destination, rel_path, data, site_file=True)
+            return
+        self._write(destination, rel_path, data)
+        if self.precompressor:
+            for suffix, compressed in self.precompressor.compress_data(data).items():
+                self._write(destination, rel_path + suffix, compressed)
+
+    def _write(self, destination, rel_path, data, site_file=False):
+        if self.archive:
+            self.archive.write(rel_path, data)
+            self._count_write(rel_path, data, True)
+        elif self.pipeline:
+            self.pipeline.write(self._write_file, os.path.join(destination, rel_path), rel_path, data, site_file)
+        else:
+            self._write_file(os.path.join(destination, rel_path), rel_path, data, site_file)
+
+    def _write_file(self, path, rel_path, data, site_file=False):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        changed = self.file_system.write_file(path, data)
+        self._count_write(rel_path, data, changed)
+        # Unchanged pages keep their compressed siblings from the last run
+        if site_file and self.precompressor and (changed or self.precompressor.needs_compression(path)):
+            with self.write_lock:
+                self.site_files.append(path)
+
+    def _count_write(self, rel_path, data, changed):
+        with self.write_lock:
+            if changed:
+                self.written += 1
+            else:
+                self.unchanged += 1
+        if events.has_subscribers():
+            events.emit(events.WRITTEN, rel_path, size=len(data.encode('utf-8') if isinstance(data, str) else data),
+                        changed=changed)
+
+    def _copy(self, source, destination, rel_path):
+        with open(os.path.join(source, rel_path), 'rb') as file:
+            self._write_site_file(destination, rel_path, file.read())
+
+    def merge(self, sources, destination):
+        """
+        Combine the outputs and indexes of several shard directories into one site,
+        written to a directory or streamed into a .zip/.tar/.tar.gz archive.
+
+        Returns:
+            - The merged index as a dict.
+        """
+        with profiling.enabled(self.profiler), self._output(destination):
+            return self._merge(sources, destination)
+
+    def _merge(self, sources, destination):
+        merged = None
+        for source in sources:
+            with open(os.path.join(source, INDEX_FILE), 'r') as file:
+                index = json.load(file)
+            if merged is None:
+                merged = dict(index, shard=None, files={}, assets=[], parts={}, errors={}, degraded={})
+            for rel_path, out_path in index['files'].items():
+                self._copy(source, destination, out_path)
+                merged['files'][rel_path] = out_path
+            for rel_path, part_paths in index.get('parts', {}).items():
+                for part_path in part_paths:
+                    self._copy(source, destination, part_path)
+                merged['parts'][rel_path] = part_paths
+            merged['errors'].update(index['errors'])
+            merged['degraded'].update(index.get('degraded', {}))
+            for asset_path in index.get('assets', []):
+                if asset_path not in merged['assets']:
+                    self._copy(source, destination, asset_path)
+                    merged['assets'].append(asset_path)
+
+        if merged is None:
+            raise ValueError("No shard outputs to merge.")
+        # The shared assets the shards' pages were rendered with: assets/<stem>.<hash><extension>
+        self.assets = {}
+        for asset_path in merged['assets']:
+            stem, _, extension = posixpath.basename(asset_path).rpartition('.')
+            self.assets[f"{stem.rpartition('.')[0]}.{extension}"] = asset_path
+        search_states = [os.path.join(source, SEARCH_STATE_FILE) for source in sources
+                         if os.path.exists(os.path.join(source, SEARCH_STATE_FILE))]
+        if search_states:
+            search_index = SearchIndexBuilder()
+            for search_state in search_states:
+                search_index.merge_json(self.file_system.read_file(search_state))
+            self.write_search_index(search_index, destination)
+        shard_indexes = [os.path.join(source, SYMBOL_INDEX_FILE) for source in sources
+                         if os.path.exists(os.path.join(source, SYMBOL_INDEX_FILE))]
+        if shard_indexes:
+            symbol_index = self._open_symbol_index(destination)
+            try:
+                for shard_index in shard_indexes:
+                    symbol_index.merge_from(shard_index)
+                symbol_index.remove_files(set(symbol_index.indexed_paths()) - set(merged['files']))
+            finally:
+                self._close_symbol_index(symbol_index, destination)
+        self.compress_site_files()
+        merged['files'] = dict(sorted(merged['files'].items()))
+        self._write(destination, INDEX_FILE, json.dumps(merged, indent=4))
+        return merged
+
+    @staticmethod
+    def shard_directory(artifact_store, shard):
+        """The directory of a shard's outputs inside a shared artifact store."""
+        return os.path.join(artifact_store, f"shard-{shard[0]}-of-{shard[1]}")
+
+    @staticmethod
+    def find_shards(artifact_store):
+        """
+        List the shard directories of an artifact store.
+
+        Raises:
+            ValueError: If shards are missing.
+        """
+        shards = sorted(name for name in os.listdir(artifact_store) if name.startswith('shard-'))
+        counts = {int(name.rsplit('-', 1)[1]) for name in shards}
+        if len(counts) != 1 or len(shards) != counts.pop():
+            raise ValueError(f"Incomplete set of shards in '{artifact_store}': {shards}")
+        return [os.path.join(artifact_store, name) for name in shards]
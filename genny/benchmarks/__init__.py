@@ -0,0 +1,6 @@
+from .corpus import CorpusGenerator
+from .runner import BenchmarkRunner, compare, format_results
+from .memory import MemoryProfiler, format_memory_results
+
+__all__ = ['CorpusGenerator', 'BenchmarkRunner', 'MemoryProfiler', 'compare', 'format_results',
+           'format_memory_results']
@@ -0,0 +1,107 @@
+import typer
+from .corpus import CorpusGenerator
+from .runner import (BenchmarkRunner, compare, format_results, DEFAULT_TEMPLATES, DEFAULT_FORMATS,
+                     DEFAULT_THRESHOLD, MIN_REGRESSION_BYTES)
+from .memory import MemoryProfiler, format_memory_results
+import json
+from typing import List
+
+app = typer.Typer(help="Benchmarks for genny. Run with 'python -m genny.benchmarks'.")
+
+
+@app.command()
+def run(source: str = typer.Option(None, help="Benchmark the Python files in this directory instead of a synthetic corpus"),
+        files: int = typer.Option(20, help="Number of synthetic modules"),
+        classes: int = typer.Option(5, help="Top-level classes per module"),
+        methods: int = typer.Option(10, help="Methods per class"),
+        functions: int = typer.Option(5, help="Top-level functions per module"),
+        depth: int = typer.Option(2, help="Nesting depth of classes, functions and blocks"),
+        seed: int = typer.Option(0, help="Seed of the synthetic corpus"),
+        template: List[str] = typer.Option(None, help="Template to time rendering with; repeatable"),
+        output_format: List[str] = typer.Option(None, help="Format to time exporting to; repeatable"),
+        repeat: int = typer.Option(3, help="Number of timed runs"),
+        output: str = typer.Option(None, help="Write the results as JSON to this file"),
+        baseline: str = typer.Option(None, help="Compare against the JSON results of an earlier run"),
+        threshold: float = typer.Option(DEFAULT_THRESHOLD, help="Allowed slowdown per stage before failing (0.25 = 25%)")):
+    """
+    Times each stage of the pipeline and optionally fails on regressions against a baseline.
+    """
+    runner = BenchmarkRunner(template or DEFAULT_TEMPLATES, output_format or DEFAULT_FORMATS, repeat,
+                             log_callback=typer.echo)
+    if source:
+        results = runner.run(source)
+    else:
+        results = runner.run_corpus(CorpusGenerator(files, classes, methods, functions, depth, seed))
+    typer.echo(format_results(results))
+
+    check_results(results, output, baseline, threshold)
+
+
+@app.command()
+def memory(source: str = typer.Option(None, help="Profile the Python files in this directory instead of a synthetic corpus"),
+           files: int = typer.Option(20, help="Number of synthetic modules"),
+           classes: int = typer.Option(5, help="Top-level classes per module"),
+           methods: int = typer.Option(10, help="Methods per class"),
+           functions: int = typer.Option(5, help="Top-level functions per module"),
+           depth: int = typer.Option(2, help="Nesting depth of classes, functions and blocks"),
+           seed: int = typer.Option(0, help="Seed of the synthetic corpus"),
+           template: List[str] = typer.Option(None, help="Template to render with; repeatable"),
+           output_format: List[str] = typer.Option(None, help="Format to export to; repeatable"),
+           top: int = typer.Option(0, help="Show this many allocation sites per stage for the largest file"),
+           output: str = typer.Option(None, help="Write the results as JSON to this file"),
+           baseline: str = typer.Option(None, help="Compare peak memory against the JSON results of an earlier run"),
+           threshold: float = typer.Option(DEFAULT_THRESHOLD, help="Allowed growth per stage before failing (0.25 = 25%)")):
+    """
+    Reports the peak and retained memory of each stage with tracemalloc.
+    """
+    profiler = MemoryProfiler(template or DEFAULT_TEMPLATES, output_format or DEFAULT_FORMATS, top,
+                              log_callback=typer.echo)
+    if source:
+        results = profiler.run(source)
+    else:
+        results = profiler.run_corpus(CorpusGenerator(files, classes, methods, functions, depth, seed))
+    typer.echo(format_memory_results(results))
+    check_results(results, output, baseline, threshold, MIN_REGRESSION_BYTES, 'peak')
+
+
+def check_results(results, output, baseline, threshold, min_delta=None, metric='median'):
+    """Write the results and exit with status 1 if a stage regressed against the baseline."""
+    if output:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=4)
+        typer.echo(f"Results written to {output}")
+
+    if baseline:
+        with open(baseline, 'r') as file:
+            baseline_results = json.load(file)
+        if baseline_results.get('corpus') != results.get('corpus') or baseline_results['files'] != results['files']:
+            typer.echo("Warning: the baseline was measured on a different input.", err=True)
+        if min_delta is None:
+            regressions = compare(results, baseline_results, threshold, metric=metric)
+        else:
+            regressions = compare(results, baseline_results, threshold, min_delta, metric)
+        for regression in regressions:
+            typer.echo(f"Regression in {regression['stage']}: {regression['baseline']:g}"
+                       f" -> {regression['current']:g} ({regression['ratio']:.2f}x {metric})", err=True)
+        if regressions:
+            raise typer.Exit(code=1)
+        typer.echo(f"No stage regressed by more than {threshold:.0%} against {baseline}")
+
+
+@app.command()
+def corpus(destination: str = typer.Argument(..., help="Directory to write the synthetic package to"),
+           files: int = typer.Option(20, help="Number of modules"),
+           classes: int = typer.Option(5, help="Top-level classes per module"),
+           methods: int = typer.Option(10, help="Methods per class"),
+           functions: int = typer.Option(5, help="Top-level functions per module"),
+           depth: int = typer.Option(2, help="Nesting depth of classes, functions and blocks"),
+           seed: int = typer.Option(0, help="Seed of the generator")):
+    """
+    Writes a synthetic corpus, e.g. to benchmark 'genny gen' end to end.
+    """
+    paths = CorpusGenerator(files, classes, methods, functions, depth, seed).generate(destination)
+    typer.echo(f"Wrote {len(paths)} modules to {destination}")
+
+
+if __name__ == "__main__":
+    app()
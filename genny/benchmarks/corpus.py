@@ -0,0 +1,118 @@
+import os
+import random
+
+# Snippets used for method bodies, so the parser sees a realistic mix of statements
+_STATEMENTS = (
+    "result = {name}({arg})",
+    "self.{attr} = {arg}",
+    "items = [value * 2 for value in range({number})]",
+    "total = sum(items) + {number}",
+    "message = f\"{{{arg}!r}} is ready\"",
+)
+
+
+class CorpusGenerator:
+    """
+    Generate synthetic Python packages whose size and shape can be tuned, for
+    benchmarking the parser, the templates and the exporters.
+
+    The output only depends on the parameters and the seed, so two runs of a
+    benchmark document exactly the same code.
+    """
+
+    def __init__(self, files=20, classes=5, methods=10, functions=5, depth=2, seed=0):
+        """
+        Parameters:
+            - files: The number of modules.
+            - classes: The number of top-level classes per module.
+            - methods: The number of methods per class.
+            - functions: The number of top-level functions per module.
+            - depth: How deeply classes, functions and blocks are nested.
+            - seed: The seed of the random generator.
+        """
+        self.files = files
+        self.classes = classes
+        self.methods = methods
+        self.functions = functions
+        self.depth = depth
+        self.seed = seed
+
+    def parameters(self):
+        return {'files': self.files, 'classes': self.classes, 'methods': self.methods,
+                'functions': self.functions, 'depth': self.depth, 'seed': self.seed}
+
+    def module_path(self, number):
+        # Spread modules over a few sub-packages so paths have some depth
+        return f"pkg{number % 4}/module_{number}.py"
+
+    def generate_module(self, number):
+        """
+        Returns:
+            - The source code of module number.
+        """
+        rng = random.Random(f"{self.seed}:{number}")
+        lines = [f'"""Synthetic module {number}."""', "import os", "from collections import OrderedDict as Ordered"]
+        if number:
+            lines.append(f"from pkg{(number - 1) % 4}.module_{number - 1} import Class0 as Previous")
+        lines.append("")
+        for i in range(self.classes):
+            base = "Previous" if number and i == 0 else "object"
+            lines.extend(self._class(rng, f"Class{i}", base, 0, self.depth))
+        for i in range(self.functions):
+            lines.extend(self._function(rng, f"function_{i}", 0, self.depth, method=False))
+        return "\n".join(lines) + "\n"
+
+    def generate(self, directory):
+        """
+        Write the corpus under directory.
+
+        Returns:
+            - The relative paths of the generated modules.
+        """
+        paths = []
+        for number in range(self.files):
+            rel_path = self.module_path(number)
+            path = os.path.join(directory, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(self.generate_module(number))
+            paths.append(rel_path)
+        for package in {os.path.dirname(rel_path) for rel_path in paths}:
+            open(os.path.join(directory, package, "__init__.py"), 'a').close()
+        return paths
+
+    def _class(self, rng, name, base, indent, depth):
+        pad = "    " * indent
+        lines = [f"{pad}class {name}({base}):",
+                 f'{pad}    """{name} docstring, generated with {rng.randint(1, 1000)} tokens."""',
+                 f"{pad}    LIMIT = {rng.randint(1, 100)}",
+                 f"{pad}    label = 'class {name}'", ""]
+        for i in range(self.methods):
+            lines.extend(self._function(rng, f"method_{i}", indent + 1, depth, method=True))
+        if depth > 1:
+            lines.extend(self._class(rng, f"Inner{name}", "object", indent + 1, depth - 1))
+        return lines
+
+    def _function(self, rng, name, indent, depth, method):
+        pad = "    " * indent
+        params = ", ".join(["self"] * method + [f"arg{i}" for i in range(rng.randint(0, 3))] + ["value=None"])
+        lines = [f"{pad}def {name}({params}):",
+                 f'{pad}    """Return something useful from {name}."""']
+        lines.extend(self._block(rng, indent + 1, depth, method))
+        if depth > 1 and not method:
+            lines.extend(self._function(rng, f"{name}_helper", indent + 1, depth - 1, method=False))
+        lines.append(f"{pad}    return {rng.choice(['value', 'self' if method else 'None', 'os.sep'])}")
+        lines.append("")
+        return lines
+
+    def _block(self, rng, indent, depth, method):
+        pad = "    " * indent
+        lines = []
+        for _ in range(rng.randint(1, 3)):
+            statement = rng.choice(_STATEMENTS if method else _STATEMENTS[:1] + _STATEMENTS[2:])
+            lines.append(pad + statement.format(name="len", arg="value", attr=f"attr{rng.randint(0, 9)}",
+                                                number=rng.randint(1, 50)))
+        if depth > 1:
+            lines.append(f"{pad}if value is not None:")
+            lines.extend(self._block(rng, indent + 1, depth - 1, method))
+        return lines
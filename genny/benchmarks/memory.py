@@ -0,0 +1,179 @@
+from genny.benchmarks.runner import BenchmarkRunner, DEFAULT_TEMPLATES, DEFAULT_FORMATS
+import ast
+import os
+import platform
+import tempfile
+import tracemalloc
+
+
+class MemoryProfiler:
+    """
+    Measure the memory of each stage of the pipeline with tracemalloc: the AST,
+    the CodeStructure dicts, the to_dict copies, the rendered strings and the
+    serialized output.
+
+    Files are processed one after the other and released in between, like in a
+    batch worker. For every stage, 'peak' is the highest memory it allocated on
+    top of what was live when it started, and 'retained' is what was still
+    allocated when it returned (the size of its result).
+    """
+
+    def __init__(self, templates=DEFAULT_TEMPLATES, formats=DEFAULT_FORMATS, top=0, log_callback=None):
+        """
+        Parameters:
+            - templates: The templates to render with.
+            - formats: The formats to export to.
+            - top: The number of allocation sites to report per stage, from
+              tracemalloc snapshots of the largest file; 0 to skip snapshots.
+            - log_callback: Called with a progress message after each file.
+        """
+        self.runner = BenchmarkRunner(templates, formats, repeat=1)
+        self.top = top
+        self.log_callback = log_callback
+        # The highest traced memory seen by profile_file, in bytes
+        self.max_traced = 0
+
+    def run_corpus(self, corpus):
+        """
+        Profile a synthetic corpus (a CorpusGenerator), written to a temporary directory.
+
+        Returns:
+            - The results, as returned by run().
+        """
+        with tempfile.TemporaryDirectory() as root:
+            corpus.generate(root)
+            results = self.run(root)
+        results['corpus'] = corpus.parameters()
+        return results
+
+    def run(self, root, paths=None):
+        """
+        Profile the Python files under root (or the given relative paths).
+
+        Returns:
+            - A JSON-serialisable dict with, under 'stages', the largest and mean
+              'peak' and the largest 'retained' bytes of every stage, the 'peak'
+              of the whole run and, with top, the allocation 'sites' per stage.
+        """
+        paths = BenchmarkRunner.find_files(root) if paths is None else list(paths)
+        sizes = {path: os.path.getsize(os.path.join(root, path)) for path in paths}
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            baseline = self.max_traced = tracemalloc.get_traced_memory()[0]
+            measurements = {}
+            for number, path in enumerate(paths, 1):
+                for stage, (peak, retained) in self.profile_file(root, path).items():
+                    measurements.setdefault(stage, []).append((peak, retained))
+                if self.log_callback:
+                    self.log_callback(f"File {number}/{len(paths)} done: {path}")
+            run_peak = self.max_traced - baseline
+            sites = {}
+            if self.top and paths:
+                largest = max(paths, key=lambda path: (sizes[path], path))
+                sites = self.allocation_sites(root, largest)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        stages = {}
+        for stage, values in measurements.items():
+            peaks = [peak for peak, _ in values]
+            stages[stage] = {
+                'peak': max(peaks),
+                'mean_peak': sum(peaks) // len(peaks),
+                'retained': max(retained for _, retained in values)
+            }
+            if stage in sites:
+                stages[stage]['sites'] = sites[stage]
+        return {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'root': os.path.abspath(root),
+            'files': len(paths),
+            'bytes': sum(sizes.values()),
+            'peak': run_peak,
+            'stages': stages
+        }
+
+    def stages(self, root, path):
+        """
+        Yield the (stage name, function) pairs of one file. The functions keep
+        their results in a shared dict, so they stay alive until the file is done.
+        """
+        state = {}
+        runner = self.runner
+
+        def read():
+            state['source'] = runner.file_system.read_file(os.path.join(root, path))
+
+        def parse():
+            state['tree'] = ast.parse(state['source'])
+
+        def structure():
+            state['structure'] = runner.parser.build_code_structure(state['tree'], state['source'])
+
+        def to_dict():
+            state['docs'] = dict(state['structure'].to_dict(), title=os.path.basename(path))
+
+        yield 'read', read
+        yield 'ast', parse
+        yield 'structure', structure
+        yield 'to_dict', to_dict
+        for template in runner.templates:
+            def render(template=template):
+                state[f"render:{template}"] = runner.templater.render_template(template, state['docs'])
+            yield f"render:{template}", render
+        for f in runner.formats:
+            def export(f=f):
+                runner.docgen.generated_docs = state['docs']
+                runner.docgen.current_template = runner.templates[0] if runner.templates else 'standard'
+                state[f"export:{f}"] = runner.docgen.format_docs(f)
+            yield f"export:{f}", export
+
+    def profile_file(self, root, path):
+        """
+        Returns:
+            - A mapping of stage name to (peak bytes, retained bytes) for one file.
+        """
+        measurements = {}
+        for stage, function in self.stages(root, path):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function()
+            current, peak = tracemalloc.get_traced_memory()
+            measurements[stage] = (peak - before, current - before)
+            self.max_traced = max(self.max_traced, peak)
+        return measurements
+
+    def allocation_sites(self, root, path):
+        """
+        Take a tracemalloc snapshot around every stage of one file.
+
+        Returns:
+            - A mapping of stage name to its top allocation sites, as
+              'file:line' strings with the bytes still allocated there.
+        """
+        sites = {}
+        trace_filter = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        for stage, function in self.stages(root, path):
+            before = tracemalloc.take_snapshot().filter_traces(trace_filter)
+            function()
+            after = tracemalloc.take_snapshot().filter_traces(trace_filter)
+            sites[stage] = [{'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                             'bytes': stat.size_diff}
+                            for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0][:self.top]
+        return sites
+
+
+def format_memory_results(results):
+    """Format the per-stage memory of a run as a text table."""
+    lines = [f"{results['files']} files, {results['bytes']} bytes, peak {results['peak'] / 1024:.1f} KiB",
+             f"{'Stage':<18}{'Peak (KiB)':>14}{'Mean (KiB)':>14}{'Retained (KiB)':>16}"]
+    for stage, memory in results['stages'].items():
+        lines.append(f"{stage:<18}{memory['peak'] / 1024:>14.1f}{memory['mean_peak'] / 1024:>14.1f}"
+                     f"{memory['retained'] / 1024:>16.1f}")
+        for site in memory.get('sites', []):
+            lines.append(f"    {site['bytes'] / 1024:>10.1f} KiB  {site['site']}")
+    return '\n'.join(lines)
@@ -0,0 +1,157 @@
+from genny.codeparser import CodeParser
+from genny.docgen import Docgen
+from genny.filesystem import FileSystem
+from genny.templater import Templater
+import ast
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+DEFAULT_TEMPLATES = ('standard', 'html1', 'html2')
+DEFAULT_FORMATS = ('json', 'markdown', 'yaml', 'html')
+# A stage regresses when its median is this much slower than the baseline's...
+DEFAULT_THRESHOLD = 0.25
+# ...and at least this many seconds slower, so timer noise on tiny stages is ignored
+MIN_REGRESSION_SECONDS = 0.005
+# The same for memory: growth below this many bytes is ignored
+MIN_REGRESSION_BYTES = 64 * 1024
+
+
+class BenchmarkRunner:
+    """
+    Time each stage of the pipeline over a set of Python files: reading, ast.parse,
+    extracting the code structure, to_dict, rendering with each template and
+    exporting to each format. Every stage is timed over all files together,
+    repeat times, so the medians can be compared between runs.
+    """
+
+    def __init__(self, templates=DEFAULT_TEMPLATES, formats=DEFAULT_FORMATS, repeat=3, log_callback=None):
+        self.templates = list(templates)
+        self.formats = list(formats)
+        self.repeat = repeat
+        self.log_callback = log_callback
+        self.file_system = FileSystem()
+        self.parser = CodeParser(self.file_system)
+        self.templater = Templater()
+        self.docgen = Docgen()
+
+    @staticmethod
+    def find_files(root):
+        """
+        Returns:
+            - The sorted relative paths of the Python files under root.
+        """
+        paths = []
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names[:] = sorted(d for d in dir_names if not d.startswith('.') and d != '__pycache__')
+            paths.extend(os.path.relpath(os.path.join(dir_path, name), root).replace(os.sep, '/')
+                         for name in file_names if name.endswith('.py'))
+        return sorted(paths)
+
+    def run_corpus(self, corpus):
+        """
+        Benchmark a synthetic corpus (a CorpusGenerator), written to a temporary directory.
+
+        Returns:
+            - The results, as returned by run().
+        """
+        with tempfile.TemporaryDirectory() as root:
+            corpus.generate(root)
+            results = self.run(root)
+        results['corpus'] = corpus.parameters()
+        return results
+
+    def run(self, root, paths=None):
+        """
+        Benchmark the Python files under root (or the given relative paths).
+
+        Returns:
+            - A JSON-serialisable dict with the environment, the input size and,
+              under 'stages', the 'min', 'median' and 'runs' (in seconds) of every stage.
+        """
+        paths = self.find_files(root) if paths is None else list(paths)
+        runs = {}
+        for number in range(self.repeat):
+            for stage, seconds in self.run_once(root, paths).items():
+                runs.setdefault(stage, []).append(seconds)
+            if self.log_callback:
+                self.log_callback(f"Run {number + 1}/{self.repeat} done")
+        return {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'root': os.path.abspath(root),
+            'files': len(paths),
+            'bytes': sum(os.path.getsize(os.path.join(root, path)) for path in paths),
+            'repeat': self.repeat,
+            'stages': {stage: {'min': min(values), 'median': statistics.median(values), 'runs': values}
+                       for stage, values in runs.items()}
+        }
+
+    def run_once(self, root, paths):
+        """
+        Time every stage once over all files.
+
+        Returns:
+            - A mapping of stage name to total seconds.
+        """
+        totals = dict.fromkeys(['read', 'parse', 'extract', 'to_dict']
+                               + [f"render:{template}" for template in self.templates]
+                               + [f"export:{f}" for f in self.formats], 0.0)
+
+        def timed(stage, function, *args):
+            start = time.perf_counter()
+            value = function(*args)
+            totals[stage] += time.perf_counter() - start
+            return value
+
+        for path in paths:
+            source_code = timed('read', self.file_system.read_file, os.path.join(root, path))
+            tree = timed('parse', ast.parse, source_code)
+            structure = timed('extract', self.parser.build_code_structure, tree, source_code)
+            docs = dict(timed('to_dict', structure.to_dict), title=os.path.basename(path))
+            for template in self.templates:
+                timed(f"render:{template}", self.templater.render_template, template, docs)
+            self.docgen.generated_docs = docs
+            self.docgen.current_template = self.templates[0] if self.templates else 'standard'
+            for f in self.formats:
+                timed(f"export:{f}", self.docgen.format_docs, f)
+        return totals
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta=MIN_REGRESSION_SECONDS, metric='median'):
+    """
+    Compare the stages of a run against a baseline run.
+
+    Parameters:
+        - results: The results of the current run.
+        - baseline: The stored results to compare against.
+        - threshold: The allowed growth, as a fraction of the baseline value.
+        - min_delta: Growth smaller than this is ignored.
+        - metric: The stage value to compare: 'median' for timings, 'peak'
+          or 'retained' for memory results.
+
+    Returns:
+        - A list of dicts with the 'stage', 'baseline' and 'current' values
+          and their 'ratio', for every stage that regressed.
+    """
+    regressions = []
+    for stage, timing in results['stages'].items():
+        if stage not in baseline.get('stages', {}):
+            continue
+        before = baseline['stages'][stage][metric]
+        after = timing[metric]
+        if after > before * (1 + threshold) and after - before >= min_delta:
+            regressions.append({'stage': stage, 'baseline': before, 'current': after,
+                                'ratio': after / before if before else float('inf')})
+    return regressions
+
+
+def format_results(results):
+    """Format the stage timings of a run as a text table."""
+    lines = [f"{results['files']} files, {results['bytes']} bytes, {results['repeat']} runs",
+             f"{'Stage':<18}{'Median (ms)':>14}{'Min (ms)':>12}"]
+    for stage, timing in results['stages'].items():
+        lines.append(f"{stage:<18}{timing['median'] * 1000:>14.2f}{timing['min'] * 1000:>12.2f}")
+    return '\n'.join(lines)
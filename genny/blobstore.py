@@ -0,0 +1,132 @@
+from genny.filesystem import FileSystem
+import hashlib
+import json
+import os
+import uuid
+
+OBJECTS_DIR = "objects"
+MANIFESTS_DIR = "manifests"
+# Blobs are shared by every version that links to them, so they are never edited in place
+BLOB_MODE = 0o444
+
+
+class BlobStore:
+    """
+    A content-addressed store of generated files, shared by many versions of a site.
+
+    Each distinct file is stored once under objects/ by its SHA-256. A version's
+    tree is made of hardlinks to those blobs (or copies, across file systems), and
+    its manifest records which blob every path points to, so the tree can be
+    recreated from the store alone.
+
+    read_file() and write_file() have the same contract as FileSystem's, so the
+    store can be used anywhere generated files are written.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.file_system = FileSystem()
+        # Every path written since the last reset, mapped to its blob SHA
+        self.files = {}
+
+    def blob_path(self, sha):
+        return os.path.join(self.store_dir, OBJECTS_DIR, sha[:2], sha[2:])
+
+    def put(self, data):
+        """
+        Store content unless it is already present.
+
+        Returns:
+            - The SHA-256 of the content.
+        """
+        content = data.encode('utf-8') if isinstance(data, str) else data
+        sha = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file_system.write_file(path, content)
+            os.chmod(path, BLOB_MODE)
+        return sha
+
+    def read_file(self, file_path):
+        return self.file_system.read_file(file_path)
+
+    def write_file(self, file_path, data):
+        """
+        Store data and link file_path to its blob.
+
+        Returns:
+            - True if file_path changed, False if it already pointed to the same content.
+        """
+        sha = self.put(data)
+        self.files[os.path.abspath(file_path)] = sha
+        return self.link(sha, file_path)
+
+    def link(self, sha, file_path):
+        """Point file_path at a blob, replacing whatever was there atomically."""
+        blob = self.blob_path(sha)
+        try:
+            if os.path.samefile(blob, file_path):
+                return False
+        except OSError:
+            pass
+        temp_path = os.path.join(os.path.dirname(os.path.abspath(file_path)),
+                                 f".{os.path.basename(file_path)}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(blob, temp_path)
+        except OSError:
+            # Hardlinks are not possible across file systems; fall back to a copy
+            with open(blob, 'rb') as file:
+                return self.file_system.write_file(file_path, file.read())
+        try:
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return True
+
+    def manifest_path(self, version):
+        return os.path.join(self.store_dir, MANIFESTS_DIR, f"{version}.json")
+
+    def save_manifest(self, version, destination):
+        """
+        Record the files written under destination since the last reset as a version.
+
+        Returns:
+            - The manifest, mapping relative paths to blob SHAs.
+        """
+        root = os.path.abspath(destination)
+        manifest = {os.path.relpath(path, root).replace(os.sep, '/'): sha
+                    for path, sha in sorted(self.files.items())
+                    if os.path.commonpath([root, path]) == root}
+        os.makedirs(os.path.join(self.store_dir, MANIFESTS_DIR), exist_ok=True)
+        self.file_system.write_file(self.manifest_path(version),
+                                    json.dumps({'version': version, 'files': manifest}, indent=4))
+        return manifest
+
+    def load_manifest(self, version):
+        manifest_path = self.manifest_path(version)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No manifest for version '{version}' in {self.store_dir}.")
+        with open(manifest_path, 'r') as file:
+            return json.load(file)['files']
+
+    def versions(self):
+        manifests_dir = os.path.join(self.store_dir, MANIFESTS_DIR)
+        if not os.path.isdir(manifests_dir):
+            return []
+        return sorted(name[:-len('.json')] for name in os.listdir(manifests_dir) if name.endswith('.json'))
+
+    def materialize(self, version, destination):
+        """
+        Recreate a version's tree under destination from its manifest.
+
+        Returns:
+            - The number of files that changed.
+        """
+        changed = 0
+        for rel_path, sha in self.load_manifest(version).items():
+            target = os.path.join(destination, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            changed += self.link(sha, target)
+        return changed
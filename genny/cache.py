@@ -0,0 +1,77 @@
+from genny import events
+import json
+import os
+
+
+class Cache:
+    """
+    A small on-disk JSON cache. Entries are grouped by namespace and keyed
+    by a content hash (e.g. a git blob SHA), so they never need invalidating.
+    """
+
+    def __init__(self, cache_dir=".genny_cache"):
+        self.cache_dir = cache_dir
+
+    def _entry_path(self, namespace, key):
+        return os.path.join(self.cache_dir, namespace, key[:2], f"{key}.json")
+
+    def get(self, namespace, key):
+        """
+        Retrieve a cached value.
+
+        Returns:
+            The cached value, or None if there is no (readable) entry.
+        """
+        try:
+            with open(self._entry_path(namespace, key), "r") as file:
+                value = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            events.emit(events.CACHE_MISS, namespace=namespace)
+            return None
+        events.emit(events.CACHE_HIT, namespace=namespace)
+        return value
+
+    def set(self, namespace, key, value):
+        """
+        Store a value. Failures are ignored, since the cache is only an optimisation.
+        """
+        path = self._entry_path(namespace, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(value, file)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError):
+            pass
+
+    def touch(self, namespace, key):
+        """Mark an entry as used now, so prune() keeps it."""
+        try:
+            os.utime(self._entry_path(namespace, key))
+        except OSError:
+            pass
+
+    def prune(self, namespace, before):
+        """
+        Remove the entries of a namespace that were neither written nor touched
+        since before (a time.time() value).
+
+        Returns:
+            - The number of entries removed.
+        """
+        removed = 0
+        for directory, _, file_names in os.walk(os.path.join(self.cache_dir, namespace), topdown=False):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                try:
+                    if os.path.getmtime(path) < before:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+            try:
+                os.rmdir(directory)  # Only succeeds once the directory is empty
+            except OSError:
+                pass
+        return removed
@@ -3,12 +3,29 @@ import pyfiglet
 from .docgen import Docgen
 from .templater import Templater
 from .versioncontrol import VersionControl
+from .filesystem import FileSystem
 from .settingsmanager import SettingsManager
+from .cache import Cache
+from .apidiff import ApiDiff
+from .batch import BatchGenerator, SYMBOL_INDEX_FILE
+from .symbolindex import SymbolIndex
+from .compression import Precompressor, MIN_COMPRESS_SIZE
+from .archive import is_archive_path
+from .sources import is_source_archive
+from .blobstore import BlobStore
+from .profiling import Profiler
+from .metrics import MetricsSink
+from .progress import create_progress
+from .guards import ResourceLimits
+from .codeparser import MAX_VALUE_LENGTH
+from .pipeline import DEFAULT_IO_THREADS
+from . import events, profiling
+from contextlib import nullcontext
 import json
 import os
+from typing import List
 
 app = typer.Typer()
-# TODO: add generation for all files in a folder
 settings_manager = SettingsManager()
 
 
@@ -32,11 +49,40 @@ settings = load_settings()
 @app.command()
 def gen(code_file: str = typer.Option(None, help="Path to the code file"),
         template: str = typer.Option(None, help="Template to use for documentation"),
-        output_format: str = typer.Option(None, help="Output format (e.g., markdown, html, json, yaml)"),
-        destination: str = typer.Option(None, help="Destination file path for the generated documentation")):
+        output_format: str = typer.Option(None, help="Output format (e.g., markdown, html, json, yaml, sqlite)"),
+        destination: str = typer.Option(None, help="Destination file path for the generated documentation"),
+        blame: bool = typer.Option(False, help="Annotate classes and functions with the commit that last changed them"),
+        jobs: int = typer.Option(1, help="Number of worker processes when generating a directory"),
+        shard: str = typer.Option(None, help="Only generate shard i of N (e.g. 2/4) of a directory"),
+        artifact_store: str = typer.Option(None, help="Shared directory to write shard outputs to, for 'genny merge'"),
+        symbol_index: bool = typer.Option(False, help="Also write a SQLite symbol index when generating a directory"),
+        search_index: bool = typer.Option(False, help="Add a prebuilt client-side search index to an html site"),
+        shared_assets: bool = typer.Option(False, help="Link every page of an html site to shared, fingerprinted CSS/JS files"),
+        compress: List[str] = typer.Option(None, help="Also write precompressed copies (gzip, bz2 or xz); repeatable"),
+        compress_min_size: int = typer.Option(MIN_COMPRESS_SIZE, help="Do not compress outputs smaller than this many bytes"),
+        output_archive: str = typer.Option(None, help="Stream a directory's documentation into one .zip, .tar or .tar.gz file"),
+        blob_store: str = typer.Option(None, help="Store each distinct output once in this directory and hardlink it into the destination"),
+        site_version: str = typer.Option(None, help="Name of the manifest saved in the blob store (default: the destination's name)"),
+        split_pages: int = typer.Option(0, help="Split html pages with more symbols than this into parts loaded on demand"),
+        cross_references: bool = typer.Option(False, help="Link base classes and imports to their documentation when generating a directory"),
+        profile: bool = typer.Option(False, help="Time each stage (read, parse, render, git, ...) and print a summary at the end"),
+        cprofile: str = typer.Option(None, help="Write a cProfile of the run to this file (worker processes are not included)"),
+        trace: str = typer.Option(None, help="Write a Chrome/Perfetto trace of every file and stage, per worker, to this JSON file"),
+        metrics_file: str = typer.Option(None, help="Write run metrics to this file, as JSON if it ends in .json, else in the Prometheus text format"),
+        progress: bool = typer.Option(True, help="Show live progress when generating a directory (plain lines when not on a terminal)"),
+        max_file_bytes: int = typer.Option(None, help="Do not parse files larger than this many bytes"),
+        max_nodes: int = typer.Option(None, help="Do not extract files whose syntax tree has more nodes than this"),
+        file_timeout: float = typer.Option(None, help="Seconds allowed to parse and extract one file"),
+        on_limit: str = typer.Option("summary", help="For files over a limit: 'summary' documents only top-level names, 'skip' reports them as failed"),
+        max_value_length: int = typer.Option(MAX_VALUE_LENGTH, help="Cut attribute values longer than this many characters (0 for no limit)"),
+        async_io: bool = typer.Option(False, help="Read and write files in a thread pool while workers parse and render (for slow or network storage)"),
+        io_threads: int = typer.Option(DEFAULT_IO_THREADS, help="Threads reading and writing files with --async-io"),
+        fragment_cache: bool = typer.Option(False, help="Keep the rendered html of each class and function in the cache directory and only re-render changed ones (a directory run prunes pages it did not render)")):
     """
     Generates documentation from the specified code file using the given template and output format.
     If a destination is specified, exports the documentation; otherwise, prints it to the console.
+    If the code file is a directory, or a wheel, sdist or zip archive, every Python file in it is
+    documented into the destination directory.
     """
     # Use settings.json defaults if parameters are not provided
     code_file = code_file or settings.get("default_code")
@@ -49,11 +95,55 @@ def gen(code_file: str = typer.Option(None, help="Path to the code file"),
         return
 
     typer.echo(pyfiglet.figlet_format("generating docs...", font="banner"))
-    dg = Docgen()
+    profiler = Profiler() if profile or trace else None
+    metrics = MetricsSink(metrics_file) if metrics_file else None
+    with profiling.cprofiled(cprofile), profiling.enabled(profiler), events.subscribed(metrics):
+        if os.path.isdir(code_file) or is_source_archive(code_file):
+            generate_directory(code_file, template, output_format, destination, blame, jobs, shard,
+                               artifact_store, symbol_index, search_index, shared_assets,
+                               compress, compress_min_size, output_archive, blob_store, site_version, split_pages,
+                               cross_references, profiler, progress,
+                               max_file_bytes, max_nodes, file_timeout, on_limit, max_value_length,
+                               async_io, io_threads, fragment_cache)
+        else:
+            if output_archive:
+                typer.echo("--output-archive is only used when documenting a directory.")
+            generate_file(code_file, template, output_format, destination, blame,
+                          compress, compress_min_size, split_pages,
+                          max_file_bytes, max_nodes, file_timeout, on_limit, max_value_length,
+                          fragment_cache)
+    if profile:
+        typer.echo(profiler.report())
+    if trace:
+        profiler.write_trace(trace)
+        typer.echo(f"Trace written to {trace}")
+    if metrics:
+        metrics.write()
+        typer.echo(f"Metrics written to {metrics_file}")
+    if cprofile:
+        typer.echo(f"Profile written to {cprofile}")
+
+
+def generate_file(code_file, template, output_format, destination, blame,
+                  compress=None, compress_min_size=MIN_COMPRESS_SIZE, split_pages=0,
+                  max_file_bytes=None, max_nodes=None, file_timeout=None, on_limit='summary',
+                  max_value_length=MAX_VALUE_LENGTH, fragment_cache=False):
+    """
+    Generates documentation for a single code file.
+    """
     try:
-        dg.generate_docs(code_file, template)
+        precompressor = Precompressor(compress, compress_min_size) if compress else None
+        dg = Docgen(log_callback=typer.echo, blame=blame,
+                    cache=Cache(settings.get("cache_dir") or ".genny_cache"), precompressor=precompressor)
+        dg.split_pages = split_pages
+        dg.fragment_cache = fragment_cache
+        dg.limits = ResourceLimits(max_file_bytes, max_nodes, file_timeout, on_limit)
+        dg.parser.max_value_length = max_value_length
+        with profiling.current_file(code_file):
+            dg.generate_docs(code_file, template)
+            if destination:
+                dg.export_docs(output_format, destination)
         if destination:
-            dg.export_docs(output_format, destination)
             print(f"Generated successfully at {destination}")
             repo = settings_manager.settings.get("repo_path")
             if repo:
@@ -67,6 +157,135 @@ def gen(code_file: str = typer.Option(None, help="Path to the code file"),
         typer.echo(f"An error occurred: {str(e)}", err=True)
 
 
+def generate_directory(code_dir, template, output_format, destination, blame, jobs, shard,
+                       artifact_store, symbol_index, search_index, shared_assets=False,
+                       compress=None, compress_min_size=MIN_COMPRESS_SIZE, output_archive=None,
+                       blob_store=None, site_version=None, split_pages=0, cross_references=False,
+                       profiler=None, progress=False, max_file_bytes=None, max_nodes=None,
+                       file_timeout=None, on_limit='summary', max_value_length=MAX_VALUE_LENGTH,
+                       async_io=False, io_threads=DEFAULT_IO_THREADS, fragment_cache=False):
+    """
+    Generates documentation for every Python file in a directory or archive, or for one shard of them.
+    """
+    try:
+        shard = BatchGenerator.parse_shard(shard) if shard else None
+        limits = ResourceLimits(max_file_bytes, max_nodes, file_timeout, on_limit)
+        if output_archive:
+            if not is_archive_path(output_archive):
+                raise ValueError(f"Unsupported archive '{output_archive}'. Use a .zip, .tar or .tar.gz file.")
+            destination = output_archive
+        if shard and artifact_store:
+            destination = BatchGenerator.shard_directory(artifact_store, shard)
+        if not destination:
+            typer.echo("A destination directory is required when generating a directory. Exiting.")
+            return
+
+        generator = BatchGenerator(template, output_format, jobs=jobs, blame=blame,
+                                   cache_dir=settings.get("cache_dir") or ".genny_cache",
+                                   symbol_index=symbol_index, search_index=search_index,
+                                   shared_assets=shared_assets, compress=compress or (),
+                                   compress_min_size=compress_min_size, blob_store=blob_store,
+                                   version=site_version, split_pages=split_pages,
+                                   cross_references=cross_references, profiler=profiler,
+                                   limits=limits or None, max_value_length=max_value_length,
+                                   async_io=async_io, io_threads=io_threads, fragment_cache=fragment_cache,
+                                   log_callback=typer.echo)
+        display = create_progress() if progress else None
+        with events.subscribed(display), display or nullcontext():
+            index = generator.generate(code_dir, destination, shard=shard)
+        print(f"Generated {len(index['files'])} files at {destination}"
+              f" ({generator.written} written, {generator.unchanged} unchanged)")
+        if index['errors']:
+            print(f"{len(index['errors'])} files failed")
+        if index['degraded']:
+            print(f"{len(index['degraded'])} files were only summarised because they exceeded a limit")
+        repo = settings_manager.settings.get("repo_path")
+        if repo and not shard:
+            vc = VersionControl(repo)
+            vc.commit_changes("committed via CLI")
+            print(f"Changes committed to {repo}")
+    except Exception as e:
+        typer.echo(f"An error occurred: {str(e)}", err=True)
+
+
+@app.command()
+def merge(shard_dirs: List[str] = typer.Argument(None, help="Shard output directories to merge"),
+          artifact_store: str = typer.Option(None, help="Merge every shard found in this artifact store"),
+          destination: str = typer.Option(..., help="Directory, or .zip/.tar/.tar.gz archive, for the combined site")):
+    """
+    Combines the outputs and indexes of sharded 'gen --shard' runs into one site.
+    """
+    try:
+        sources = list(shard_dirs or [])
+        if artifact_store:
+            sources += BatchGenerator.find_shards(artifact_store)
+        if not sources:
+            typer.echo("No shard directories provided. Exiting.")
+            return
+        generator = BatchGenerator()
+        index = generator.merge(sources, destination)
+        typer.echo(f"Merged {len(sources)} shards ({len(index['files'])} files) into {destination}"
+                   f" ({generator.written} written, {generator.unchanged} unchanged)")
+    except Exception as e:
+        typer.echo(f"An error occurred: {str(e)}", err=True)
+
+
+@app.command()
+def materialize(site_version: str = typer.Argument(..., help="Version whose manifest to restore"),
+                blob_store: str = typer.Option(..., help="Blob store written by 'gen --blob-store'"),
+                destination: str = typer.Option(..., help="Directory to recreate the version's files in")):
+    """
+    Recreates a version's documentation tree from a blob store, using hardlinks.
+    """
+    store = BlobStore(blob_store)
+    try:
+        changed = store.materialize(site_version, destination)
+        typer.echo(f"Materialized {site_version} at {destination} ({changed} files changed)")
+    except FileNotFoundError as e:
+        typer.echo(f"An error occurred: {str(e)}", err=True)
+        typer.echo(f"Available versions: {', '.join(store.versions()) or 'none'}")
+
+
+@app.command()
+def query(pattern: str = typer.Argument(None, help="Glob for the qualified name, e.g. 'Docgen.*'"),
+          kind: str = typer.Option(None, help="Symbol kind (module, class, method, function, attribute, import)"),
+          name: str = typer.Option(None, help="Glob for the bare symbol name, e.g. 'format_*'"),
+          index: str = typer.Option(SYMBOL_INDEX_FILE, help="Path to the symbol index written by 'gen --symbol-index'"),
+          limit: int = typer.Option(50, help="Maximum number of results"),
+          as_json: bool = typer.Option(False, "--json", help="Print the results as JSON")):
+    """
+    Looks up documented symbols in a prebuilt symbol index.
+    """
+    if not (pattern or kind or name):
+        typer.echo("Provide a pattern, --kind or --name to search for. Exiting.")
+        return
+
+    try:
+        with SymbolIndex(index, read_only=True) as symbol_index:
+            results = symbol_index.query(pattern, kind=kind, name=name, limit=limit)
+    except Exception as e:
+        typer.echo(f"An error occurred: {str(e)}", err=True)
+        return
+
+    index_dir = os.path.dirname(index)
+    for symbol in results:
+        if symbol['output']:
+            symbol['output'] = os.path.join(index_dir, symbol['output'])
+    if as_json:
+        typer.echo(json.dumps(results, indent=4))
+        return
+    if not results:
+        typer.echo("No matching symbols found.")
+    for symbol in results:
+        typer.echo(f"{symbol['qualname']} ({symbol['kind']})")
+        if symbol['signature']:
+            typer.echo(f"    {symbol['signature']}")
+        if symbol['docstring']:
+            typer.echo(f"    {symbol['docstring'].splitlines()[0]}")
+        location = f"{symbol['path']}:{symbol['lineno']}" if symbol['lineno'] else symbol['path']
+        typer.echo(f"    docs: {symbol['output'] or '-'}  source: {location}")
+
+
 @app.command()
 def list_templates():
     """
@@ -220,6 +439,36 @@ def checkout_branch(b: str = typer.Option(None, help="Branch name")):
     vc.checkout(b)
 
 
+@app.command()
+def diff_api(old_ref: str, new_ref: str,
+             repo: str = typer.Option(None, help="Path to the repository (defaults to repo_path in settings)"),
+             output_format: str = typer.Option("markdown", help="Output format (markdown or json)"),
+             destination: str = typer.Option(None, help="Destination file path for the changelog")):
+    """
+    Reports added, removed and changed classes, methods and functions between two revisions.
+    """
+    repo_path = repo or settings_manager.settings.get("repo_path") or "."
+    if output_format not in ["markdown", "json"]:
+        typer.echo(f"Unsupported format: {output_format}")
+        return
+
+    try:
+        api_diff = ApiDiff(VersionControl(repo_path), cache=Cache(settings.get("cache_dir") or ".genny_cache"),
+                           log_callback=typer.echo)
+        changes = api_diff.diff(old_ref, new_ref)
+        if output_format == "json":
+            output = api_diff.format_json(changes, old_ref, new_ref)
+        else:
+            output = api_diff.format_markdown(changes, old_ref, new_ref)
+        if destination:
+            FileSystem().write_file(destination, output)
+            typer.echo(f"API changelog written to {destination}")
+        else:
+            typer.echo(output)
+    except Exception as e:
+        typer.echo(f"An error occurred: {str(e)}", err=True)
+
+
 @app.command()
 def edit_settings():
     """
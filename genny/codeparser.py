@@ -1,4 +1,33 @@
+from genny import profiling
 import ast
+import hashlib
+import re
+
+# Longest rendered attribute value, in characters (None for no limit)
+MAX_VALUE_LENGTH = 200
+# Appended to a value cut at MAX_VALUE_LENGTH
+TRUNCATION_MARKER = '...'
+# Top-level definitions whose extracted details a parser keeps between parses
+DEFINITION_CACHE_SIZE = 4096
+# Line breaks as the tokenizer sees them, so line numbers match the AST
+_LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+
+def import_bindings(code_structure):
+    """
+    Map the names bound by a module's imports to the qualified names they
+    refer to, from a CodeStructure.to_dict() output. Structures that were not
+    built by the parser only list the imports, which are read as
+    'from x import y' (each binds its last component).
+    """
+    if 'import_bindings' in code_structure:
+        return dict(code_structure['import_bindings'])
+    bindings = {}
+    for imports in code_structure.get('imports', []):
+        for item in imports:
+            target, _, alias = item.partition(' as ')
+            bindings[alias or target.rsplit('.', 1)[-1]] = target
+    return bindings
 
 
 class CodeStructure:
@@ -11,6 +40,10 @@ class CodeStructure:
         self.classes = []
         self.functions = []
         self.variables = []
+        # Maps 'name' / 'Class.method' to the (first, last) source lines
+        self.line_numbers = {}
+        # Maps each name bound by an import to the qualified name it refers to
+        self.import_bindings = {}
 
     def add_class(self, class_info):
         self.classes.append(class_info)
@@ -21,16 +54,27 @@ class CodeStructure:
     def add_variable(self, variable_info):
         self.variables.append(variable_info)
 
-    def add_import(self, import_info):
+    def add_import(self, import_info, bindings=()):
         self.imports.append(import_info)
+        self.import_bindings.update(bindings)
+
+    def add_line_numbers(self, name, first, last):
+        # The first (outermost) definition of a name wins, matching ast.walk order
+        self.line_numbers.setdefault(name, (first, last))
 
     def to_dict(self):
+        with profiling.stage('to_dict'):
+            return self._to_dict()
+
+    def _to_dict(self):
         # Dictionary to collect data
         data = {}
 
         # Handling imports
         if self.imports:
             data['imports'] = [self.format_imports(imp) for imp in self.imports if imp]
+        if self.import_bindings:
+            data['import_bindings'] = dict(self.import_bindings)
 
         # Handling classes
         if self.classes:
@@ -95,38 +139,137 @@ class CodeStructure:
         self.functions.clear()
         self.variables.clear()
         self.imports.clear()
+        self.line_numbers.clear()
+        self.import_bindings.clear()
 
 
 class CodeParser:
-    def __init__(self, file_system):
+    def __init__(self, file_system, max_value_length=MAX_VALUE_LENGTH):
         self.file_system = file_system
         self.code_structure = CodeStructure()
         self.docstrings = []
+        self.max_value_length = max_value_length
+        # Attribute values are only rendered for templates that show them
+        self.render_values = True
+        # Source of the tree being built, for rendering values from their source segment,
+        # and its lines, split once per tree the first time a value needs them
+        self.source_code = None
+        self._source_lines = None
+        # Opt-in: a dict of top-level statement keys to what was extracted from
+        # them, for parsers that see new versions of the same files (e.g. api-diff).
+        # Details are shared with the code structures built from them and never
+        # changed in place.
+        self.definition_cache = None
 
     def parse_code(self, file_path):
         source_code = self.file_system.read_file(file_path)
-        tree = ast.parse(source_code)
-        return self.build_code_structure(tree)
+        return self.parse_source(source_code)
+
+    def parse_source(self, source_code):
+        with profiling.stage('parse'):
+            tree = ast.parse(source_code)
+        with profiling.stage('build'):
+            return self.build_code_structure(tree, source_code)
 
-    def build_code_structure(self, ast_tree):
+    def build_code_structure(self, ast_tree, source_code=None):
         self.code_structure.reset()
-        for node in ast.walk(ast_tree):
-            if isinstance(node, ast.ClassDef):
-                self.code_structure.add_class(self.get_class_details(node))
-            elif isinstance(node, ast.FunctionDef):
-                # TODO: handle nested functions and decorators
-                parent = next((n for n in ast.walk(ast_tree)
-                               if node in ast.iter_child_nodes(n)), None)
-                if isinstance(parent, ast.ClassDef):
-                    pass
+        self.source_code = source_code
+        self._source_lines = None
+        if self.definition_cache is None or source_code is None or not isinstance(ast_tree, ast.Module):
+            levels = self._extract(ast_tree)
+        else:
+            levels = self._extract_module(ast_tree)
+
+        for entries in levels:
+            for kind, details, line_numbers in entries:
+                if kind == 'class':
+                    self.code_structure.add_class(details)
+                elif kind == 'function':
+                    self.code_structure.add_function(details)
                 else:
-                    self.code_structure.add_function(
-                        self.get_function_details(node))
-            elif isinstance(node, (ast.Import, ast.ImportFrom)):
-                self.code_structure.add_import(self.get_import_details(node))
-
+                    self.code_structure.add_import(*details)
+                for name, first, last in line_numbers:
+                    self.code_structure.add_line_numbers(name, first, last)
         return self.code_structure
 
+    def _extract(self, root):
+        """
+        Extract the classes, functions and imports under root.
+
+        Returns:
+            - A list with, for each depth below root, the (kind, details, line
+              numbers) of what was found at that depth, in ast.walk() order.
+              Line numbers are (name, first, last) tuples.
+        """
+        levels = []
+        # Methods are documented with their class; a class is walked before its body
+        methods = set()
+        level = [root]
+        while level:
+            entries = []
+            next_level = []
+            for node in level:
+                next_level.extend(ast.iter_child_nodes(node))
+                if isinstance(node, ast.ClassDef):
+                    line_numbers = [(node.name, node.lineno, node.end_lineno)]
+                    for child in node.body:
+                        if isinstance(child, ast.FunctionDef):
+                            methods.add(child)
+                            line_numbers.append((f"{node.name}.{child.name}", child.lineno, child.end_lineno))
+                    entries.append(('class', self.get_class_details(node), line_numbers))
+                elif isinstance(node, ast.FunctionDef):
+                    # TODO: handle nested functions and decorators
+                    if node not in methods:
+                        entries.append(('function', self.get_function_details(node),
+                                        [(node.name, node.lineno, node.end_lineno)]))
+                elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                    entries.append(('import', (self.get_import_details(node), self.get_import_bindings(node)), []))
+            levels.append(entries)
+            level = next_level
+        return levels
+
+    def _extract_module(self, ast_tree):
+        """
+        Like _extract(ast_tree), but each top-level statement whose source did
+        not change since an earlier parse is taken from the definition cache
+        instead of being walked. ast.walk() reaches the nodes of each depth
+        statement by statement, so the statements' levels are merged by depth.
+        """
+        if self._source_lines is None:
+            self._source_lines = _LINE_BREAK.split(self.source_code)
+        options = f"{self.render_values}:{self.max_value_length}\n"
+        occurrences = {}
+        cached = {}
+        levels = [[]]
+        for statement in ast_tree.body:
+            segment = '\n'.join(self._source_lines[statement.lineno - 1:statement.end_lineno])
+            digest = hashlib.sha1((options + segment).encode('utf-8')).hexdigest()
+            # Identical statements (e.g. a redefined function) are told apart by their order
+            occurrences[digest] = occurrences.get(digest, 0) + 1
+            key = f"{digest}:{occurrences[digest]}"
+            previous = self.definition_cache.get(key)
+            if previous is None:
+                cached[key] = (statement.lineno, self._extract(statement))
+                statement_levels = cached[key][1]
+            else:
+                cached[key] = previous
+                shift = statement.lineno - previous[0]
+                statement_levels = previous[1] if not shift else [
+                    [(kind, details, [(name, first + shift, last + shift) for name, first, last in line_numbers])
+                     for kind, details, line_numbers in entries]
+                    for entries in previous[1]]
+            for depth, entries in enumerate(statement_levels, start=1):
+                if depth == len(levels):
+                    levels.append([])
+                levels[depth].extend(entries)
+
+        for key, extracted in cached.items():
+            self.definition_cache.pop(key, None)
+            self.definition_cache[key] = extracted
+        while len(self.definition_cache) > DEFINITION_CACHE_SIZE:
+            del self.definition_cache[next(iter(self.definition_cache))]
+        return levels
+
     def get_class_details(self, node):
         # Inheritance details
         base_classes = [self._get_name(base) for base in node.bases]
@@ -142,9 +285,10 @@ class CodeParser:
                 for target in (child.targets if hasattr(child, 'targets')
                                else [child.target]):
                     if isinstance(target, ast.Name):
-                        attributes.append({
-                            'name': target.id,
-                            'value': self._get_value(child.value)})
+                        attribute = {'name': target.id}
+                        if self.render_values:
+                            attribute['value'] = self._get_value(child.value)
+                        attributes.append(attribute)
 
         return {
             'name': node.name,
@@ -197,13 +341,45 @@ class CodeParser:
         return None
 
     def _get_value(self, node):
+        """
+        Render an assigned value as it is written in the source (or unparsed
+        when the source is not known), on one line and cut at max_value_length.
+        """
         if node is None:
             return "None"
-        elif isinstance(node, ast.Constant):
-            return repr(node.value)
         elif isinstance(node, ast.Name):
             return node.id
-        return str(ast.dump(node))
+        elif isinstance(node, ast.Constant):
+            value = repr(node.value)
+        else:
+            value = self._source_segment(node)
+            if value is None:
+                value = ast.unparse(node)
+            value = ' '.join(value.split())
+        return self._truncate(value)
+
+    def _source_segment(self, node):
+        """
+        Like ast.get_source_segment(), but the source is only split into lines
+        once per tree rather than once per call.
+        """
+        if self.source_code is None or getattr(node, 'end_lineno', None) is None:
+            return None
+        if self._source_lines is None:
+            self._source_lines = _LINE_BREAK.split(self.source_code)
+        lines = self._source_lines
+        first, last = node.lineno - 1, node.end_lineno - 1
+        # Column offsets are in UTF-8 bytes
+        if first == last:
+            return lines[first].encode('utf-8')[node.col_offset:node.end_col_offset].decode('utf-8')
+        return '\n'.join([lines[first].encode('utf-8')[node.col_offset:].decode('utf-8'),
+                          *lines[first + 1:last],
+                          lines[last].encode('utf-8')[:node.end_col_offset].decode('utf-8')])
+
+    def _truncate(self, value):
+        if self.max_value_length and len(value) > self.max_value_length:
+            return value[:self.max_value_length] + TRUNCATION_MARKER
+        return value
 
     def get_import_details(self, node):
         if isinstance(node, ast.Import):
@@ -212,6 +388,20 @@ class CodeParser:
             names = [(f"{node.module}.{alias.name}", alias.asname) for alias in node.names]
         return names
 
+    def get_import_bindings(self, node):
+        """
+        The names an import binds: 'import a.b' binds 'a' and 'import a.b as c'
+        binds 'c' to 'a.b', while 'from a import b' binds 'b' to 'a.b'.
+
+        Returns:
+            - A list of (bound name, qualified name) tuples.
+        """
+        if isinstance(node, ast.Import):
+            return [(alias.asname, alias.name) if alias.asname else (alias.name.split('.')[0],) * 2
+                    for alias in node.names]
+        return [(alias.asname or alias.name, f"{node.module}.{alias.name}")
+                for alias in node.names if alias.name != '*']
+
     def get_docstrings(self, file_path):
         """
         Getting all docstrings from the code file
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from genny.filesystem import FileSystem
+import bz2
+import gzip
+import lzma
+import os
+
+# Codecs from the standard library, by name: (file suffix, compress function).
+# gzip is written with a zero mtime so identical output compresses to identical bytes.
+CODECS = {
+    'gzip': ('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    'bz2': ('.bz2', lambda data: bz2.compress(data, compresslevel=9)),
+    'xz': ('.xz', lambda data: lzma.compress(data, preset=9))
+}
+# Files smaller than this are served faster uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+
+class Precompressor:
+    """
+    Write compressed siblings (e.g. page.html.gz) of generated files so a static
+    server can send them as-is instead of compressing on every request.
+    """
+
+    def __init__(self, codecs=('gzip',), min_size=MIN_COMPRESS_SIZE, jobs=1, file_system=None):
+        unknown = [codec for codec in codecs if codec not in CODECS]
+        if unknown:
+            raise ValueError(f"Unsupported compression: {', '.join(unknown)}."
+                             f" Choose from {', '.join(CODECS)}.")
+        self.codecs = list(codecs)
+        self.min_size = min_size
+        self.jobs = jobs
+        self.file_system = file_system or FileSystem()
+
+    def compress_data(self, data):
+        """
+        Compress content in memory with every codec.
+
+        Returns:
+            - A mapping of file suffix to compressed bytes, empty if the
+              content is smaller than min_size.
+        """
+        content = data.encode('utf-8') if isinstance(data, str) else data
+        if len(content) < self.min_size:
+            return {}
+        return {CODECS[codec][0]: CODECS[codec][1](content) for codec in self.codecs}
+
+    def compress_file(self, path):
+        """
+        Write one compressed sibling of path per codec, unless the file is
+        smaller than min_size. Stale siblings of skipped files are removed.
+
+        Returns:
+            - The paths of the compressed files that changed.
+        """
+        with open(path, 'rb') as file:
+            compressed = self.compress_data(file.read())
+        written = []
+        for codec in self.codecs:
+            target = path + CODECS[codec][0]
+            if not compressed:
+                if os.path.exists(target):
+                    os.remove(target)
+            elif self.file_system.write_file(target, compressed[CODECS[codec][0]]):
+                written.append(target)
+        return written
+
+    def needs_compression(self, path):
+        """Whether an unchanged file still lacks a compressed sibling (e.g. after --compress was added)."""
+        try:
+            if os.path.getsize(path) < self.min_size:
+                return False
+        except OSError:
+            return False
+        return any(not os.path.exists(path + CODECS[codec][0]) for codec in self.codecs)
+
+    def compress(self, paths):
+        """
+        Compress many files. zlib, bz2 and lzma release the GIL while they
+        work, so a thread pool keeps every core busy without pickling data.
+
+        Returns:
+            - The paths of the compressed files that changed.
+        """
+        if self.jobs > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                results = list(executor.map(self.compress_file, paths))
+        else:
+            results = [self.compress_file(path) for path in paths]
+        return [target for written in results for target in written]
@@ -1,6 +1,10 @@
 from genny.codeparser import CodeParser
 from genny.filesystem import FileSystem
 from genny.templater import Templater
+from genny.versioncontrol import VersionControl
+from genny.symbolindex import SymbolIndex
+from genny.guards import LimitExceeded, summary_structure
+from genny import events, profiling
 import os
 
 import json
@@ -11,22 +15,59 @@ import logging
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
+# File extension used for each supported output format
+FORMAT_EXTENSIONS = {'json': '.json', 'markdown': '.md', 'html': '.html', 'yaml': '.yaml'}
+DEFAULT_TEMPLATE = 'standard'
+# Cache namespace of the per-symbol HTML fragments of each page
+FRAGMENT_CACHE_NAMESPACE = 'fragments'
+# Formats that are written to a database rather than rendered to a file
+INDEX_FORMATS = ['sqlite']
+
 
 class Docgen():
 
-    def __init__(self, log_callback=None):
-        self.current_template = 'standard'
+    def __init__(self, log_callback=None, blame=False, cache=None, precompressor=None):
+        self.current_template = DEFAULT_TEMPLATE
         self.generated_docs = {}
+        # Full, unfiltered structure of the last generated file
+        self.code_file = None
+        self.source_hash = None
+        self.code_structure = {}
+        self.line_numbers = {}
+        # Extra template variables for HTML pages that are part of a site
+        self.page_context = {}
+        # Split HTML pages with more symbols than this into parts loaded on demand (0 = never)
+        self.split_pages = 0
+        # Extra files of the last split HTML page, by path relative to the page
+        self.parts = {}
         self.file_system = FileSystem()
         self.parser = CodeParser(self.file_system)
         self.log_callback = log_callback
+        self.blame = blame
+        # One VersionControl per directory, so HEAD is looked up once per directory
+        self.version_controls = {}
+        self.cache = cache
+        # Keep the rendered html of each class and function in the cache between runs
+        self.fragment_cache = False
+        # Writes compressed siblings of exported files when set
+        self.precompressor = precompressor
+        # Per-file ResourceLimits; the reason the last file was only summarised, if it was
+        self.limits = None
+        self.degraded = None
         self.templater = Templater(log_callback=self.log_callback)
 
-    def generate_docs(self, code_file, template='current'):
+    def generate_docs(self, code_file, template='current', source_code=None, parsed=None):
+        """
+        Generate documentation for a code file. If source_code is given (e.g. a
+        member of a wheel or sdist, or a file read ahead), code_file is not read. If
+        parsed is given (a dict with the 'sha', 'structure' and 'line_numbers'
+        of an earlier parse), the file is neither read nor parsed again.
+        """
         if template != 'current':
             self.current_template = template
         try:
-            source_code = self.file_system.read_file(code_file)
+            if source_code is None and parsed is None:
+                source_code = self.file_system.read_file(code_file)
         except FileNotFoundError as e:
             error_message = f"Error: {e}"
             logger.error(error_message)  # Log the error
@@ -41,7 +82,30 @@ class Docgen():
                 self.log_callback(f"Error: Template '{self.current_template}' not found.")
             return
 
-        code_structure = self.parser.parse_code(code_file).to_dict()
+        self.degraded = None
+        self.parser.render_values = self.shows_attributes(self.current_template)
+        if parsed is not None:
+            code_structure = parsed['structure']
+            line_numbers = dict(parsed['line_numbers'])
+            source_hash = parsed['sha']
+            self.degraded = parsed.get('degraded')
+        elif self.limits:
+            with events.timed(events.PARSED, code_file, size=len(source_code)):
+                code_structure, line_numbers = self.parse_within_limits(code_file, source_code)
+            source_hash = SymbolIndex.content_hash(source_code)
+        else:
+            with events.timed(events.PARSED, code_file, size=len(source_code)):
+                parsed_structure = self.parser.parse_source(source_code)
+            code_structure = parsed_structure.to_dict()
+            line_numbers = dict(getattr(parsed_structure, 'line_numbers', {}))
+            source_hash = SymbolIndex.content_hash(source_code)
+        # Archive members are not files, so they are never blamed
+        if self.blame and os.path.isfile(code_file):
+            code_structure = self.annotate_last_changed(code_structure, line_numbers, code_file)
+        self.code_file = code_file
+        self.source_hash = source_hash
+        self.code_structure = code_structure
+        self.line_numbers = line_numbers
         sections = template_structure.get('sections', [])
         style = template_structure.get('style', {})
 
@@ -58,6 +122,76 @@ class Docgen():
 
         self.generated_docs = doc_data
 
+    def shows_attributes(self, template='current'):
+        """
+        Whether a template shows class attributes, i.e. whether their values
+        need to be rendered. Templates that only list class names do not.
+        """
+        if template == 'current':
+            template = self.current_template
+        try:
+            template_structure = self.templater.get_template_metadata(template)
+        except ValueError:
+            # An unknown template is reported when the docs are generated
+            return True
+        return ('classes' in template_structure.get('sections', [])
+                and template_structure.get('style', {}).get('classes') != 'summary')
+
+    def parse_within_limits(self, code_file, source_code):
+        """
+        Parse a file within self.limits. A file that breaks a limit is either
+        reduced to its top-level names (self.degraded gives the reason) or,
+        if the limits say so, reported by raising LimitExceeded.
+
+        Returns:
+            - A (code structure dict, line numbers) tuple.
+        """
+        try:
+            return self.limits.parse(self.parser, source_code)
+        except LimitExceeded as e:
+            if self.limits.on_limit == 'skip':
+                raise LimitExceeded(f"Skipped {code_file}: {e}") from None
+            self.degraded = str(e)
+            if self.log_callback:
+                self.log_callback(f"Only top-level names of {code_file} were documented: {e}")
+            return summary_structure(source_code), {}
+
+    def annotate_last_changed(self, code_structure, line_numbers, code_file):
+        """
+        Add 'last_changed' commit metadata to every class, method and function,
+        using one `git blame` for the whole file.
+        """
+        directory = os.path.dirname(os.path.abspath(code_file))
+        if directory not in self.version_controls:
+            self.version_controls[directory] = VersionControl(directory, cache=self.cache)
+        vc = self.version_controls[directory]
+        vc.log_callback = self.log_callback
+        last_changed = vc.map_blame_to_symbols(vc.blame(os.path.abspath(code_file)), line_numbers)
+        if not last_changed:
+            return code_structure
+
+        def annotate(item, name):
+            if name in last_changed:
+                return dict(item, last_changed=last_changed[name])
+            return item
+
+        annotated = dict(code_structure)
+        if 'classes' in code_structure:
+            annotated['classes'] = []
+            for cl in code_structure['classes']:
+                cl = annotate(cl, cl['name'])
+                if cl.get('methods'):
+                    cl['methods'] = [annotate(method, f"{cl['name']}.{method['name']}")
+                                     for method in cl['methods']]
+                annotated['classes'].append(cl)
+        if 'functions' in code_structure:
+            annotated['functions'] = [annotate(func, func['name'])
+                                      for func in code_structure['functions']]
+        return annotated
+
+    def format_last_changed(self, last_changed):
+        return f"{last_changed['commit'][:7]} by {last_changed['author']} on {last_changed['date']}"
+
     def format_markdown(self, docs):
         """Generate a Markdown representation of the documentation."""
         lines = ["# Documentation\n"]
@@ -72,10 +206,14 @@ class Docgen():
                     lines.append(f"### {item['name']}\n")
                     if item.get('docstring'):
                         lines.append(f"**Docstring:**\n> {item['docstring']}\n")
+                    if item.get('last_changed'):
+                        lines.append(f"**Last changed:** {self.format_last_changed(item['last_changed'])}\n")
                     if section == "classes":
                         if item.get('base_classes'):
                             lines.append("**Base Classes:**\n")
-                            lines.append(', '.join(item['base_classes']) + '\n')
+                            base_links = item.get('base_links') or {}
+                            lines.append(', '.join(f"[{base}]({base_links[base]})" if base in base_links else base
+                                                   for base in item['base_classes'] if base) + '\n')
                         if item.get('attributes'):
                             lines.append("**Attributes:**\n")
                             for attr in item['attributes']:
@@ -88,6 +226,8 @@ class Docgen():
                                     lines.append(f"  - **Docstring:** {method['docstring']}\n")
                                 if method.get('return_type'):
                                     lines.append(f"  - **Returns:** {method['return_type']}\n")
+                                if method.get('last_changed'):
+                                    lines.append(f"  - **Last changed:** {self.format_last_changed(method['last_changed'])}\n")
                     else:
                         lines.append("**Parameters:**\n")
                         lines.append(', '.join(item.get('parameters', [])) + '\n')  # Default empty list for parameters
@@ -101,15 +241,128 @@ class Docgen():
         return '\n'.join(lines)
 
     def format_html(self, docs):
-        """Generate an HTML representation of the documentation."""
-        return self.templater.render_template(self.current_template, docs)
+        """
+        Generate an HTML representation of the documentation. With a cache and
+        fragment_cache set, the HTML of each class and function is kept between
+        runs and only symbols whose data changed are rendered again.
+        """
+        context = dict(docs, **self.page_context) if self.page_context else docs
+        self.parts = {}
+        split = self.split_pages and self.symbol_weight(docs) > self.split_pages
+        use_cache = self.fragment_cache and self.cache is not None and self.code_file is not None
+        if not use_cache and not split:
+            return self.templater.render_template(self.current_template, context)
+
+        page_key = None
+        fragments = {}
+        if use_cache:
+            page_key = SymbolIndex.content_hash(f"{os.path.abspath(self.code_file)}:{self.current_template}")
+            fragments = self.cache.get(FRAGMENT_CACHE_NAMESPACE, page_key) or {}
+        previous = dict(fragments)
+        if split:
+            html = self.format_split_html(context, fragments)
+        else:
+            html = self.templater.render_template(self.current_template, context, fragment_cache=fragments)
+        if use_cache and fragments != previous:
+            self.cache.set(FRAGMENT_CACHE_NAMESPACE, page_key, fragments)
+        elif use_cache:
+            self.cache.touch(FRAGMENT_CACHE_NAMESPACE, page_key)
+        return html
+
+    @staticmethod
+    def symbol_weight(docs):
+        """The number of classes, methods and functions on a page."""
+        classes = [cl for cl in docs.get('classes') or [] if isinstance(cl, dict)]
+        return (len(docs.get('classes') or []) + len(docs.get('functions') or [])
+                + sum(len(cl.get('methods') or []) for cl in classes))
+
+    def format_split_html(self, context, fragment_cache):
+        """
+        Render a large module as a light index page whose symbols are loaded on
+        demand. The rendered classes and functions are grouped into parts of at
+        most split_pages symbols (a bigger class gets a part of its own) and
+        stored in self.parts as '<module>.parts/part-N.json', next to the page.
+        """
+        items = list(context.get('classes') or []) + list(context.get('functions') or [])
+        rendered = None
+        if all(isinstance(item, dict) for item in items):
+            rendered = self.templater.render_fragments(self.current_template, context, fragment_cache)
+        if rendered is None:
+            # Summary-style sections or a template without per-symbol fragments
+            return self.templater.render_template(self.current_template, context)
+
+        symbols = []
+        for cl, html in zip(context.get('classes') or [], rendered['classes']):
+            anchors = [cl['name']] + [f"{cl['name']}.{method['name']}" for method in cl.get('methods') or []]
+            symbols.append((cl['name'], len(anchors), html, anchors))
+        for func, html in zip(context.get('functions') or [], rendered['functions']):
+            symbols.append((func['name'], 1, html, [func['name']]))
+
+        parts = []
+        for name, weight, html, anchors in symbols:
+            if not parts or (parts[-1]['weight'] + weight > self.split_pages and parts[-1]['html']):
+                parts.append({'first': name, 'weight': 0, 'html': [], 'anchors': []})
+            part = parts[-1]
+            part.update(last=name, weight=part['weight'] + weight)
+            part['html'].append(html)
+            part['anchors'].extend(anchors)
+
+        parts_dir = f"{os.path.splitext(os.path.basename(self.code_file or 'module'))[0]}.parts/"
+        anchors = {}
+        for number, part in enumerate(parts, 1):
+            self.parts[f"{parts_dir}part-{number}.json"] = json.dumps(
+                {'html': '\n'.join(part['html'])}, separators=(',', ':'))
+            anchors.update((anchor, number) for anchor in part['anchors'])
+        self.parts[f"{parts_dir}anchors.json"] = json.dumps(anchors, separators=(',', ':'))
+
+        split = {
+            'anchors': f"{parts_dir}anchors.json",
+            'total': sum(part['weight'] for part in parts),
+            'parts': [{'url': f"{parts_dir}part-{number}.json", 'first': part['first'],
+                       'last': part['last'], 'count': part['weight']}
+                      for number, part in enumerate(parts, 1)]
+        }
+        return self.templater.render_template(
+            self.current_template, dict(context, classes=[], functions=[], split=split))
 
     def format_yaml(self, docs):
         """Generate a YAML representation of the documentation."""
         return yaml.dump(docs, default_flow_style=False, sort_keys=False)
 
+    def format_docs(self, f):
+        """
+        Render the generated documentation in one of the supported formats.
+
+        Returns:
+            - The formatted output, or None if the HTML template rendered nothing.
+        """
+        if f not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported format: {f}")
+        with profiling.stage('render'), events.timed(events.RENDERED, self.code_file, format=f,
+                                                     template=self.current_template) as rendered:
+            if f == 'json':
+                output = json.dumps(self.generated_docs, indent=4)
+            elif f == 'markdown':
+                output = self.format_markdown(self.generated_docs)
+            elif f == 'html':
+                output = self.format_html(self.generated_docs) or None
+            else:
+                output = self.format_yaml(self.generated_docs)
+            rendered['size'] = len(output or '')
+        return output
+
+    def export_symbol_index(self, destination):
+        """
+        Write the symbols of the last generated file into a SQLite index,
+        skipping the update if the file is unchanged since it was indexed.
+        """
+        path = os.path.relpath(self.code_file).replace(os.sep, '/')
+        with SymbolIndex(destination) as index:
+            if not index.is_current(path, self.source_hash):
+                index.update_module(path, self.source_hash, self.code_structure, self.line_numbers)
+
     def export_docs(self, f, destination):
-        if f not in ['json', 'markdown', 'html', 'yaml']:
+        if f not in FORMAT_EXTENSIONS and f not in INDEX_FORMATS:
             if self.log_callback:
                 self.log_callback(f"Unsupported format: {f}")
             return False
@@ -120,20 +373,32 @@ class Docgen():
             return False
 
         try:
-            formatted_output = ''
-            if f == 'json':
-                formatted_output = json.dumps(self.generated_docs, indent=4)
-            elif f == 'markdown':
-                formatted_output = self.format_markdown(self.generated_docs)
-            elif f == 'html':
-                if self.format_html(self.generated_docs):
-                    formatted_output = self.format_html(self.generated_docs)
-                else:
+            if f == 'sqlite':
+                self.export_symbol_index(destination)
+            else:
+                formatted_output = self.format_docs(f)
+                if formatted_output is None:
                     return False
-            elif f == 'yaml':
-                formatted_output = self.format_yaml(self.generated_docs)
 
-            self.file_system.write_file(destination, formatted_output)
+                written = self.file_system.write_file(destination, formatted_output)
+                if events.has_subscribers():
+                    events.emit(events.WRITTEN, destination, size=len(formatted_output.encode('utf-8')),
+                                changed=written)
+                outputs = [(destination, written)]
+                for name, content in self.parts.items() if f == 'html' else ():
+                    part_path = os.path.join(os.path.dirname(destination), name)
+                    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+                    part_written = self.file_system.write_file(part_path, content)
+                    written = written or part_written
+                    outputs.append((part_path, part_written))
+                if self.precompressor:
+                    # Unchanged outputs keep their compressed siblings from the last export
+                    self.precompressor.compress([path for path, changed in outputs
+                                                 if changed or self.precompressor.needs_compression(path)])
+                if not written:
+                    if self.log_callback:
+                        self.log_callback(f"Export successful! {destination} is already up to date.")
+                    return True
             if self.log_callback:
                 self.log_callback(f"Export successful! File saved to: {destination}")
             return True
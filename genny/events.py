@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+import time
+
+# Event names: a run, then in the order they happen for a file
+RUN_STARTED = 'run_started'
+RUN_FINISHED = 'run_finished'
+FILE_STARTED = 'file_started'
+PARSED = 'parsed'
+GIT_CALL = 'git_call'
+CACHE_HIT = 'cache_hit'
+CACHE_MISS = 'cache_miss'
+RENDERED = 'rendered'
+WRITTEN = 'written'
+FILE_FINISHED = 'file_finished'
+EVENTS = (RUN_STARTED, RUN_FINISHED, FILE_STARTED, PARSED, GIT_CALL, CACHE_HIT, CACHE_MISS, RENDERED, WRITTEN,
+          FILE_FINISHED)
+
+# Event name (or '*' for every event) -> callbacks
+_hooks = {}
+
+
+class Event:
+    """
+    Something that happened while generating documentation.
+
+    Every event has a name (one of EVENTS) and, when they apply, the file it
+    concerns, its duration in seconds and a size in bytes. Anything else, like
+    the output format or the git command, is kept in details.
+    """
+
+    def __init__(self, name, file=None, duration=None, size=None, **details):
+        if name not in EVENTS:
+            raise ValueError(f"Unknown event '{name}'. Choose from {', '.join(EVENTS)}.")
+        self.name = name
+        self.file = file
+        self.duration = duration
+        self.size = size
+        self.details = details
+
+    def to_dict(self):
+        return dict(self.details, name=self.name, file=self.file, duration=self.duration, size=self.size)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return f"Event({self.to_dict()!r})"
+
+
+def subscribe(callback, *names):
+    """
+    Call callback(event) for every event with one of the given names, or for
+    all events if no name is given.
+    """
+    for name in names or ('*',):
+        if name != '*' and name not in EVENTS:
+            raise ValueError(f"Unknown event '{name}'. Choose from {', '.join(EVENTS)}.")
+        _hooks.setdefault(name, []).append(callback)
+
+
+def unsubscribe(callback):
+    for name in list(_hooks):
+        _hooks[name] = [hook for hook in _hooks[name] if hook != callback]
+        if not _hooks[name]:
+            del _hooks[name]
+
+
+@contextmanager
+def subscribed(callback, *names):
+    """Subscribe callback until the block exits; does nothing if callback is None."""
+    if callback is None:
+        yield
+        return
+    subscribe(callback, *names)
+    try:
+        yield
+    finally:
+        unsubscribe(callback)
+
+
+def unsubscribe_all():
+    _hooks.clear()
+
+
+def has_subscribers():
+    return bool(_hooks)
+
+
+def dispatch(event):
+    """Send an event to its subscribers."""
+    for hook in _hooks.get(event.name, []) + _hooks.get('*', []):
+        hook(event)
+
+
+def emit(name, file=None, duration=None, size=None, **details):
+    """Create and dispatch an event; does nothing if nobody is subscribed."""
+    if _hooks:
+        dispatch(Event(name, file, duration, size, **details))
+
+
+@contextmanager
+def timed(name, file=None, **details):
+    """
+    Emit an event with the duration of the block. The block can set 'size'
+    or other details in the dict it gets.
+    """
+    if not _hooks:
+        yield {}
+        return
+    fields = dict(details)
+    start = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        fields['error'] = str(e)
+        raise
+    finally:
+        emit(name, file, time.perf_counter() - start, **fields)
@@ -1,4 +1,12 @@
+from genny import profiling
 import os
+import tempfile
+
+# Files are created with the permissions open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
 
 class FileSystem:
     def read_file(self, file_path):
@@ -16,16 +24,49 @@ class FileSystem:
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"The file '{file_path}' does not exist.")
-        with open(file_path, 'r') as file:
+        with profiling.stage('read'), open(file_path, 'r') as file:
             return file.read()
 
     def write_file(self, file_path, data):
         """
-        Writes data to a file.
+        Writes data to a file, unless the file already holds exactly that data.
+        The new content is written to a temporary file in the same directory and
+        moved into place, so readers never see a half-written file.
 
         Parameters:
             file_path (str): The path to the file.
-            data (str): The content to write to the file.
+            data (str or bytes): The content to write to the file.
+
+        Returns:
+            bool: True if the file was written, False if it was already up to date.
         """
-        with open(file_path, 'w') as file:
-            file.write(data)
+        with profiling.stage('write'):
+            return self._write_file(file_path, data)
+
+    def _write_file(self, file_path, data):
+        content = data.encode('utf-8') if isinstance(data, str) else data
+        if self.has_content(file_path, content):
+            return False
+
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(content)
+            os.chmod(temp_path, FILE_MODE)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return True
+
+    def has_content(self, file_path, content):
+        """Check whether a file exists and holds exactly the given bytes; the size is compared first."""
+        try:
+            if os.path.getsize(file_path) != len(content):
+                return False
+            with open(file_path, 'rb') as file:
+                return file.read() == content
+        except OSError:
+            return False
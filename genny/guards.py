@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from genny import profiling
+import ast
+import re
+import signal
+import threading
+
+# What to do with a file that exceeds a limit
+ON_LIMIT_ACTIONS = ('summary', 'skip')
+# Top-level definitions, found without parsing for the summary of a degraded file
+_DEFINITION = re.compile(r'^(?:async\s+def|def|class)\s+([A-Za-z_]\w*)', re.MULTILINE)
+
+
+class LimitExceeded(Exception):
+    """Raised when a file is too big, too complex or too slow to document in full."""
+
+
+class ResourceLimits:
+    """
+    Per-file limits that keep one pathological file (a huge generated module,
+    a deeply nested expression) from stalling a whole run.
+
+    The timeout uses SIGALRM, so it is only enforced on POSIX systems and in
+    the main thread of a process, which is where batch workers run their
+    tasks. It interrupts Python code such as build_code_structure; a single
+    ast.parse call finishes before the alarm is handled, which is why the
+    byte and node limits are checked as well.
+    """
+
+    def __init__(self, max_bytes=None, max_nodes=None, timeout=None, on_limit='summary'):
+        """
+        Parameters:
+            - max_bytes: Files larger than this are not parsed.
+            - max_nodes: Files whose AST has more nodes than this are not extracted.
+            - timeout: Seconds allowed to parse and extract one file.
+            - on_limit: 'summary' to document only the top-level names of an
+              offending file, 'skip' to report it as failed.
+        """
+        if on_limit not in ON_LIMIT_ACTIONS:
+            raise ValueError(f"Unsupported action: {on_limit}. Choose from {', '.join(ON_LIMIT_ACTIONS)}.")
+        self.max_bytes = max_bytes
+        self.max_nodes = max_nodes
+        self.timeout = timeout
+        self.on_limit = on_limit
+
+    def __bool__(self):
+        return bool(self.max_bytes or self.max_nodes or self.timeout)
+
+    def parse(self, parser, source_code):
+        """
+        Parse source code and extract its structure within the limits.
+
+        Returns:
+            - A (code structure dict, line numbers) tuple.
+
+        Raises:
+            LimitExceeded: If the file breaks a limit or the recursion limit.
+        """
+        if self.max_bytes:
+            size = len(source_code.encode('utf-8'))
+            if size > self.max_bytes:
+                raise LimitExceeded(f"{size} bytes exceeds the limit of {self.max_bytes}")
+        try:
+            with time_limit(self.timeout):
+                with profiling.stage('parse'):
+                    tree = ast.parse(source_code)
+                if self.max_nodes:
+                    count_nodes(tree, self.max_nodes)
+                with profiling.stage('build'):
+                    parsed_structure = parser.build_code_structure(tree, source_code)
+                return parsed_structure.to_dict(), dict(parsed_structure.line_numbers)
+        except (RecursionError, MemoryError) as e:
+            raise LimitExceeded(f"too deeply nested to extract ({type(e).__name__})")
+
+
+def count_nodes(tree, limit):
+    """
+    Count the nodes of an AST, stopping as soon as there are more than limit.
+
+    Raises:
+        LimitExceeded: If the tree has more than limit nodes.
+    """
+    count = 0
+    for _ in ast.walk(tree):
+        count += 1
+        if count > limit:
+            raise LimitExceeded(f"more than {limit} AST nodes")
+    return count
+
+
+@contextmanager
+def time_limit(seconds):
+    """
+    Raise LimitExceeded in the block after seconds of wall-clock time. Does
+    nothing without a timeout, without SIGALRM or outside the main thread.
+    """
+    if (not seconds or not hasattr(signal, 'SIGALRM')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise LimitExceeded(f"took longer than {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def summary_structure(source_code):
+    """
+    Extract only the names of top-level classes and functions with a line
+    scan, for files that cannot be documented in full.
+
+    Returns:
+        - A code structure dict with 'classes' and 'functions'.
+    """
+    structure = {}
+    for match in _DEFINITION.finditer(source_code):
+        # The same keys CodeStructure.to_dict() gives a class or function without details
+        if match.group(0).startswith('class'):
+            structure.setdefault('classes', []).append({'name': match.group(1)})
+        else:
+            structure.setdefault('functions', []).append(
+                {'name': match.group(1), 'docstring': None, 'parameters': [], 'return_type': None})
+    return structure
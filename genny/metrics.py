@@ -0,0 +1,77 @@
+from genny.events import EVENTS, FILE_FINISHED
+from genny.filesystem import FileSystem
+import json
+import threading
+import time
+
+METRIC_FORMATS = ('prometheus', 'json')
+
+
+class MetricsSink:
+    """
+    An event subscriber that aggregates the events of a run into counters and
+    writes them to a file, in the Prometheus text format (for the node
+    exporter's textfile collector) or as JSON.
+    """
+
+    def __init__(self, path, metric_format=None):
+        """
+        Parameters:
+            - path: The metrics file, e.g. genny.prom or genny.json.
+            - metric_format: 'prometheus' or 'json'; guessed from the file
+              suffix if None.
+        """
+        metric_format = metric_format or ('json' if path.endswith('.json') else 'prometheus')
+        if metric_format not in METRIC_FORMATS:
+            raise ValueError(f"Unsupported metrics format: {metric_format}. Choose from {', '.join(METRIC_FORMATS)}.")
+        self.path = path
+        self.metric_format = metric_format
+        self.file_system = FileSystem()
+        self.counts = dict.fromkeys(EVENTS, 0)
+        self.durations = dict.fromkeys(EVENTS, 0.0)
+        self.sizes = dict.fromkeys(EVENTS, 0)
+        self.errors = 0
+        self.started = time.time()
+        # Events of worker processes are dispatched from a relay thread
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        with self.lock:
+            self.counts[event.name] += 1
+            self.durations[event.name] += event.duration or 0.0
+            self.sizes[event.name] += event.size or 0
+            if event.name == FILE_FINISHED and event.details.get('error'):
+                self.errors += 1
+
+    def to_dict(self):
+        return {
+            'started': self.started,
+            'errors': self.errors,
+            'events': {name: {'count': self.counts[name], 'duration_seconds': self.durations[name],
+                              'bytes': self.sizes[name]} for name in EVENTS}
+        }
+
+    def to_prometheus(self):
+        lines = []
+        for metric, kind, help_text, values in (
+                ('genny_events_total', 'counter', 'Events emitted, by event.', self.counts),
+                ('genny_event_duration_seconds_total', 'counter', 'Time spent, by event.', self.durations),
+                ('genny_event_bytes_total', 'counter', 'Bytes read, rendered or written, by event.', self.sizes)):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f'{metric}{{event="{name}"}} {values[name]:g}' for name in EVENTS)
+        lines.append("# HELP genny_errors_total Files that failed.")
+        lines.append("# TYPE genny_errors_total counter")
+        lines.append(f"genny_errors_total {self.errors}")
+        lines.append("# HELP genny_run_start_time_seconds Start of the run, in unix seconds.")
+        lines.append("# TYPE genny_run_start_time_seconds gauge")
+        lines.append(f"genny_run_start_time_seconds {self.started:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        """Write the metrics file atomically, so a collector never reads half of it."""
+        if self.metric_format == 'json':
+            data = json.dumps(self.to_dict(), indent=4)
+        else:
+            data = self.to_prometheus()
+        self.file_system.write_file(self.path, data)
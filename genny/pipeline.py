@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import collections
+
+# Threads that read sources and write outputs; I/O bound, so more than the CPU count
+DEFAULT_IO_THREADS = 8
+# Files in flight (being read, processed or waiting to be handled) per worker
+FILES_PER_WORKER = 4
+
+
+class AsyncPipeline:
+    """
+    Overlap file I/O with CPU-bound work. Each task is read in a thread pool,
+    processed in an executor (usually a process pool) and its result handled
+    in the event loop's thread, in the order of the tasks; the files written
+    while handling a result go back to the thread pool.
+
+    Bounded queues connect the stages: at most queue_size tasks are in flight
+    and at most queue_size writes are pending, so a slow disk or network share
+    slows the run down instead of filling memory, while the workers are kept
+    busy with files that were read ahead.
+    """
+
+    def __init__(self, executor, workers=1, io_threads=DEFAULT_IO_THREADS, queue_size=None):
+        """
+        Parameters:
+            - executor: The executor that processes tasks, e.g. a ProcessPoolExecutor.
+            - workers: How many tasks the executor runs at once.
+            - io_threads: Size of the thread pool that reads and writes files.
+            - queue_size: Tasks in flight and writes pending at most (default:
+              FILES_PER_WORKER per worker).
+        """
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.io_threads = io_threads
+        self.queue_size = queue_size or self.workers * FILES_PER_WORKER
+        self.io_pool = None
+        self.loop = None
+        # Futures of the writes submitted by write() and not awaited yet
+        self.pending = collections.deque()
+
+    def run(self, tasks, read, process, handle):
+        """
+        Run every task through the pipeline and return once all of them are
+        handled and their writes are done.
+
+        Parameters:
+            - tasks: The tasks, in the order their results are handled.
+            - read: Called with a task in an I/O thread; returns the task to process.
+            - process: Called with a task in the executor; returns its result.
+              It must be picklable for a process pool.
+            - handle: Called with each result in the loop's thread; it can
+              call write() to write files without waiting for them.
+        """
+        with ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix='genny-io') as self.io_pool:
+            try:
+                asyncio.run(self._run(list(tasks), read, process, handle))
+            finally:
+                self.io_pool = None
+                self.loop = None
+                self.pending.clear()
+
+    def write(self, function, *args):
+        """Call function(*args) in an I/O thread; only valid while handling a result."""
+        self.pending.append(self.loop.run_in_executor(self.io_pool, function, *args))
+
+    async def _run(self, tasks, read, process, handle):
+        self.loop = asyncio.get_running_loop()
+        window = asyncio.Semaphore(self.queue_size)
+        ready = asyncio.Queue(self.queue_size)
+        results = [self.loop.create_future() for _ in tasks]
+
+        async def read_one(number, task):
+            await ready.put((number, await self.loop.run_in_executor(self.io_pool, read, task)))
+
+        async def feed():
+            reads = []
+            for number, task in enumerate(tasks):
+                # Released once the result is handled, which bounds the reorder buffer too
+                await window.acquire()
+                reads.append(asyncio.ensure_future(read_one(number, task)))
+            await asyncio.gather(*reads)
+            for _ in range(self.workers):
+                await ready.put(None)
+
+        async def work():
+            while (item := await ready.get()) is not None:
+                number, task = item
+                try:
+                    results[number].set_result(await self.loop.run_in_executor(self.executor, process, task))
+                except Exception as e:
+                    results[number].set_exception(e)
+
+        async def collect():
+            for number in range(len(tasks)):
+                handle(await results[number])
+                results[number] = None
+                window.release()
+                while len(self.pending) > self.queue_size:
+                    await self.pending.popleft()
+            while self.pending:
+                await self.pending.popleft()
+
+        await asyncio.gather(feed(), collect(), *(work() for _ in range(self.workers)))
@@ -0,0 +1,193 @@
+from contextlib import contextmanager
+import cProfile
+import json
+import math
+import os
+import threading
+import time
+
+# The stages timed by the pipeline, in the order they run for a file
+STAGES = ('read', 'parse', 'build', 'to_dict', 'git', 'render', 'write')
+# The span of all the work done for one file, recorded by current_file()
+FILE_STAGE = 'file'
+
+# The profiler that stage() records into; None when profiling is off
+_active = None
+
+
+class Profiler:
+    """
+    Collect the wall time of each pipeline stage, per file, and summarise it
+    at the end of a run.
+
+    Samples are plain (stage, file, seconds, start, pid, thread) tuples so
+    worker processes can send theirs back to the parent with their results.
+    Start times are wall-clock seconds, which are comparable across processes.
+    """
+
+    def __init__(self):
+        self.samples = []
+        self.current_file = None
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+
+    def add(self, stage, seconds, file=None, start=None):
+        if start is None:
+            start = time.time() - seconds
+        self.samples.append((stage, file, seconds, start, os.getpid(), threading.get_native_id()))
+
+    def merge(self, samples):
+        """Add samples recorded by another profiler (e.g. in a worker process)."""
+        self.samples.extend(tuple(sample) for sample in samples)
+
+    def drain(self):
+        """Return the samples recorded so far and forget them."""
+        samples, self.samples = self.samples, []
+        return samples
+
+    def summary(self):
+        """
+        Returns:
+            - A list of dicts with the 'stage', 'calls', 'total', 'mean' and 'p95'
+              (in seconds) of every stage that ran, in pipeline order.
+        """
+        durations = {}
+        for stage, _, seconds, *_ in self.samples:
+            if stage != FILE_STAGE:
+                durations.setdefault(stage, []).append(seconds)
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        rows = []
+        for stage in sorted(durations, key=lambda stage: (order.get(stage, len(STAGES)), stage)):
+            values = sorted(durations[stage])
+            total = sum(values)
+            rows.append({
+                'stage': stage,
+                'calls': len(values),
+                'total': total,
+                'mean': total / len(values),
+                # Nearest-rank percentile
+                'p95': values[max(0, math.ceil(0.95 * len(values)) - 1)]
+            })
+        return rows
+
+    def slowest_files(self, count=10):
+        """
+        Returns:
+            - Up to count (file, total seconds) tuples, slowest first.
+        """
+        totals = {}
+        for stage, file, seconds, *_ in self.samples:
+            if file is not None and stage != FILE_STAGE:
+                totals[file] = totals.get(file, 0) + seconds
+        return sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:count]
+
+    def report(self, count=10):
+        """Format the summary and the slowest files as a text table."""
+        lines = [f"{'Stage':<10}{'Calls':>8}{'Total (s)':>12}{'Mean (ms)':>12}{'p95 (ms)':>12}"]
+        for row in self.summary():
+            lines.append(f"{row['stage']:<10}{row['calls']:>8}{row['total']:>12.3f}"
+                         f"{row['mean'] * 1000:>12.2f}{row['p95'] * 1000:>12.2f}")
+        lines.append(f"Wall time: {time.perf_counter() - self.started:.3f}s")
+        slowest = self.slowest_files(count)
+        if slowest:
+            lines.append("Slowest files:")
+            lines.extend(f"  {seconds * 1000:>10.2f} ms  {file}" for file, seconds in slowest)
+        return '\n'.join(lines)
+
+    def trace_events(self):
+        """
+        Convert the samples to Chrome trace events ('X' spans in microseconds),
+        one track per process and thread, for chrome://tracing or Perfetto.
+
+        Returns:
+            - The list of trace events.
+        """
+        main_pid = os.getpid()
+        events = []
+        for pid in sorted({sample[4] for sample in self.samples} | {main_pid}):
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                           'args': {'name': 'genny' if pid == main_pid else f'genny worker {pid}'}})
+        for stage, file, seconds, start, pid, thread in self.samples:
+            event = {
+                'name': file if stage == FILE_STAGE else stage,
+                'cat': stage,
+                'ph': 'X',
+                'ts': round((start - self.started_at) * 1e6, 3),
+                'dur': round(seconds * 1e6, 3),
+                'pid': pid,
+                'tid': thread
+            }
+            if file is not None:
+                event['args'] = {'file': file}
+            events.append(event)
+        return events
+
+    def write_trace(self, path):
+        """Write the samples as a Chrome trace-event JSON file."""
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, file)
+
+
+def active():
+    return _active
+
+
+@contextmanager
+def enabled(profiler):
+    """Record stages into profiler until the block exits; does nothing if profiler is None."""
+    global _active
+    if profiler is None:
+        yield None
+        return
+    previous, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+
+
+@contextmanager
+def stage(name):
+    """Time a block as one sample of a stage, attributed to the current file."""
+    if _active is None:
+        yield
+        return
+    profiler = _active
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add(name, time.perf_counter() - start, profiler.current_file, started_at)
+
+
+@contextmanager
+def current_file(path):
+    """Attribute the stages timed inside the block to path, and time the block as a whole."""
+    if _active is None:
+        yield
+        return
+    profiler = _active
+    previous, profiler.current_file = profiler.current_file, path
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.current_file = previous
+        profiler.add(FILE_STAGE, time.perf_counter() - start, path, started_at)
+
+
+@contextmanager
+def cprofiled(path):
+    """Run the block under cProfile and dump the stats to path; does nothing if path is None."""
+    if not path:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
@@ -0,0 +1,189 @@
+from genny import events
+import sys
+import threading
+import time
+
+try:
+    from rich.console import Console, Group
+    from rich.live import Live
+    from rich.progress_bar import ProgressBar
+    from rich.table import Table
+    from rich.text import Text
+except ImportError:  # rich is optional; PlainProgress is used without it
+    Live = None
+
+# Seconds between two lines of the plain display
+PLAIN_INTERVAL = 10.0
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressDisplay:
+    """
+    An event subscriber that tracks the progress of a batch run: files and
+    bytes done, throughput, cache hit rate, ETA and the file each worker is on.
+
+    Events of worker processes arrive from a relay thread, so the counters are
+    only changed under a lock. Subclasses decide how to show them.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self.lock = threading.Lock()
+        self.total_files = 0
+        self.total_bytes = 0
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Worker process id -> the file it is working on
+        self.active = {}
+        self.started = time.perf_counter()
+        self.ended = None
+
+    def __call__(self, event):
+        with self.lock:
+            if event.name == events.RUN_STARTED:
+                self.total_files = event.details.get('files', 0)
+                self.total_bytes = event.size or 0
+                self.started = time.perf_counter()
+            elif event.name == events.FILE_STARTED:
+                self.active[event.details.get('worker')] = event.file
+            elif event.name == events.FILE_FINISHED:
+                self.files += 1
+                self.bytes += event.size or 0
+                self.errors += bool(event.details.get('error'))
+                if self.active.get(event.details.get('worker')) == event.file:
+                    del self.active[event.details.get('worker')]
+            elif event.name == events.CACHE_HIT:
+                self.cache_hits += 1
+            elif event.name == events.CACHE_MISS:
+                self.cache_misses += 1
+            elif event.name == events.RUN_FINISHED:
+                self.ended = time.perf_counter()
+                self.active.clear()
+        self.update(event)
+
+    def stats(self):
+        """
+        Returns:
+            - A dict with the counters, 'files_per_second', 'bytes_per_second',
+              'cache_hit_rate' (None before any cache lookup) and 'eta' in
+              seconds (None until it can be estimated).
+        """
+        with self.lock:
+            elapsed = max((self.ended or time.perf_counter()) - self.started, 1e-9)
+            lookups = self.cache_hits + self.cache_misses
+            stats = {
+                'files': self.files, 'total_files': self.total_files,
+                'bytes': self.bytes, 'total_bytes': self.total_bytes,
+                'errors': self.errors, 'elapsed': elapsed,
+                'files_per_second': self.files / elapsed,
+                'bytes_per_second': self.bytes / elapsed,
+                'cache_hit_rate': self.cache_hits / lookups if lookups else None,
+                'active': dict(self.active),
+                'eta': None
+            }
+        # Sizes predict the remaining work better than file counts
+        if stats['total_bytes'] and stats['bytes']:
+            stats['eta'] = (stats['total_bytes'] - stats['bytes']) / stats['bytes_per_second']
+        elif stats['total_files'] and stats['files']:
+            stats['eta'] = (stats['total_files'] - stats['files']) / stats['files_per_second']
+        return stats
+
+    def summary(self):
+        stats = self.stats()
+        cache = "n/a" if stats['cache_hit_rate'] is None else f"{stats['cache_hit_rate']:.0%}"
+        percent = stats['files'] / stats['total_files'] if stats['total_files'] else 0
+        line = (f"[{stats['files']:>{len(str(stats['total_files']))}}/{stats['total_files']}] {percent:>4.0%}"
+                f"  {stats['files_per_second']:.1f} files/s  {format_bytes(stats['bytes_per_second'])}/s"
+                f"  cache {cache}  ETA {format_duration(stats['eta'])}")
+        if stats['errors']:
+            line += f"  {stats['errors']} failed"
+        return line
+
+    def update(self, event):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class PlainProgress(ProgressDisplay):
+    """One summary line every few seconds and at the end, for logs that are not terminals."""
+
+    def __init__(self, stream=None, interval=PLAIN_INTERVAL):
+        super().__init__(stream)
+        self.interval = interval
+        self.last_line = 0.0
+
+    def update(self, event):
+        now = time.perf_counter()
+        if event.name == events.RUN_FINISHED or (event.name == events.FILE_FINISHED
+                                                 and now - self.last_line >= self.interval):
+            self.last_line = now
+            print(self.summary(), file=self.stream, flush=True)
+
+
+class RichProgress(ProgressDisplay):
+    """A live progress bar with the throughput and the active file of each worker."""
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self.live = Live(console=Console(file=self.stream), get_renderable=self.renderable,
+                         refresh_per_second=4, transient=False)
+
+    def renderable(self):
+        stats = self.stats()
+        bar = Table.grid(padding=(0, 1))
+        bar.add_row(ProgressBar(total=stats['total_files'] or None, completed=stats['files'], width=40),
+                    Text(self.summary()))
+        if not stats['active']:
+            return bar
+        workers = Table(box=None, show_header=True, header_style="bold", padding=(0, 1))
+        workers.add_column("Worker")
+        workers.add_column("File")
+        for worker, file in sorted(stats['active'].items(), key=lambda item: str(item[0])):
+            workers.add_row(str(worker), file)
+        return Group(bar, workers)
+
+    def start(self):
+        self.live.start()
+
+    def stop(self):
+        self.live.stop()
+
+
+def create_progress(stream=None):
+    """
+    Returns:
+        - A RichProgress on a terminal when rich is installed, a PlainProgress otherwise.
+    """
+    stream = stream or sys.stderr
+    if Live is not None and stream.isatty():
+        return RichProgress(stream)
+    return PlainProgress(stream)
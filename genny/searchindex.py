@@ -0,0 +1,114 @@
+import json
+import re
+
+# Weight of a match in each field, so name matches rank above docstring matches
+FIELD_WEIGHTS = {'name': 3, 'parameter': 2, 'docstring': 1}
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'are', 'was', 'not',
+    'but', 'its', 'into', 'has', 'have', 'will', 'can', 'all', 'any', 'each'
+}
+DOCS_PER_BLOCK = 1000
+SEARCH_DIR = "search"
+# Unsplit index kept next to the site so shards can be merged
+SEARCH_STATE_FILE = "genny-search.json"
+
+
+class SearchIndexBuilder:
+    """
+    Build a static inverted index of symbol names, parameters and docstrings.
+
+    The index is split into small JSON files so that a browser only fetches
+    the postings for the first two characters of each search term, plus the
+    blocks holding the matching documents.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.postings = {}
+
+    def tokenize(self, text, field):
+        """
+        Split text into lowercase search tokens. Names are also split on
+        underscores and camelCase so 'BatchGenerator' is found by 'generator'.
+        """
+        if field == 'docstring':
+            return {word for word in re.findall(r"[a-z0-9_]+", text.lower())
+                    if len(word) > 2 and word not in STOP_WORDS}
+        tokens = {text.lower()}
+        for part in re.split(r"_+", text):
+            tokens.update(word.lower() for word in re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z0-9]+", part))
+            tokens.add(part.lower())
+        return {token for token in tokens if len(token) > 1}
+
+    def add_symbol(self, qualname, kind, url, name, docstring=None, parameters=None):
+        doc_id = len(self.docs)
+        summary = docstring.strip().splitlines()[0][:120] if docstring and docstring.strip() else ""
+        self.docs.append([qualname, kind, url, summary])
+        scores = {}
+        for field, texts in (('name', [name]), ('parameter', parameters or []),
+                             ('docstring', [docstring] if docstring else [])):
+            for text in texts:
+                for token in self.tokenize(text, field):
+                    scores[token] = max(scores.get(token, 0), FIELD_WEIGHTS[field])
+        for token, score in scores.items():
+            self.postings.setdefault(token, []).append([doc_id, score])
+
+    def add_module(self, module, code_structure, url):
+        """
+        Index the classes, methods and functions of one module.
+
+        Parameters:
+            - module: The dotted module name.
+            - code_structure: The module's CodeStructure.to_dict() output.
+            - url: The URL of the module's page, relative to the site root.
+        """
+        self.add_symbol(module, 'module', url, module.rsplit('.', 1)[-1])
+        for cl in code_structure.get('classes', []):
+            self.add_symbol(f"{module}.{cl['name']}", 'class', f"{url}#{cl['name']}",
+                            cl['name'], cl.get('docstring'))
+            for method in cl.get('methods', []):
+                anchor = f"{cl['name']}.{method['name']}"
+                self.add_symbol(f"{module}.{anchor}", 'method', f"{url}#{anchor}", method['name'],
+                                method.get('docstring'), method.get('parameters'))
+        for func in code_structure.get('functions', []):
+            self.add_symbol(f"{module}.{func['name']}", 'function', f"{url}#{func['name']}",
+                            func['name'], func.get('docstring'), func.get('parameters'))
+
+    def to_json(self):
+        return json.dumps({'docs': self.docs, 'postings': self.postings}, separators=(',', ':'))
+
+    def merge_json(self, data):
+        """Add the documents of another builder, saved with to_json()."""
+        state = json.loads(data)
+        offset = len(self.docs)
+        self.docs.extend(state['docs'])
+        for token, postings in state['postings'].items():
+            self.postings.setdefault(token, []).extend([doc_id + offset, score] for doc_id, score in postings)
+
+    @staticmethod
+    def prefix(token):
+        return token[:2]
+
+    def build(self):
+        """
+        Split the index into files.
+
+        Returns:
+            - A mapping of file path (relative to the site root) to JSON content.
+        """
+        shards = {}
+        for token in sorted(self.postings):
+            shards.setdefault(self.prefix(token), {})[token] = self.postings[token]
+
+        files = {}
+        for prefix, shard in shards.items():
+            files[f"{SEARCH_DIR}/idx-{prefix}.json"] = json.dumps(shard, separators=(',', ':'))
+        for block in range(0, max(len(self.docs), 1), DOCS_PER_BLOCK):
+            files[f"{SEARCH_DIR}/docs-{block // DOCS_PER_BLOCK}.json"] = json.dumps(
+                self.docs[block:block + DOCS_PER_BLOCK], separators=(',', ':'))
+        files[f"{SEARCH_DIR}/manifest.json"] = json.dumps({
+            'version': 1,
+            'docs_per_block': DOCS_PER_BLOCK,
+            'prefixes': sorted(shards)
+        }, separators=(',', ':'))
+        return files
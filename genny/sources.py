@@ -0,0 +1,102 @@
+from importlib.util import decode_source
+import os
+import posixpath
+import tarfile
+import zipfile
+
+# Archives that can be documented without extracting them
+SOURCE_ARCHIVE_SUFFIXES = ('.whl', '.zip', '.tar.gz', '.tgz', '.tar')
+# Files that mark the top-level directory of a source distribution
+SDIST_MARKERS = ('PKG-INFO', 'pyproject.toml', 'setup.py')
+
+
+def is_source_archive(path):
+    return path.endswith(SOURCE_ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+class SourceArchive:
+    """
+    Read the Python files of a wheel, sdist or zip archive straight from the
+    archive, without extracting anything to disk.
+
+    Paths are relative to the archive root; the single top-level directory of
+    an sdist (e.g. 'genny-1.0/') is stripped so module names come out right.
+    """
+
+    def __init__(self, archive_path):
+        if not archive_path.endswith(SOURCE_ARCHIVE_SUFFIXES):
+            raise ValueError(f"Unsupported archive '{archive_path}'."
+                             f" Use one of: {', '.join(SOURCE_ARCHIVE_SUFFIXES)}.")
+        self.archive_path = archive_path
+        self.is_zip = archive_path.endswith(('.whl', '.zip'))
+        self._members = None
+
+    def members(self):
+        """
+        Map the relative path of every Python file to its (member name, size).
+        """
+        if self._members is None:
+            if self.is_zip:
+                with zipfile.ZipFile(self.archive_path) as archive:
+                    entries = [(info.filename, info.file_size) for info in archive.infolist()
+                               if not info.is_dir()]
+            else:
+                with tarfile.open(self.archive_path, 'r:*') as archive:
+                    entries = [(info.name, info.size) for info in archive if info.isfile()]
+            prefix = self._sdist_prefix([name for name, _ in entries])
+            self._members = {}
+            for name, size in entries:
+                rel_path = self._relative_path(name, prefix)
+                if rel_path:
+                    self._members[rel_path] = (name, size)
+        return self._members
+
+    def list_files(self):
+        """
+        Returns:
+            - A sorted list of (relative path, size in bytes) tuples.
+        """
+        return sorted((rel_path, size) for rel_path, (_, size) in self.members().items())
+
+    def read_files(self, paths=None):
+        """
+        Stream the source code of Python files in archive order, so a
+        compressed tarball is only decompressed once.
+
+        Parameters:
+            - paths: The relative paths to read; all Python files if None.
+
+        Yields:
+            - (relative path, source code) tuples.
+        """
+        wanted = {self.members()[rel_path][0]: rel_path
+                  for rel_path in (self.members() if paths is None else paths)}
+        if self.is_zip:
+            with zipfile.ZipFile(self.archive_path) as archive:
+                for info in archive.infolist():
+                    if info.filename in wanted:
+                        yield wanted[info.filename], decode_source(archive.read(info))
+        else:
+            with tarfile.open(self.archive_path, 'r|*') as archive:
+                for info in archive:
+                    if info.name in wanted:
+                        yield wanted[info.name], decode_source(archive.extractfile(info).read())
+
+    def _sdist_prefix(self, names):
+        top_levels = {name.split('/', 1)[0] for name in names}
+        if len(top_levels) == 1:
+            top_level = top_levels.pop()
+            if any(f"{top_level}/{marker}" in names for marker in SDIST_MARKERS):
+                return top_level + '/'
+        return ''
+
+    def _relative_path(self, name, prefix):
+        # Skip non-Python files, caches, hidden directories and unsafe paths
+        if not name.endswith('.py') or not name.startswith(prefix):
+            return None
+        rel_path = posixpath.normpath(name[len(prefix):])
+        parts = rel_path.split('/')
+        if rel_path.startswith('/') or any(part in ('..', '__pycache__') or part.startswith('.')
+                                           for part in parts):
+            return None
+        return rel_path
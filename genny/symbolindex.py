@@ -0,0 +1,220 @@
+from genny.codeparser import import_bindings
+import hashlib
+import os
+import sqlite3
+
+# Bumped whenever the tables change; older indexes are rebuilt from scratch
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    module TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    output TEXT
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    local_name TEXT NOT NULL,
+    parent TEXT,
+    docstring TEXT,
+    signature TEXT,
+    lineno INTEGER,
+    end_lineno INTEGER
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+CREATE INDEX IF NOT EXISTS symbols_kind_name ON symbols(kind, name);
+CREATE INDEX IF NOT EXISTS symbols_qualname ON symbols(qualname);
+CREATE INDEX IF NOT EXISTS symbols_local_name ON symbols(local_name);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols(path);
+"""
+
+
+class SymbolIndex:
+    """
+    A SQLite database of every module, class, method, function, attribute
+    and import found by the parser. Files are re-indexed only when their
+    content hash changes.
+    """
+
+    def __init__(self, db_path, read_only=False):
+        self.db_path = db_path
+        if read_only:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"The symbol index '{db_path}' does not exist.")
+            self.connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            self.connection.execute("PRAGMA mmap_size = 268435456")
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.connection.close()
+                raise ValueError(f"The symbol index '{db_path}' is outdated. Regenerate it.")
+            return
+
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.connection.executescript("DROP TABLE IF EXISTS symbols; DROP TABLE IF EXISTS files;")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def content_hash(source_code):
+        return hashlib.sha1(source_code.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def module_name(path):
+        """Turn a relative file path like 'pkg/mod.py' into a module name like 'pkg.mod'."""
+        parts = [part for part in os.path.splitext(path.replace(os.sep, '/'))[0].split('/')
+                 if part not in ('', '.', '..')]
+        if len(parts) > 1 and parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts)
+
+    def is_current(self, path, sha, output=None):
+        """Check whether a file is already indexed with this content hash and output path."""
+        row = self.connection.execute("SELECT sha, output FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == sha and row[1] == output
+
+    def indexed_paths(self):
+        return [row[0] for row in self.connection.execute("SELECT path FROM files")]
+
+    def update_module(self, path, sha, code_structure, line_numbers=None, output=None):
+        """
+        Replace the symbols of one file.
+
+        Parameters:
+            - path: The file path, relative to the documented root.
+            - sha: The content hash of the file.
+            - code_structure: The file's CodeStructure.to_dict() output.
+            - line_numbers: The file's CodeStructure.line_numbers.
+            - output: The path of the generated documentation for the file.
+        """
+        line_numbers = line_numbers or {}
+        module = self.module_name(path)
+        rows = [('module', module.rsplit('.', 1)[-1], module, None, None, None, None)]
+
+        for name, target in import_bindings(code_structure).items():
+            rows.append(('import', name, target, module, None, None, None))
+
+        for cl in code_structure.get('classes', []):
+            class_qualname = f"{module}.{cl['name']}"
+            bases = ', '.join(base for base in cl.get('base_classes') or [] if base)
+            rows.append(('class', cl['name'], class_qualname, module, cl.get('docstring'),
+                         f"class {cl['name']}({bases})" if bases else f"class {cl['name']}",
+                         line_numbers.get(cl['name'])))
+            for method in cl.get('methods', []):
+                rows.append(('method', method['name'], f"{class_qualname}.{method['name']}",
+                             class_qualname, method.get('docstring'), self._signature(method),
+                             line_numbers.get(f"{cl['name']}.{method['name']}")))
+            for attribute in cl.get('attributes') or []:
+                signature = (f"{attribute['name']} = {attribute['value']}" if 'value' in attribute
+                             else attribute['name'])
+                rows.append(('attribute', attribute['name'], f"{class_qualname}.{attribute['name']}",
+                             class_qualname, None, signature, None))
+
+        for func in code_structure.get('functions', []):
+            rows.append(('function', func['name'], f"{module}.{func['name']}", module,
+                         func.get('docstring'), self._signature(func), line_numbers.get(func['name'])))
+
+        with self.connection:
+            self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.connection.execute("INSERT INTO files (path, module, sha, output) VALUES (?, ?, ?, ?)",
+                                    (path, module, sha, output))
+            self.connection.executemany(
+                "INSERT INTO symbols (path, kind, name, qualname, local_name, parent, docstring,"
+                " signature, lineno, end_lineno) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path, kind, name, qualname, self._local_name(module, qualname, kind), parent,
+                  docstring, signature, lines[0] if lines else None, lines[1] if lines else None)
+                 for kind, name, qualname, parent, docstring, signature, lines in rows])
+
+    def _local_name(self, module, qualname, kind):
+        # The qualified name inside its module, e.g. 'Docgen.format_markdown'
+        if kind in ('module', 'import'):
+            return qualname
+        return qualname[len(module) + 1:]
+
+    def _signature(self, func):
+        return f"{func['name']}({', '.join(func.get('parameters') or [])})"
+
+    def remove_files(self, paths):
+        """Drop the symbols of files that no longer exist or failed to parse."""
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+
+    def merge_from(self, other_db_path):
+        """Copy every file and symbol of another index into this one, replacing duplicates."""
+        self.connection.execute("ATTACH DATABASE ? AS other", (other_db_path,))
+        try:
+            with self.connection:
+                self.connection.execute("DELETE FROM files WHERE path IN (SELECT path FROM other.files)")
+                self.connection.execute("INSERT INTO files SELECT * FROM other.files")
+                self.connection.execute(
+                    "INSERT INTO symbols (path, kind, name, qualname, local_name, parent, docstring,"
+                    " signature, lineno, end_lineno) SELECT path, kind, name, qualname, local_name,"
+                    " parent, docstring, signature, lineno, end_lineno FROM other.symbols")
+        finally:
+            self.connection.execute("DETACH DATABASE other")
+
+    def query(self, pattern=None, kind=None, name=None, limit=50):
+        """
+        Look up symbols using indexed glob matches.
+
+        Parameters:
+            - pattern: A glob matched against the fully qualified name or the
+              name inside its module (e.g. 'Docgen.*' or 'genny.docgen.*').
+            - kind: Only return symbols of this kind (e.g. 'function').
+            - name: A glob matched against the bare symbol name.
+            - limit: The maximum number of results.
+
+        Returns:
+            - A list of dicts describing each symbol and where it is documented.
+        """
+        conditions = []
+        params = []
+        if name:
+            conditions.append("symbols.name GLOB ?")
+            params.append(name)
+        if kind:
+            conditions.append("symbols.kind = ?")
+            params.append(kind)
+
+        # One index range scan per column, each stopping at the limit, is much
+        # faster than an OR over both columns followed by a sort.
+        searches = [(None, [])]
+        if pattern:
+            searches = [("symbols.qualname GLOB ?", [pattern]), ("symbols.local_name GLOB ?", [pattern])]
+
+        results = {}
+        for condition, pattern_params in searches:
+            where = ' AND '.join(([condition] if condition else []) + conditions)
+            rows = self.connection.execute(
+                "SELECT symbols.id, symbols.kind, symbols.name, symbols.qualname, symbols.docstring,"
+                " symbols.signature, symbols.path, symbols.lineno, files.output"
+                " FROM symbols JOIN files USING (path)"
+                f"{' WHERE ' + where if where else ''} LIMIT ?",
+                pattern_params + params + [limit])
+            # Rows the previous search found come back here too, so they do not count
+            for row in rows:
+                if row[0] not in results:
+                    results[row[0]] = row[1:]
+                    if len(results) >= limit:
+                        break
+            if len(results) >= limit:
+                break
+
+        keys = ('kind', 'name', 'qualname', 'docstring', 'signature', 'path', 'lineno', 'output')
+        return sorted((dict(zip(keys, row)) for row in results.values()),
+                      key=lambda symbol: symbol['qualname'])
@@ -1,8 +1,14 @@
 from jinja2 import Environment, FileSystemLoader
 from genny.filesystem import FileSystem
+import hashlib
 import os
+import re
 import json
 
+ASSETS_DIR = "assets"
+# Sections rendered one symbol at a time: section -> (fragment file, template variable)
+FRAGMENTS = {'classes': ('class', 'cls'), 'functions': ('function', 'func')}
+
 
 class Templater:
     def __init__(self, template_dir="templates", file_system=None, log_callback=None):
@@ -15,6 +21,7 @@ class Templater:
         self.env = Environment(loader=FileSystemLoader(self.base_dir))
         self.templates_metadata = self._load_metadata()
         self.log_callback = log_callback
+        self._fragment_hashes = {}
 
 
     def _load_metadata(self):
@@ -87,13 +94,106 @@ class Templater:
         except Exception:
             return False
 
-    def render_template(self, template_name, context):
+    def read_static(self, name):
+        """
+        Read a static file (script or stylesheet) shipped with the templates.
+        """
+        return self.file_system.read_file(os.path.join(self.base_dir, "static", name))
+
+    def site_assets(self, template_name, extra_static=()):
+        """
+        Build content-hashed copies of the static files a site needs, so every
+        page can reference one shared, long-cacheable file.
+
+        Parameters:
+            - template_name: The template whose stylesheet (static/<name>.css) is included.
+            - extra_static: Other static files to include, e.g. 'search.js'.
+
+        Returns:
+            - A mapping of static file name to an (asset path, content) tuple.
+        """
+        names = [f"{template_name}.css"] + list(extra_static)
+        assets = {}
+        for name in names:
+            if not os.path.exists(os.path.join(self.base_dir, "static", name)):
+                continue
+            content = self.read_static(name)
+            stem, extension = os.path.splitext(name)
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+            assets[name] = (f"{ASSETS_DIR}/{stem}.{digest}{extension}", content)
+        return assets
+
+    def fragment_hash(self, template_name, kind):
+        """
+        Hash of a fragment template's source, or None if the template has no
+        such fragment. Cached fragments are keyed by it, so they expire when
+        the template is edited.
+        """
+        key = (template_name, kind)
+        if key not in self._fragment_hashes:
+            try:
+                digest = hashlib.sha256()
+                pending = [f"fragments/{template_name}/{kind}.jinja"]
+                seen = set()
+                # Partials included by the fragment are part of its output too
+                while pending:
+                    name = pending.pop()
+                    if name in seen:
+                        continue
+                    seen.add(name)
+                    source, _, _ = self.env.loader.get_source(self.env, name)
+                    digest.update(source.encode('utf-8'))
+                    pending.extend(re.findall(r'{%-?\s*include\s+"([^"]+)"', source))
+                self._fragment_hashes[key] = digest.hexdigest()
+            except Exception:
+                self._fragment_hashes[key] = None
+        return self._fragment_hashes[key]
+
+    def render_fragments(self, template_name, context, fragment_cache):
+        """
+        Render every class and function of a page on its own, reusing the HTML
+        of symbols whose data has not changed since the last render.
+
+        Parameters:
+            - template_name: The name of the Jinja template.
+            - context: The page context.
+            - fragment_cache: A dict of fragment key to HTML from earlier renders.
+              It is updated in place to hold exactly the fragments of this page.
+
+        Returns:
+            - A mapping of section to the list of rendered fragments, or None if
+              the template does not define fragments.
+        """
+        fragments = {}
+        used = {}
+        for section, (kind, variable) in FRAGMENTS.items():
+            template_hash = self.fragment_hash(template_name, kind)
+            if template_hash is None:
+                return None
+            template = None
+            fragments[section] = []
+            for item in context.get(section) or []:
+                # repr() is stable for the parser's plain dicts and much cheaper than json.dumps
+                key = hashlib.sha1(f"{template_hash}:{item!r}".encode('utf-8')).hexdigest()
+                html = fragment_cache.get(key)
+                if html is None:
+                    template = template or self.env.get_template(f"fragments/{template_name}/{kind}.jinja")
+                    html = template.render({variable: item})
+                used[key] = html
+                fragments[section].append(html)
+        fragment_cache.clear()
+        fragment_cache.update(used)
+        return fragments
+
+    def render_template(self, template_name, context, fragment_cache=None):
         """
         Render a Jinja template with the provided context.
 
         Parameters:
             - template_name: The name of the Jinja template file.
             - context: A dictionary of variables to pass to the template.
+            - fragment_cache: An optional dict of previously rendered per-symbol
+              fragments (see render_fragments), updated in place.
 
         Returns:
             - Rendered template as a string.
@@ -106,6 +206,10 @@ class Templater:
             # Check if the template exists
             if self._template_exists(template_file):
                 template = self.env.get_template(template_file)
+                if fragment_cache is not None:
+                    fragments = self.render_fragments(template_name, context, fragment_cache)
+                    if fragments is not None:
+                        context = dict(context, fragments=fragments)
             else:
                 error_message = f"Template '{template_file}' not found. Using fallback template."
                 print(error_message)
@@ -0,0 +1,91 @@
+// Client-side search over the prebuilt index written by genny.
+// Only the index shards for the typed prefixes and the matching
+// document blocks are fetched.
+(function () {
+    var script = document.currentScript;
+    var root = script.getAttribute("data-site-root") || "";
+    var input = document.getElementById("genny-search");
+    var output = document.getElementById("genny-search-results");
+    var loaded = {};
+    var timer = null;
+
+    function load(path) {
+        if (!loaded[path]) {
+            loaded[path] = fetch(root + "search/" + path).then(function (response) {
+                return response.ok ? response.json() : null;
+            });
+        }
+        return loaded[path];
+    }
+
+    function terms(query) {
+        return (query.toLowerCase().match(/[a-z0-9_]+/g) || []).filter(function (term) {
+            return term.length > 1;
+        });
+    }
+
+    function scoresFor(term, manifest) {
+        var prefix = term.slice(0, 2);
+        if (manifest.prefixes.indexOf(prefix) === -1) {
+            return Promise.resolve({});
+        }
+        return load("idx-" + prefix + ".json").then(function (shard) {
+            var scores = {};
+            Object.keys(shard || {}).forEach(function (token) {
+                if (token.indexOf(term) === 0) {
+                    shard[token].forEach(function (posting) {
+                        var score = token === term ? posting[1] * 2 : posting[1];
+                        scores[posting[0]] = Math.max(scores[posting[0]] || 0, score);
+                    });
+                }
+            });
+            return scores;
+        });
+    }
+
+    function search() {
+        var queryTerms = terms(input.value);
+        if (!queryTerms.length) {
+            output.innerHTML = "";
+            return;
+        }
+        load("manifest.json").then(function (manifest) {
+            return Promise.all(queryTerms.map(function (term) {
+                return scoresFor(term, manifest);
+            })).then(function (perTerm) {
+                // Every term must match; scores are summed across terms.
+                var ranked = Object.keys(perTerm[0]).filter(function (doc) {
+                    return perTerm.every(function (scores) { return doc in scores; });
+                }).map(function (doc) {
+                    var total = perTerm.reduce(function (sum, scores) { return sum + scores[doc]; }, 0);
+                    return [Number(doc), total];
+                }).sort(function (a, b) { return b[1] - a[1] || a[0] - b[0]; }).slice(0, 20);
+
+                return Promise.all(ranked.map(function (entry) {
+                    var block = Math.floor(entry[0] / manifest.docs_per_block);
+                    return load("docs-" + block + ".json").then(function (docs) {
+                        return docs[entry[0] % manifest.docs_per_block];
+                    });
+                }));
+            });
+        }).then(render);
+    }
+
+    function render(docs) {
+        output.innerHTML = "";
+        docs.forEach(function (doc) {
+            var item = document.createElement("li");
+            var link = document.createElement("a");
+            link.href = root + doc[2];
+            link.textContent = doc[0];
+            item.appendChild(link);
+            item.appendChild(document.createTextNode(" (" + doc[1] + ")" + (doc[3] ? " - " + doc[3] : "")));
+            output.appendChild(item);
+        });
+    }
+
+    input.addEventListener("input", function () {
+        clearTimeout(timer);
+        timer = setTimeout(search, 150);
+    });
+})();
@@ -0,0 +1,49 @@
+// Loads the parts of a split module page when they are opened, or when the
+// URL points at a symbol inside one of them.
+(function () {
+    var section = document.querySelector(".genny-split");
+    var loaded = {};
+    var anchors = null;
+
+    function load(details) {
+        var url = details.getAttribute("data-part");
+        if (!loaded[url]) {
+            loaded[url] = fetch(url).then(function (response) {
+                return response.json();
+            }).then(function (part) {
+                details.querySelector("ul").innerHTML = part.html;
+            });
+        }
+        return loaded[url];
+    }
+
+    function show() {
+        var anchor = decodeURIComponent(location.hash.slice(1));
+        if (!anchor || document.getElementById(anchor)) {
+            return;
+        }
+        anchors = anchors || fetch(section.getAttribute("data-anchors")).then(function (response) {
+            return response.json();
+        });
+        anchors.then(function (parts) {
+            var details = document.getElementById("genny-part-" + parts[anchor]);
+            if (!details) {
+                return;
+            }
+            details.open = true;
+            load(details).then(function () {
+                document.getElementById(anchor).scrollIntoView();
+            });
+        });
+    }
+
+    document.querySelectorAll("details.genny-part").forEach(function (details) {
+        details.addEventListener("toggle", function () {
+            if (details.open) {
+                load(details);
+            }
+        });
+    });
+    window.addEventListener("hashchange", show);
+    show();
+})();
@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+import unittest
+import subprocess
+from unittest.mock import MagicMock
+from genny.apidiff import ApiDiff
+from genny.cache import Cache
+from genny.versioncontrol import VersionControl
+
+
+class TestApiDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        self.cache_dir = tempfile.TemporaryDirectory()
+        subprocess.run(['git', 'init', self.repo_path], check=True, capture_output=True)
+        self.commit({
+            'pkg/mod.py': 'class A:\n    def m(self, x):\n        pass\n\n\ndef f():\n    """Old."""\n',
+            'pkg/same.py': 'def g():\n    pass\n',
+            'pkg/gone.py': 'def h():\n    pass\n'
+        }, 'v1')
+        os.remove(os.path.join(self.repo_path, 'pkg/gone.py'))
+        self.commit({
+            'pkg/mod.py': 'class A(Base):\n    def m(self, x, y):\n        pass\n\n\nclass B:\n    pass\n\n\ndef f():\n    """New."""\n',
+            'pkg/new.py': 'def k():\n    pass\n'
+        }, 'v2')
+        self.api_diff = ApiDiff(VersionControl(self.repo_path), cache=Cache(self.cache_dir.name))
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+        self.cache_dir.cleanup()
+
+    def commit(self, files, tag):
+        for path, content in files.items():
+            full_path = os.path.join(self.repo_path, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w') as f:
+                f.write(content)
+        subprocess.run(['git', '-C', self.repo_path, 'add', '-A'], check=True)
+        subprocess.run(['git', '-C', self.repo_path, 'commit', '-qm', tag], check=True)
+        subprocess.run(['git', '-C', self.repo_path, 'tag', tag], check=True)
+
+    def test_diff_reports_added_removed_and_changed_symbols(self):
+        changes = self.api_diff.diff('v1', 'v2')
+        summary = [(c['module'], c['kind'], c['name'], c['change']) for c in changes]
+        self.assertEqual(summary, [
+            ('pkg/gone.py', 'module', 'pkg/gone.py', 'removed'),
+            ('pkg/mod.py', 'class', 'A', 'changed'),
+            ('pkg/mod.py', 'method', 'A.m', 'changed'),
+            ('pkg/mod.py', 'class', 'B', 'added'),
+            ('pkg/mod.py', 'function', 'f', 'changed'),
+            ('pkg/new.py', 'module', 'pkg/new.py', 'added'),
+        ])
+        self.assertEqual(changes[1]['details'], ['base classes () -> (Base)'])
+        self.assertEqual(changes[2]['details'], ['parameters (self, x) -> (self, x, y)'])
+        self.assertEqual(changes[4]['details'], ['docstring changed'])
+
+    def test_unchanged_blobs_are_not_read(self):
+        self.api_diff.version_control.read_blobs = MagicMock(return_value={})
+        self.api_diff.diff('v1', 'v2')
+        requested = self.api_diff.version_control.read_blobs.call_args[0][0]
+        same_sha = self.api_diff.version_control.list_tree('v1')['pkg/same.py']
+        self.assertNotIn(same_sha, requested)
+        self.assertEqual(len(requested), 2)
+
+    def test_cached_structures_are_reused(self):
+        self.api_diff.diff('v1', 'v2')
+        self.api_diff.version_control.read_blobs = MagicMock(return_value={})
+        changes = self.api_diff.diff('v1', 'v2')
+        self.assertEqual(self.api_diff.version_control.read_blobs.call_args[0][0], [])
+        self.assertEqual(len(changes), 6)
+
+    def test_unparsable_blob_is_logged_and_treated_as_empty(self):
+        log = MagicMock()
+        api_diff = ApiDiff(MagicMock(), log_callback=log)
+        api_diff.version_control.read_blobs.return_value = {'abc': 'def broken(:\n'}
+        self.assertEqual(api_diff.get_structures(['abc']), {'abc': {}})
+        self.assertIn("Could not parse blob abc", log.call_args[0][0])
+
+    def test_format_markdown(self):
+        changes = self.api_diff.diff('v1', 'v2')
+        md = self.api_diff.format_markdown(changes, 'v1', 'v2')
+        self.assertIn("# API changes: v1 -> v2", md)
+        self.assertIn("## pkg/mod.py", md)
+        self.assertIn("- **Added** class `B`", md)
+        self.assertIn("- **Changed** method `A.m`: parameters (self, x) -> (self, x, y)", md)
+
+    def test_format_markdown_without_changes(self):
+        self.assertIn("No API changes.", self.api_diff.format_markdown([], 'v1', 'v1'))
+
+    def test_format_json(self):
+        changes = self.api_diff.diff('v1', 'v2')
+        data = json.loads(self.api_diff.format_json(changes, 'v1', 'v2'))
+        self.assertEqual(data['old'], 'v1')
+        self.assertEqual(data['changes'], changes)
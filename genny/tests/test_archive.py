@@ -0,0 +1,65 @@
+import unittest
+import os
+import tarfile
+import tempfile
+import zipfile
+from unittest.mock import patch
+from genny.archive import ArchiveWriter, is_archive_path
+
+
+class TestArchiveWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_is_archive_path(self):
+        self.assertTrue(is_archive_path("site.zip"))
+        self.assertTrue(is_archive_path("site.tar.gz"))
+        self.assertFalse(is_archive_path("site"))
+
+    def test_zip_archive(self):
+        with ArchiveWriter(self.path("site.zip")) as archive:
+            archive.write("pkg/mod.html", "<p>mod</p>")
+            archive.write("pkg/mod.html.gz", b"\x1f\x8b")
+
+        with zipfile.ZipFile(self.path("site.zip")) as zip_file:
+            self.assertEqual(zip_file.read("pkg/mod.html"), b"<p>mod</p>")
+            self.assertEqual(zip_file.getinfo("pkg/mod.html").compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(zip_file.getinfo("pkg/mod.html.gz").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(os.listdir(self.temp_dir.name), ["site.zip"])
+
+    def test_tar_archive_is_reproducible(self):
+        contents = []
+        for name in ("one.tar.gz", "two.tar.gz"):
+            with patch.dict(os.environ, {"SOURCE_DATE_EPOCH": "1700000000"}):
+                with ArchiveWriter(self.path(name)) as archive:
+                    archive.write("index.html", "<p>site</p>")
+            with tarfile.open(self.path(name)) as tar_file:
+                self.assertEqual(tar_file.extractfile("index.html").read(), b"<p>site</p>")
+                self.assertEqual(tar_file.getmember("index.html").mtime, 1700000000)
+            with tarfile.open(self.path(name)) as tar_file:
+                contents.append([(m.name, m.mtime, m.size) for m in tar_file.getmembers()])
+        self.assertEqual(contents[0], contents[1])
+
+    def test_failed_export_leaves_no_archive(self):
+        with self.assertRaises(RuntimeError):
+            with ArchiveWriter(self.path("site.tar")) as archive:
+                archive.write("index.html", "<p>site</p>")
+                raise RuntimeError("render failed")
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_duplicate_member(self):
+        with ArchiveWriter(self.path("site.zip")) as archive:
+            archive.write("index.html", "a")
+            with self.assertRaises(ValueError):
+                archive.write("index.html", "b")
+
+    def test_unsupported_archive(self):
+        with self.assertRaises(ValueError):
+            ArchiveWriter(self.path("site.7z"))
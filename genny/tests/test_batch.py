@@ -0,0 +1,466 @@
+import unittest
+import os
+import json
+import tempfile
+import tarfile
+import zipfile
+from unittest.mock import patch, MagicMock
+from genny.batch import BatchGenerator, INDEX_FILE, SYMBOL_INDEX_FILE
+from genny.symbolindex import SymbolIndex
+from genny.blobstore import BlobStore
+from genny.profiling import Profiler
+from genny.guards import ResourceLimits
+from genny import events
+
+TEMPLATE_METADATA = {"sections": ["classes", "functions"], "style": {}}
+
+
+@patch("genny.docgen.Templater.get_template_metadata", return_value=TEMPLATE_METADATA)
+class TestBatchGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, "src")
+        self.destination = os.path.join(self.temp_dir.name, "docs")
+        self.write("pkg/__init__.py", "")
+        self.write("pkg/big.py", "def big():\n    pass\n" * 20)
+        self.write("pkg/small.py", "class Small:\n    pass\n")
+        self.write("top.py", "def top():\n    pass\n")
+        self.write("pkg/__pycache__/cached.py", "")
+        self.write(".hidden/skip.py", "")
+        self.generator = BatchGenerator("standard", "json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, rel_path, content):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def test_discover_skips_hidden_and_cache_directories(self, _):
+        paths = [path for path, _ in self.generator.discover(self.root)]
+        self.assertEqual(paths, ["pkg/__init__.py", "pkg/big.py", "pkg/small.py", "top.py"])
+
+    def test_generate_writes_outputs_and_index(self, _):
+        index = self.generator.generate(self.root, self.destination)
+        self.assertEqual(index["files"]["pkg/small.py"], "pkg/small.json")
+        with open(os.path.join(self.destination, "pkg", "small.json")) as file:
+            self.assertEqual(json.load(file)["classes"][0]["name"], "Small")
+        with open(os.path.join(self.destination, INDEX_FILE)) as file:
+            self.assertEqual(json.load(file), index)
+
+    def test_regenerating_leaves_unchanged_outputs_alone(self, _):
+        self.generator.generate(self.root, self.destination)
+        self.assertEqual(self.generator.unchanged, 0)
+        output = os.path.join(self.destination, "top.json")
+        os.utime(output, (0, 0))
+        self.write("pkg/small.py", "class Small:\n    \"\"\"Changed.\"\"\"\n")
+
+        self.generator.generate(self.root, self.destination)
+        self.assertEqual(os.path.getmtime(output), 0)
+        self.assertEqual(self.generator.written, 1)
+        self.assertEqual(self.generator.unchanged, 4)
+
+    def test_generate_records_errors_and_continues(self, _):
+        self.write("broken.py", "def broken(:\n")
+        log = MagicMock()
+        self.generator.log_callback = log
+        index = self.generator.generate(self.root, self.destination)
+        self.assertIn("broken.py", index["errors"])
+        self.assertIn("top.py", index["files"])
+        self.assertIn("Failed to generate docs for broken.py", log.call_args[0][0])
+
+    def test_generate_in_parallel_matches_sequential(self, _):
+        sequential = self.generator.generate(self.root, self.destination)
+        parallel = BatchGenerator("standard", "json", jobs=2).generate(
+            self.root, os.path.join(self.temp_dir.name, "parallel"))
+        self.assertEqual(parallel["files"], sequential["files"])
+
+    def test_async_io_matches_sequential(self, _):
+        self.write("broken.py", "def broken(:\n")
+        sequential = self.generator.generate(self.root, self.destination)
+        generator = BatchGenerator("standard", "json", jobs=2, async_io=True, io_threads=2)
+        destination = os.path.join(self.temp_dir.name, "async")
+        index = generator.generate(self.root, destination)
+
+        self.assertEqual(list(index["files"].items()), list(sequential["files"].items()))
+        self.assertEqual(list(index["errors"]), ["broken.py"])
+        self.assertIsNone(generator.pipeline)
+        for out_path in index["files"].values():
+            with open(os.path.join(self.destination, out_path)) as expected, \
+                    open(os.path.join(destination, out_path)) as file:
+                self.assertEqual(file.read(), expected.read())
+
+        generator.generate(self.root, destination)
+        self.assertEqual((generator.written, generator.unchanged), (0, 5))
+
+    def test_fragment_cache_is_opt_in_and_pruned(self, _):
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        BatchGenerator("standard", "html", cache_dir=cache_dir).generate(self.root, self.destination)
+        self.assertFalse(os.path.exists(os.path.join(cache_dir, "fragments")))
+
+        generator = BatchGenerator("standard", "html", cache_dir=cache_dir, fragment_cache=True)
+        generator.generate(self.root, self.destination)
+        entries = lambda: sorted(name for _, _, names in os.walk(os.path.join(cache_dir, "fragments"))
+                                 for name in names)
+        self.assertEqual(len(entries()), 3)
+
+        os.remove(os.path.join(self.root, "top.py"))
+        for directory, _, names in os.walk(os.path.join(cache_dir, "fragments")):
+            for name in names:
+                os.utime(os.path.join(directory, name), (0, 0))
+        generator.generate(self.root, self.destination)
+        self.assertEqual(len(entries()), 2)
+
+    def test_parse_shard(self, _):
+        self.assertEqual(BatchGenerator.parse_shard("2/4"), (2, 4))
+        for invalid in ["0/4", "5/4", "a/b", "3"]:
+            with self.assertRaises(ValueError):
+                BatchGenerator.parse_shard(invalid)
+
+    def test_partition_is_complete_disjoint_and_balanced(self, _):
+        files = [(f"m{i}.py", size) for i, size in enumerate([90, 50, 40, 30, 30, 20, 10, 10])]
+        shards = [self.generator.partition(files, i, 3) for i in (1, 2, 3)]
+        self.assertEqual(sorted(f for shard in shards for f in shard), sorted(files))
+        totals = [sum(size for _, size in shard) for shard in shards]
+        self.assertLessEqual(max(totals) - min(totals), 30)
+        self.assertEqual(shards[0], self.generator.partition(list(reversed(files)), 1, 3))
+
+    def test_sharded_generation_and_merge(self, _):
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            self.generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        shard_dirs = BatchGenerator.find_shards(store)
+        self.assertEqual(len(shard_dirs), 2)
+
+        merged = self.generator.merge(shard_dirs, self.destination)
+        self.assertEqual(list(merged["files"]), ["pkg/__init__.py", "pkg/big.py", "pkg/small.py", "top.py"])
+        self.assertIsNone(merged["shard"])
+        self.assertTrue(os.path.exists(os.path.join(self.destination, "top.json")))
+
+    def test_symbol_index_is_updated_incrementally(self, _):
+        generator = BatchGenerator("standard", "json", symbol_index=True)
+        generator.generate(self.root, self.destination)
+        db_path = os.path.join(self.destination, SYMBOL_INDEX_FILE)
+        with SymbolIndex(db_path) as index:
+            self.assertEqual(index.connection.execute(
+                "SELECT path FROM files WHERE path = 'pkg/small.py'").fetchone(), ("pkg/small.py",))
+            sha = index.connection.execute("SELECT sha FROM files WHERE path = 'top.py'").fetchone()[0]
+
+        self.write("top.py", "def renamed():\n    pass\n")
+        os.remove(os.path.join(self.root, "pkg", "small.py"))
+        with patch.object(SymbolIndex, "update_module", autospec=True,
+                          side_effect=SymbolIndex.update_module) as update:
+            generator.generate(self.root, self.destination)
+        self.assertEqual([call.args[1] for call in update.call_args_list], ["top.py"])
+
+        with SymbolIndex(db_path) as index:
+            self.assertNotIn("pkg/small.py", index.indexed_paths())
+            self.assertNotEqual(index.connection.execute(
+                "SELECT sha FROM files WHERE path = 'top.py'").fetchone()[0], sha)
+            self.assertEqual(index.connection.execute(
+                "SELECT output FROM symbols JOIN files USING (path) WHERE name = 'renamed'").fetchone(),
+                ("top.json",))
+
+    def test_merge_combines_symbol_indexes(self, _):
+        generator = BatchGenerator("standard", "json", symbol_index=True)
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        generator.merge(BatchGenerator.find_shards(store), self.destination)
+        with SymbolIndex(os.path.join(self.destination, SYMBOL_INDEX_FILE)) as index:
+            self.assertEqual(sorted(index.indexed_paths()),
+                             ["pkg/__init__.py", "pkg/big.py", "pkg/small.py", "top.py"])
+
+    def test_html_site_with_search_index(self, _):
+        generator = BatchGenerator("standard", "html", search_index=True)
+        generator.generate(self.root, self.destination)
+
+        with open(os.path.join(self.destination, "pkg", "small.html")) as file:
+            page = file.read()
+        self.assertIn('id="genny-search"', page)
+        self.assertIn('src="../search/search.js" data-site-root="../"', page)
+        self.assertIn('id="Small"', page)
+        with open(os.path.join(self.destination, "search", "manifest.json")) as file:
+            self.assertIn("sm", json.load(file)["prefixes"])
+        self.assertTrue(os.path.exists(os.path.join(self.destination, "search", "search.js")))
+
+    def test_merge_rebuilds_search_index(self, _):
+        generator = BatchGenerator("standard", "html", search_index=True)
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        generator.merge(BatchGenerator.find_shards(store), self.destination)
+        docs = []
+        for name in os.listdir(os.path.join(self.destination, "search")):
+            if name.startswith("docs-"):
+                with open(os.path.join(self.destination, "search", name)) as file:
+                    docs += json.load(file)
+        self.assertIn("pkg.small.Small", [doc[0] for doc in docs])
+        self.assertIn("top.top", [doc[0] for doc in docs])
+
+    def test_shared_assets_are_fingerprinted_and_linked(self, _):
+        generator = BatchGenerator("standard", "html", search_index=True, shared_assets=True)
+        index = generator.generate(self.root, self.destination)
+
+        stylesheet = next(path for path in index["assets"] if path.endswith(".css"))
+        script = next(path for path in index["assets"] if path.endswith(".js"))
+        self.assertRegex(stylesheet, r"^assets/standard\.[0-9a-f]{12}\.css$")
+        self.assertTrue(os.path.exists(os.path.join(self.destination, stylesheet)))
+        with open(os.path.join(self.destination, "pkg", "small.html")) as file:
+            page = file.read()
+        self.assertIn(f'href="../{stylesheet}"', page)
+        self.assertIn(f'src="../{script}"', page)
+        self.assertNotIn("<style>", page)
+        with open(os.path.join(self.destination, "top.html")) as file:
+            self.assertIn(f'href="{stylesheet}"', file.read())
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "search", "search.js")))
+
+    def test_merge_keeps_the_shared_search_script(self, _):
+        generator = BatchGenerator("standard", "html", search_index=True, shared_assets=True)
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        merged = BatchGenerator("standard", "html", search_index=True, shared_assets=True).merge(
+            BatchGenerator.find_shards(store), self.destination)
+
+        script = next(path for path in merged["assets"] if path.endswith(".js"))
+        self.assertTrue(os.path.exists(os.path.join(self.destination, script)))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "search", "search.js")))
+
+    def test_merge_copies_shared_assets(self, _):
+        generator = BatchGenerator("html1", "html", shared_assets=True)
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        merged = generator.merge(BatchGenerator.find_shards(store), self.destination)
+        self.assertEqual(len(merged["assets"]), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.destination, merged["assets"][0])))
+
+    def test_inline_styles_without_shared_assets(self, _):
+        BatchGenerator("standard", "html").generate(self.root, self.destination)
+        with open(os.path.join(self.destination, "top.html")) as file:
+            page = file.read()
+        self.assertIn("<style>", page)
+        self.assertNotIn('rel="stylesheet"', page)
+
+    def test_generate_precompresses_site_files(self, _):
+        generator = BatchGenerator("standard", "html", search_index=True, compress=["gzip"],
+                                   compress_min_size=3000)
+        generator.generate(self.root, self.destination)
+
+        self.assertTrue(os.path.exists(os.path.join(self.destination, "pkg", "big.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.destination, "search", "search.js.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, INDEX_FILE + ".gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "pkg", "__init__.html.gz")))
+
+    def test_incremental_run_only_compresses_changed_pages(self, _):
+        generator = BatchGenerator("standard", "html", compress=["gzip"], compress_min_size=3000)
+        generator.generate(self.root, self.destination)
+        self.write("pkg/big.py", "def big():\n    pass\n" * 21)
+
+        with patch.object(generator.precompressor, "compress", return_value=[]) as compress:
+            generator.generate(self.root, self.destination)
+        self.assertEqual(compress.call_args[0][0], [os.path.join(self.destination, "pkg/big.html")])
+
+        os.remove(os.path.join(self.destination, "pkg", "big.html.gz"))
+        with patch.object(generator.precompressor, "compress", return_value=[]) as compress:
+            generator.generate(self.root, self.destination)
+        self.assertEqual(compress.call_args[0][0], [os.path.join(self.destination, "pkg/big.html")])
+
+    def test_generate_into_archive(self, _):
+        archive_path = os.path.join(self.temp_dir.name, "site.zip")
+        generator = BatchGenerator("standard", "html", symbol_index=True, search_index=True,
+                                   compress=["gzip"], compress_min_size=3000)
+        index = generator.generate(self.root, archive_path)
+
+        self.assertFalse(os.path.exists(self.destination))
+        with zipfile.ZipFile(archive_path) as archive:
+            names = archive.namelist()
+            self.assertIn("pkg/small.html", names)
+            self.assertIn("pkg/big.html.gz", names)
+            self.assertIn("search/manifest.json", names)
+            self.assertIn(SYMBOL_INDEX_FILE, names)
+            self.assertEqual(json.loads(archive.read(INDEX_FILE))["files"], index["files"])
+        self.assertEqual(generator.written, len(names))
+
+    def test_merge_into_archive(self, _):
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            self.generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        archive_path = os.path.join(self.temp_dir.name, "site.tar")
+        self.generator.merge(BatchGenerator.find_shards(store), archive_path)
+
+        with tarfile.open(archive_path) as archive:
+            self.assertIn("pkg/small.json", archive.getnames())
+
+    def test_sharded_archive_is_rejected(self, _):
+        with self.assertRaises(ValueError):
+            self.generator.generate(self.root, os.path.join(self.temp_dir.name, "site.zip"), shard=(1, 2))
+
+    def test_generate_from_wheel_without_extracting(self, _):
+        wheel = os.path.join(self.temp_dir.name, "pkg-1.0-py3-none-any.whl")
+        with zipfile.ZipFile(wheel, "w") as archive:
+            archive.writestr("pkg/__init__.py", "")
+            archive.writestr("pkg/small.py", "class Small:\n    pass\n")
+            archive.writestr("pkg-1.0.dist-info/METADATA", "Name: pkg")
+        generator = BatchGenerator("standard", "json", symbol_index=True, jobs=2)
+        index = generator.generate(wheel, self.destination)
+
+        self.assertEqual(index["files"], {"pkg/__init__.py": "pkg/__init__.json", "pkg/small.py": "pkg/small.json"})
+        with open(os.path.join(self.destination, "pkg", "small.json")) as file:
+            self.assertEqual(json.load(file)["classes"][0]["name"], "Small")
+        with SymbolIndex(os.path.join(self.destination, SYMBOL_INDEX_FILE), read_only=True) as symbols:
+            self.assertEqual(symbols.query("pkg.small.Small")[0]["kind"], "class")
+
+    def test_versions_share_a_blob_store(self, _):
+        store = os.path.join(self.temp_dir.name, "blobs")
+        v1 = os.path.join(self.temp_dir.name, "site", "v1")
+        v2 = os.path.join(self.temp_dir.name, "site", "v2")
+        BatchGenerator("standard", "html", blob_store=store, compress=["gzip"],
+                       compress_min_size=3000).generate(self.root, v1)
+        self.write("top.py", "def top(changed):\n    pass\n")
+        BatchGenerator("standard", "html", blob_store=store, version="2.0").generate(self.root, v2)
+
+        self.assertTrue(os.path.samefile(os.path.join(v1, "pkg", "big.html"), os.path.join(v2, "pkg", "big.html")))
+        self.assertFalse(os.path.samefile(os.path.join(v1, "top.html"), os.path.join(v2, "top.html")))
+        self.assertTrue(os.path.exists(os.path.join(store, "manifests", "v1.json")))
+        self.assertIn("pkg/big.html.gz", BlobStore(store).load_manifest("v1"))
+        self.assertIn(INDEX_FILE, BlobStore(store).load_manifest("2.0"))
+
+    def test_symbol_index_is_stored_as_a_blob(self, _):
+        store = os.path.join(self.temp_dir.name, "blobs")
+        generator = BatchGenerator("standard", "json", blob_store=store, symbol_index=True, version="v1")
+        generator.generate(self.root, self.destination)
+        self.assertIn(SYMBOL_INDEX_FILE, BlobStore(store).load_manifest("v1"))
+
+        self.write("top.py", "def renamed():\n    pass\n")
+        generator.version = "v2"
+        generator.generate(self.root, self.destination)
+        restored = os.path.join(self.temp_dir.name, "restored")
+        BlobStore(store).materialize("v1", restored)
+        with SymbolIndex(os.path.join(restored, SYMBOL_INDEX_FILE), read_only=True) as symbols:
+            self.assertEqual(symbols.query("top.top")[0]["kind"], "function")
+        with SymbolIndex(os.path.join(self.destination, SYMBOL_INDEX_FILE), read_only=True) as symbols:
+            self.assertEqual(symbols.query("top.top"), [])
+            self.assertEqual(symbols.query("top.renamed")[0]["kind"], "function")
+
+    def test_split_pages_are_written_and_merged(self, _):
+        self.write("pkg/big.py", "".join(f"def big{i}():\n    pass\n" for i in range(20)))
+        generator = BatchGenerator("standard", "html", split_pages=8)
+        store = os.path.join(self.temp_dir.name, "store")
+        for i in (1, 2):
+            generator.generate(self.root, BatchGenerator.shard_directory(store, (i, 2)), shard=(i, 2))
+        merged = generator.merge(BatchGenerator.find_shards(store), self.destination)
+
+        self.assertEqual(list(merged["parts"]), ["pkg/big.py"])
+        self.assertEqual(len(merged["parts"]["pkg/big.py"]), 4)
+        for part_path in merged["parts"]["pkg/big.py"]:
+            self.assertTrue(os.path.exists(os.path.join(self.destination, part_path)))
+        with open(os.path.join(self.destination, "pkg", "big.html")) as file:
+            self.assertIn('data-part="big.parts/part-3.json"', file.read())
+
+    def test_split_pages_reference_the_shared_script(self, _):
+        self.write("pkg/big.py", "".join(f"def big{i}():\n    pass\n" for i in range(20)))
+        index = BatchGenerator("standard", "html", split_pages=8, shared_assets=True).generate(self.root, self.destination)
+
+        script = next(path for path in index["assets"] if path.endswith(".js"))
+        self.assertRegex(script, r"^assets/split\.[0-9a-f]{12}\.js$")
+        self.assertTrue(os.path.exists(os.path.join(self.destination, script)))
+        with open(os.path.join(self.destination, "pkg", "big.html")) as file:
+            page = file.read()
+        self.assertIn(f'<script src="../{script}"></script>', page)
+        self.assertNotIn("document.querySelector(\".genny-split\")", page)
+
+    def test_cross_references_link_bases_and_imports(self, _):
+        self.write("pkg/models.py", "from pkg.small import Small\n\nclass Model(Small):\n    pass\n")
+        generator = BatchGenerator("standard", "html", cross_references=True, jobs=2)
+        metadata = dict(TEMPLATE_METADATA, sections=["imports", "classes", "functions"])
+        with patch("genny.docgen.Templater.get_template_metadata", return_value=metadata):
+            generator.generate(self.root, self.destination)
+
+        with open(os.path.join(self.destination, "pkg", "models.html")) as file:
+            page = file.read()
+        self.assertIn('<a href="small.html#Small">Small</a>', page)
+        self.assertIn('<a href="small.html#Small">pkg.small.Small</a>', page)
+
+    def test_cross_references_reuse_the_first_parse(self, _):
+        generator = BatchGenerator("standard", "markdown", cross_references=True)
+        with patch("genny.docgen.CodeParser.parse_code") as mock_parse_code:
+            index = generator.generate(self.root, self.destination)
+        mock_parse_code.assert_not_called()
+        self.assertEqual(len(index["files"]), 4)
+
+    def test_profiler_collects_worker_timings(self, _):
+        profiler = Profiler()
+        generator = BatchGenerator("standard", "markdown", jobs=2, profiler=profiler)
+        generator.generate(self.root, self.destination)
+
+        stages = {row["stage"]: row["calls"] for row in profiler.summary()}
+        self.assertEqual(stages["parse"], 4)
+        self.assertEqual(stages["render"], 4)
+        self.assertGreaterEqual(stages["write"], 5)
+        self.assertEqual(sorted(file for file, _ in profiler.slowest_files()),
+                         ["pkg/__init__.py", "pkg/big.py", "pkg/small.py", "top.py"])
+
+        events = profiler.trace_events()
+        file_spans = [event for event in events if event.get("cat") == "file"]
+        self.assertEqual(sorted(event["name"] for event in file_spans),
+                         ["pkg/__init__.py", "pkg/big.py", "pkg/small.py", "top.py"])
+        self.assertNotIn(os.getpid(), {event["pid"] for event in file_spans})
+        self.assertIn(os.getpid(), {event["pid"] for event in events if event.get("cat") == "write"})
+
+    def test_worker_events_reach_subscribers(self, _):
+        received = []
+        generator = BatchGenerator("standard", "markdown", jobs=2)
+        with events.subscribed(received.append):
+            generator.generate(self.root, self.destination)
+
+        names = [event.name for event in received]
+        self.assertEqual(names.count("file_started"), 4)
+        self.assertEqual(names.count("parsed"), 4)
+        self.assertEqual(names.count("rendered"), 4)
+        self.assertEqual(names.count("written"), 5)
+        finished = {event.file: event for event in received if event.name == "file_finished"}
+        self.assertEqual(set(finished), {"pkg/__init__.py", "pkg/big.py", "pkg/small.py", "top.py"})
+        self.assertIsNone(finished["top.py"].details["error"])
+        self.assertFalse(events.has_subscribers())
+
+    def test_limits_degrade_only_offending_files(self, _):
+        self.write("pkg/huge.py", "class Huge:\n    pass\n\n" + "x = [1, 2, 3]\n" * 200 + "def tail():\n    pass\n")
+        generator = BatchGenerator("standard", "markdown", jobs=2, limits=ResourceLimits(max_nodes=300))
+        index = generator.generate(self.root, self.destination)
+
+        self.assertEqual(list(index["degraded"]), ["pkg/huge.py"])
+        self.assertIn("AST nodes", index["degraded"]["pkg/huge.py"])
+        self.assertEqual(index["errors"], {})
+        self.assertEqual(len(index["files"]), 5)
+        with open(os.path.join(self.destination, "pkg", "huge.md")) as file:
+            page = file.read()
+        self.assertIn("### Huge", page)
+        self.assertIn("### tail", page)
+
+    def test_limits_can_skip_files(self, _):
+        self.write("pkg/huge.py", "x = [1, 2, 3]\n" * 200)
+        generator = BatchGenerator("standard", "markdown", cross_references=True,
+                                   limits=ResourceLimits(max_bytes=1000, on_limit="skip"))
+        index = generator.generate(self.root, self.destination)
+
+        self.assertIn("exceeds the limit of 1000", index["errors"]["pkg/huge.py"])
+        self.assertEqual(len(index["files"]), 4)
+
+    def test_search_index_requires_html(self, _):
+        with self.assertRaises(ValueError):
+            BatchGenerator("standard", "markdown", search_index=True)
+
+    def test_find_shards_rejects_incomplete_store(self, _):
+        store = os.path.join(self.temp_dir.name, "store")
+        os.makedirs(BatchGenerator.shard_directory(store, (1, 3)))
+        with self.assertRaises(ValueError):
+            BatchGenerator.find_shards(store)
+
+    def test_unsupported_format(self, _):
+        with self.assertRaises(ValueError):
+            BatchGenerator("standard", "pdf")
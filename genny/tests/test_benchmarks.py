@@ -0,0 +1,82 @@
+import ast
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from genny.benchmarks import CorpusGenerator, BenchmarkRunner, MemoryProfiler, compare
+from genny.codeparser import CodeParser
+from genny.filesystem import FileSystem
+
+
+class TestCorpusGenerator(unittest.TestCase):
+
+    def test_generate_module_shape(self):
+        generator = CorpusGenerator(files=2, classes=3, methods=4, functions=2, depth=2)
+        source = generator.generate_module(1)
+        ast.parse(source)
+
+        structure = CodeParser(FileSystem()).parse_source(source).to_dict()
+        top_level = [cl for cl in structure["classes"] if not cl["name"].startswith("Inner")]
+        self.assertEqual(len(top_level), 3)
+        self.assertEqual(len(top_level[0]["methods"]), 4)
+        self.assertEqual(top_level[0]["base_classes"], ["Previous"])
+        self.assertIn("function_0", [func["name"] for func in structure["functions"]])
+        self.assertEqual(source, generator.generate_module(1))
+
+    def test_generate_writes_packages(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = CorpusGenerator(files=5, classes=1, methods=1, functions=1, depth=1).generate(root)
+            self.assertEqual(len(paths), 5)
+            self.assertTrue(os.path.exists(os.path.join(root, "pkg0", "__init__.py")))
+            self.assertEqual(len(BenchmarkRunner.find_files(root)), 9)
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def test_run_corpus_times_every_stage(self):
+        runner = BenchmarkRunner(templates=["standard"], formats=["json", "markdown"], repeat=2)
+        results = runner.run_corpus(CorpusGenerator(files=2, classes=1, methods=2, functions=1, depth=1))
+
+        self.assertEqual(list(results["stages"]), ["read", "parse", "extract", "to_dict",
+                                                   "render:standard", "export:json", "export:markdown"])
+        self.assertEqual(len(results["stages"]["parse"]["runs"]), 2)
+        self.assertEqual(results["corpus"]["files"], 2)
+
+    def test_compare(self):
+        baseline = {"stages": {"parse": {"median": 0.1}, "render:standard": {"median": 0.001}}}
+        results = {"stages": {"parse": {"median": 0.2}, "render:standard": {"median": 0.003},
+                              "export:json": {"median": 1.0}}}
+
+        regressions = compare(results, baseline, threshold=0.25)
+        self.assertEqual([regression["stage"] for regression in regressions], ["parse"])
+        self.assertAlmostEqual(regressions[0]["ratio"], 2.0)
+        self.assertEqual(compare(results, baseline, threshold=1.5), [])
+
+
+class TestMemoryProfiler(unittest.TestCase):
+
+    def test_run_corpus_reports_every_stage(self):
+        profiler = MemoryProfiler(templates=["standard"], formats=["json"], top=2)
+        results = profiler.run_corpus(CorpusGenerator(files=2, classes=2, methods=3, functions=1, depth=2))
+
+        self.assertEqual(list(results["stages"]), ["read", "ast", "structure", "to_dict",
+                                                   "render:standard", "export:json"])
+        ast_memory = results["stages"]["ast"]
+        self.assertGreater(ast_memory["retained"], 0)
+        self.assertGreaterEqual(ast_memory["peak"], ast_memory["mean_peak"])
+        self.assertGreaterEqual(results["peak"], ast_memory["peak"])
+        self.assertLessEqual(len(ast_memory["sites"]), 2)
+        self.assertTrue(all(site["bytes"] > 0 for site in ast_memory["sites"]))
+
+    def test_progress_is_reported_per_file(self):
+        log = MagicMock()
+        profiler = MemoryProfiler(templates=["standard"], formats=["json"], log_callback=log)
+        results = profiler.run_corpus(CorpusGenerator(files=2, classes=1, methods=1, functions=1, depth=1))
+        self.assertEqual(log.call_count, results["files"])
+        self.assertTrue(log.call_args[0][0].startswith(f"File {results['files']}/{results['files']} done"))
+
+    def test_compare_peak_memory(self):
+        baseline = {"stages": {"ast": {"peak": 1000000}}}
+        results = {"stages": {"ast": {"peak": 2000000}}}
+        self.assertEqual(len(compare(results, baseline, 0.25, 65536, "peak")), 1)
+        self.assertEqual(compare(results, baseline, 0.25, 2000000, "peak"), [])
@@ -0,0 +1,59 @@
+import unittest
+import os
+import tempfile
+from genny.blobstore import BlobStore
+
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(os.path.join(self.temp_dir.name, "store"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def site_path(self, version, rel_path):
+        path = os.path.join(self.temp_dir.name, version, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def blob_count(self):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.store.store_dir, "objects")))
+
+    def test_identical_pages_are_stored_once_and_hardlinked(self):
+        first = self.site_path("v1", "mod.html")
+        second = self.site_path("v2", "mod.html")
+        self.assertTrue(self.store.write_file(first, "<p>same</p>"))
+        self.assertTrue(self.store.write_file(second, "<p>same</p>"))
+
+        self.assertEqual(self.blob_count(), 1)
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertFalse(self.store.write_file(second, "<p>same</p>"))
+
+    def test_changing_a_page_does_not_touch_other_versions(self):
+        first = self.site_path("v1", "mod.html")
+        second = self.site_path("v2", "mod.html")
+        self.store.write_file(first, "<p>old</p>")
+        self.store.write_file(second, "<p>old</p>")
+        self.store.write_file(second, "<p>new</p>")
+
+        self.assertEqual(self.store.read_file(first), "<p>old</p>")
+        self.assertEqual(self.store.read_file(second), "<p>new</p>")
+        self.assertEqual(self.blob_count(), 2)
+
+    def test_manifest_and_materialize(self):
+        self.store.write_file(self.site_path("v1", "pkg/mod.html"), "<p>mod</p>")
+        self.store.write_file(self.site_path("v1", "index.json"), "{}")
+        manifest = self.store.save_manifest("v1", os.path.join(self.temp_dir.name, "v1"))
+
+        self.assertEqual(sorted(manifest), ["index.json", "pkg/mod.html"])
+        self.assertEqual(self.store.versions(), ["v1"])
+        restored = os.path.join(self.temp_dir.name, "restored")
+        self.assertEqual(self.store.materialize("v1", restored), 2)
+        self.assertEqual(self.store.read_file(os.path.join(restored, "pkg", "mod.html")), "<p>mod</p>")
+        self.assertEqual(self.store.materialize("v1", restored), 0)
+
+    def test_missing_manifest(self):
+        with self.assertRaises(FileNotFoundError):
+            self.store.materialize("v9", self.temp_dir.name)
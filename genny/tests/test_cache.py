@@ -0,0 +1,46 @@
+import unittest
+import os
+import tempfile
+from genny.cache import Cache
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = Cache(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_missing_entry_returns_none(self):
+        self.assertIsNone(self.cache.get("blame", "abcdef"))
+
+    def test_set_and_get_round_trip(self):
+        self.cache.set("blame", "abcdef", [{"start": 1, "count": 2}])
+        self.assertEqual(self.cache.get("blame", "abcdef"), [{"start": 1, "count": 2}])
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, "blame", "ab", "abcdef.json")))
+
+    def test_corrupted_entry_returns_none(self):
+        self.cache.set("blame", "abcdef", [])
+        with open(os.path.join(self.temp_dir.name, "blame", "ab", "abcdef.json"), "w") as file:
+            file.write("{ invalid json")
+        self.assertIsNone(self.cache.get("blame", "abcdef"))
+
+    def test_unserializable_value_is_ignored(self):
+        self.cache.set("blame", "abcdef", object())
+        self.assertIsNone(self.cache.get("blame", "abcdef"))
+
+    def test_prune_removes_entries_not_used_since(self):
+        self.cache.set("fragments", "aaaa", {})
+        self.cache.set("fragments", "bbbb", {})
+        self.cache.set("blame", "cccc", [])
+        for key in ("aaaa", "bbbb"):
+            os.utime(os.path.join(self.temp_dir.name, "fragments", key[:2], f"{key}.json"), (0, 0))
+        self.cache.touch("fragments", "aaaa")
+
+        self.assertEqual(self.cache.prune("fragments", 1000), 1)
+        self.assertEqual(self.cache.get("fragments", "aaaa"), {})
+        self.assertIsNone(self.cache.get("fragments", "bbbb"))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "fragments", "bb")))
+        self.assertEqual(self.cache.get("blame", "cccc"), [])
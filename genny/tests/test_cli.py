@@ -1,5 +1,6 @@
 import unittest
 from typer.testing import CliRunner
+import typer
 from genny.cli import app
 from unittest.mock import patch, mock_open, MagicMock
 import json
@@ -57,6 +58,85 @@ class TestCLIUseCases(unittest.TestCase):
             instance.generate_docs.assert_called_once_with("main.py", "standard")
             instance.export_docs.assert_called_once_with("markdown", "docs.md")
 
+    def test_generate_with_blame_enables_annotation(self):
+        with patch("genny.cli.Docgen") as MockDocgen:
+            result = runner.invoke(app, ["gen", "--code-file", "main.py", "--blame"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertTrue(MockDocgen.call_args.kwargs["blame"])
+
+    def test_generate_reports_through_typer(self):
+        with patch("genny.cli.Docgen") as MockDocgen:
+            result = runner.invoke(app, ["gen", "--code-file", "main.py", "--destination", "docs.md"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIs(MockDocgen.call_args.kwargs["log_callback"], typer.echo)
+
+    def test_diff_api_prints_markdown(self):
+        with patch("genny.cli.ApiDiff") as MockApiDiff, patch("genny.cli.VersionControl") as mock_vc:
+            instance = MockApiDiff.return_value
+            instance.diff.return_value = []
+            instance.format_markdown.return_value = "# API changes: v1 -> v2"
+            result = runner.invoke(app, ["diff-api", "v1", "v2", "--repo", "some/repo"])
+            self.assertEqual(result.exit_code, 0)
+            mock_vc.assert_called_once_with("some/repo")
+            instance.diff.assert_called_once_with("v1", "v2")
+            self.assertIn("# API changes: v1 -> v2", result.stdout)
+
+    def test_diff_api_unsupported_format(self):
+        result = runner.invoke(app, ["diff-api", "v1", "v2", "--output-format", "yaml"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Unsupported format: yaml", result.stdout)
+
+    def test_generate_directory_uses_batch_generator(self):
+        with patch("genny.cli.BatchGenerator") as MockBatch, \
+             patch("genny.cli.os.path.isdir", return_value=True), \
+             patch("genny.cli.settings_manager.settings", {}):
+            MockBatch.parse_shard.return_value = (1, 2)
+            MockBatch.shard_directory.return_value = "store/shard-1-of-2"
+            MockBatch.return_value.generate.return_value = {"files": {"a.py": "a.md"}, "errors": {}}
+            result = runner.invoke(app, ["gen", "--code-file", "src", "--shard", "1/2",
+                                         "--artifact-store", "store", "--jobs", "4"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertEqual(MockBatch.call_args.kwargs["jobs"], 4)
+            MockBatch.return_value.generate.assert_called_once_with("src", "store/shard-1-of-2", shard=(1, 2))
+            self.assertIn("Generated 1 files at store/shard-1-of-2", result.stdout)
+
+    def test_generate_directory_requires_destination(self):
+        with patch("genny.cli.os.path.isdir", return_value=True), \
+             patch("genny.cli.settings", {}):
+            result = runner.invoke(app, ["gen", "--code-file", "src"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn("A destination directory is required", result.stdout)
+
+    def test_merge_artifact_store(self):
+        with patch("genny.cli.BatchGenerator") as MockBatch:
+            MockBatch.find_shards.return_value = ["store/shard-1-of-2", "store/shard-2-of-2"]
+            MockBatch.return_value.merge.return_value = {"files": {"a.py": "a.md"}}
+            result = runner.invoke(app, ["merge", "--artifact-store", "store", "--destination", "site"])
+            self.assertEqual(result.exit_code, 0)
+            MockBatch.return_value.merge.assert_called_once_with(
+                ["store/shard-1-of-2", "store/shard-2-of-2"], "site")
+            self.assertIn("Merged 2 shards (1 files) into site", result.stdout)
+
+    def test_query_prints_symbols_with_locations(self):
+        with patch("genny.cli.SymbolIndex") as MockIndex:
+            MockIndex.return_value.__enter__.return_value.query.return_value = [{
+                "kind": "method", "name": "gen", "qualname": "genny.docgen.Docgen.gen",
+                "docstring": "Generates.\nDetails.", "signature": "gen(self)",
+                "path": "genny/docgen.py", "lineno": 12, "output": "genny/docgen.md"
+            }]
+            result = runner.invoke(app, ["query", "Docgen.*", "--index", "docs/genny-symbols.db"])
+            self.assertEqual(result.exit_code, 0)
+            MockIndex.assert_called_once_with("docs/genny-symbols.db", read_only=True)
+            self.assertIn("genny.docgen.Docgen.gen (method)", result.stdout)
+            self.assertIn("Generates.", result.stdout)
+            self.assertNotIn("Details.", result.stdout)
+            self.assertIn("docs: docs/genny/docgen.md  source: genny/docgen.py:12", result.stdout)
+
+    def test_query_requires_a_filter(self):
+        result = runner.invoke(app, ["query"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Provide a pattern", result.stdout)
+
     def test_generate_missing_code_file_and_no_default(self):
         with patch("genny.cli.settings", {}):
             result = runner.invoke(app, ["gen"])
@@ -206,8 +206,136 @@ class TestClass:
         result = self.parser._get_value(node)
         self.assertEqual(result, "y")
 
-    def test_get_value_other_node_ast_dump(self):
+    def test_get_value_other_node_unparsed(self):
         node = ast.parse("x = 1 + 2").body[0].value
         result = self.parser._get_value(node)
-        self.assertTrue(result.startswith("BinOp("))
-        self.assertIn("left=Constant(value=1", result)
\ No newline at end of file
+        self.assertEqual(result, "1 + 2")
+
+    def test_get_value_source_segment(self):
+        source = "class A:\n    options = {'a':  1,\n               'b': [1, 2]}\n"
+        structure = self.parser.parse_source(source).to_dict()
+        self.assertEqual(structure['classes'][0]['attributes'],
+                         [{'name': 'options', 'value': "{'a': 1, 'b': [1, 2]}"}])
+
+    def test_source_segment_matches_ast(self):
+        source = "class A:\r\n    names = {'é': [1,\r\n        2], 'b': f(x)}  # ü\r\n    other = g(\n  'ü')\n"
+        self.parser.parse_source(source)
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.expr):
+                # Line breaks are normalised, which _get_value() collapses anyway
+                self.assertEqual(self.parser._source_segment(node).split(),
+                                 ast.get_source_segment(source, node).split())
+
+    def test_get_value_truncated(self):
+        source = "class A:\n    table = [" + ", ".join(str(i) for i in range(10000)) + "]\n"
+        self.parser.max_value_length = 20
+        attribute = self.parser.parse_source(source).to_dict()['classes'][0]['attributes'][0]
+        self.assertEqual(attribute['value'], "[0, 1, 2, 3, 4, 5, 6...")
+
+        self.parser.max_value_length = None
+        attribute = self.parser.parse_source(source).to_dict()['classes'][0]['attributes'][0]
+        self.assertTrue(attribute['value'].endswith("9998, 9999]"))
+
+    def test_values_not_rendered(self):
+        self.parser.render_values = False
+        structure = self.parser.parse_source("class A:\n    x = {'a': 1}\n").to_dict()
+        self.assertEqual(structure['classes'][0]['attributes'], [{'name': 'x'}])
+
+    def test_methods_are_not_functions(self):
+        source = "class A:\n    def m(self):\n        def inner():\n            pass\n\ndef f():\n    pass\n"
+        structure = self.parser.parse_source(source).to_dict()
+        self.assertEqual([func["name"] for func in structure["functions"]], ["f", "inner"])
+        self.assertEqual([method["name"] for method in structure["classes"][0]["methods"]], ["m"])
+
+class TestIncrementalExtraction(unittest.TestCase):
+    SOURCE = '''
+import os
+
+class Model:
+    """A model."""
+    size = 1
+
+    def save(self):
+        def helper():
+            pass
+        return helper()
+
+def load(path):
+    return os.path.exists(path)
+
+def dump(value):
+    return value
+'''
+
+    def setUp(self):
+        self.parser = CodeParser(MagicMock())
+        self.parser.definition_cache = {}
+        self.parser.get_function_details = MagicMock(wraps=self.parser.get_function_details)
+        self.parser.get_class_details = MagicMock(wraps=self.parser.get_class_details)
+
+    def extracted(self):
+        names = [call.args[0].name for call in self.parser.get_class_details.call_args_list
+                 + self.parser.get_function_details.call_args_list]
+        self.parser.get_class_details.reset_mock()
+        self.parser.get_function_details.reset_mock()
+        return sorted(names)
+
+    def test_unchanged_definitions_are_reused(self):
+        self.parser.parse_source(self.SOURCE)
+        self.assertEqual(self.extracted(), ["Model", "dump", "helper", "load", "save"])
+
+        self.parser.parse_source(self.SOURCE)
+        self.assertEqual(self.extracted(), [])
+
+        changed = self.SOURCE.replace("return value", "return value * 2")
+        structure = self.parser.parse_source(changed).to_dict()
+        self.assertEqual(self.extracted(), ["dump"])
+        self.assertEqual(structure, CodeParser(MagicMock()).parse_source(changed).to_dict())
+
+    def test_changed_class_is_extracted_again(self):
+        self.parser.parse_source(self.SOURCE)
+        self.extracted()
+        changed = self.SOURCE.replace("size = 1", "size = 2")
+        structure = self.parser.parse_source(changed).to_dict()
+        self.assertEqual(self.extracted(), ["Model", "helper", "save"])
+        self.assertEqual(structure["classes"][0]["attributes"], [{"name": "size", "value": "2"}])
+        self.assertEqual([func["name"] for func in structure["functions"]], ["load", "dump", "helper"])
+
+    def test_options_are_part_of_the_key(self):
+        self.parser.parse_source(self.SOURCE)
+        self.extracted()
+        self.parser.render_values = False
+        structure = self.parser.parse_source(self.SOURCE).to_dict()
+        self.assertEqual(self.extracted(), ["Model", "dump", "helper", "load", "save"])
+        self.assertEqual(structure["classes"][0]["attributes"], [{"name": "size"}])
+
+    def test_repeated_definitions(self):
+        source = "def f():\n    pass\n\ndef f():\n    pass\n"
+        self.parser.parse_source(source)
+        self.parser.parse_source(source)
+        self.assertEqual(self.extracted(), ["f", "f"])
+        structure = self.parser.parse_source("def f():\n    pass\n").to_dict()
+        self.assertEqual(self.extracted(), [])
+        self.assertEqual([func["name"] for func in structure["functions"]], ["f"])
+
+    def test_moved_definitions_keep_their_line_numbers(self):
+        self.parser.parse_source(self.SOURCE)
+        self.extracted()
+        moved = "import sys\n\n" + self.SOURCE
+        structure = self.parser.parse_source(moved)
+        self.assertEqual(self.extracted(), [])
+        self.assertEqual(structure.line_numbers["Model.save"], (10, 13))
+        self.assertEqual(structure.line_numbers, CodeParser(MagicMock()).parse_source(moved).line_numbers)
+
+    def test_cache_is_opt_in(self):
+        self.parser.definition_cache = None
+        self.parser.parse_source(self.SOURCE)
+        self.parser.parse_source(self.SOURCE)
+        self.assertEqual(len(self.extracted()), 10)
+
+    def test_without_source_nothing_is_cached(self):
+        tree = ast.parse(self.SOURCE)
+        self.parser.build_code_structure(tree)
+        self.parser.build_code_structure(tree)
+        self.assertEqual(len(self.extracted()), 10)
+        self.assertEqual(self.parser.definition_cache, {})
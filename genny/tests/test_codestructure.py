@@ -75,3 +75,14 @@ class TestCodeStructure(unittest.TestCase):
 
         # Validate the output
         self.assertEqual(result, expected)
+
+    def test_reset_clears_line_numbers(self):
+        self.structure.line_numbers["TestClass"] = (1, 3)
+        self.structure.reset()
+        self.assertEqual(self.structure.line_numbers, {})
+
+    def test_build_code_structure_records_line_numbers(self):
+        parser = CodeParser(MagicMock())
+        tree = ast.parse("class A:\n    def m(self):\n        pass\n\n\ndef f():\n    return 1\n")
+        structure = parser.build_code_structure(tree)
+        self.assertEqual(structure.line_numbers, {"A": (1, 3), "A.m": (2, 3), "f": (6, 7)})
@@ -0,0 +1,69 @@
+import unittest
+import gzip
+import lzma
+import os
+import tempfile
+from genny.compression import Precompressor
+
+
+class TestPrecompressor(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_writes_a_sibling_per_codec(self):
+        path = self.write("page.html", "<p>docs</p>" * 200)
+        written = Precompressor(["gzip", "xz"], min_size=100).compress_file(path)
+
+        self.assertEqual(written, [path + ".gz", path + ".xz"])
+        with gzip.open(path + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>docs</p>" * 200)
+        with lzma.open(path + ".xz", "rt") as file:
+            self.assertEqual(file.read(), "<p>docs</p>" * 200)
+
+    def test_output_is_deterministic(self):
+        path = self.write("page.html", "<p>docs</p>" * 200)
+        precompressor = Precompressor(min_size=0)
+        precompressor.compress_file(path)
+        with open(path + ".gz", "rb") as file:
+            first = file.read()
+        precompressor.compress_file(path)
+        with open(path + ".gz", "rb") as file:
+            self.assertEqual(file.read(), first)
+
+    def test_small_files_are_skipped_and_stale_siblings_removed(self):
+        path = self.write("page.html", "<p>docs</p>" * 200)
+        precompressor = Precompressor(min_size=1000)
+        precompressor.compress_file(path)
+        self.write("page.html", "<p>small</p>")
+
+        self.assertEqual(precompressor.compress_file(path), [])
+        self.assertFalse(os.path.exists(path + ".gz"))
+
+    def test_needs_compression_only_without_siblings(self):
+        precompressor = Precompressor(["gzip", "xz"])
+        path = self.write("page.html", "x" * 2000)
+        self.assertTrue(precompressor.needs_compression(path))
+        precompressor.compress_file(path)
+        self.assertFalse(precompressor.needs_compression(path))
+        os.remove(path + ".xz")
+        self.assertTrue(precompressor.needs_compression(path))
+        self.assertFalse(precompressor.needs_compression(self.write("small.html", "x")))
+
+    def test_compress_in_parallel(self):
+        paths = [self.write(f"page{i}.html", f"<p>{i}</p>" * 500) for i in range(6)]
+        written = Precompressor(jobs=3).compress(paths)
+        self.assertEqual(written, [path + ".gz" for path in paths])
+
+    def test_unsupported_codec(self):
+        with self.assertRaises(ValueError):
+            Precompressor(["brotli"])
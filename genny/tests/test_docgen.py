@@ -1,10 +1,13 @@
 import unittest
 import os
 import tempfile
+import json
 from unittest.mock import patch, Mock, MagicMock
 from genny.docgen import Docgen
+from genny.cache import Cache
 from genny.codeparser import CodeParser
 from genny.filesystem import FileSystem
+from genny.symbolindex import SymbolIndex
 import yaml
 
 
@@ -102,10 +105,17 @@ def test_function():
         result = self.docgen.export_docs("html", "output.html")
 
         self.assertTrue(result)
-        self.assertEqual(self.docgen.format_html.call_count, 2)
-        self.docgen.format_html.assert_called_with({'title': 'test.py'})
+        self.docgen.format_html.assert_called_once_with({'title': 'test.py'})
         self.docgen.file_system.write_file.assert_called_once()
 
+    def test_export_docs_precompresses_output(self):
+        self.docgen.generated_docs = {"title": "test.py"}
+        self.docgen.file_system.write_file = MagicMock()
+        self.docgen.precompressor = MagicMock()
+
+        self.assertTrue(self.docgen.export_docs("markdown", "output.md"))
+        self.docgen.precompressor.compress.assert_called_once_with(["output.md"])
+
     def test_export_docs_html_returns_false_on_none(self):
         self.docgen.generated_docs = {"title": "test.py"}
         self.docgen.log_callback = MagicMock()
@@ -157,7 +167,7 @@ def test_function():
 
     @patch("genny.docgen.FileSystem.read_file", return_value="def foo(): pass")
     @patch("genny.docgen.Templater.get_template_metadata", return_value={"sections": [], "style": {}})
-    @patch("genny.docgen.CodeParser.parse_code")
+    @patch("genny.docgen.CodeParser.parse_source")
     def test_sets_current_template_when_not_current(self, mock_parse, mock_get_template_metadata, mock_read_file):
         mock_parse.return_value.to_dict.return_value = {}
 
@@ -165,6 +175,45 @@ def test_function():
 
         self.assertEqual(self.docgen.current_template, "custom-template")
 
+    @patch("genny.docgen.FileSystem.read_file", return_value="def foo(): pass")
+    @patch("genny.docgen.Templater.get_template_metadata", return_value={"sections": ["functions"], "style": {}})
+    def test_generate_docs_reads_the_file_once(self, mock_get_template_metadata, mock_read_file):
+        self.docgen.generate_docs("dummy_file.py")
+
+        mock_read_file.assert_called_once_with("dummy_file.py")
+        self.assertEqual(self.docgen.generated_docs["functions"][0]["name"], "foo")
+        self.assertEqual(self.docgen.source_hash, SymbolIndex.content_hash("def foo(): pass"))
+
+    @patch("genny.docgen.FileSystem.read_file")
+    @patch("genny.docgen.Templater.get_template_metadata", return_value={"sections": ["functions"], "style": {}})
+    def test_generate_docs_from_archive_member_source(self, mock_get_template_metadata, mock_read_file):
+        self.docgen.blame = True
+        self.docgen.annotate_last_changed = Mock()
+
+        self.docgen.generate_docs("pkg.whl/pkg/mod.py", source_code="def foo(): pass")
+
+        mock_read_file.assert_not_called()
+        self.docgen.annotate_last_changed.assert_not_called()
+        self.assertEqual(self.docgen.generated_docs["title"], "mod.py")
+        self.assertEqual(self.docgen.generated_docs["functions"][0]["name"], "foo")
+
+    @patch("genny.docgen.Templater.get_template_metadata")
+    def test_attribute_values_rendered_only_when_shown(self, mock_get_template_metadata):
+        source = "class Config:\n    options = {'debug': True}\n"
+        mock_get_template_metadata.return_value = {"sections": ["classes"], "style": {"classes": "detailed"}}
+        self.docgen.generate_docs("config.py", source_code=source)
+        self.assertEqual(self.docgen.code_structure["classes"][0]["attributes"],
+                         [{"name": "options", "value": "{'debug': True}"}])
+
+        mock_get_template_metadata.return_value = {"sections": ["classes"], "style": {"classes": "summary"}}
+        self.docgen.generate_docs("config.py", source_code=source)
+        self.assertEqual(self.docgen.code_structure["classes"][0]["attributes"], [{"name": "options"}])
+        self.assertEqual(self.docgen.generated_docs["classes"], ["Config"])
+
+    def test_unknown_template_shows_attributes(self):
+        self.docgen.templater.templates_metadata = {}
+        self.assertTrue(self.docgen.shows_attributes("missing"))
+
     @patch("genny.docgen.FileSystem.read_file", side_effect=FileNotFoundError("dummy_file.py not found"))
     def test_logs_error_callback_on_file_not_found(self, mock_read_file):
         mock_callback = Mock()
@@ -201,7 +250,7 @@ def bar():
         self.file_system.write_file(self.sample_file_path, sample_code)
 
         # Patch the parser to return a structure with one item missing 'name'
-        self.docgen.parser.parse_code = lambda _: type("MockParsed", (), {
+        self.docgen.parser.parse_source = lambda _: type("MockParsed", (), {
             "to_dict": lambda self: {
                 "functions": [
                     {"name": "foo"},
@@ -349,3 +398,106 @@ def bar():
         self.assertFalse(result)
         self.docgen.log_callback.assert_called_once()
         self.assertIn("Error exporting documents: Simulated write error", self.docgen.log_callback.call_args[0][0])
+
+    @patch("genny.docgen.VersionControl")
+    def test_annotate_last_changed_adds_commit_metadata(self, MockVersionControl):
+        vc = MockVersionControl.return_value
+        change = {"commit": "a" * 40, "author": "Alice", "date": "2024-01-02"}
+        vc.map_blame_to_symbols.return_value = {"A": change, "A.m": change, "f": change}
+        code_structure = {
+            "classes": [{"name": "A", "methods": [{"name": "m"}, {"name": "n"}]}],
+            "functions": [{"name": "f"}]
+        }
+
+        annotated = self.docgen.annotate_last_changed(code_structure, {}, "module.py")
+
+        vc.blame.assert_called_once_with(os.path.abspath("module.py"))
+        self.assertEqual(annotated["classes"][0]["last_changed"], change)
+        self.assertEqual(annotated["classes"][0]["methods"][0]["last_changed"], change)
+        self.assertNotIn("last_changed", annotated["classes"][0]["methods"][1])
+        self.assertEqual(annotated["functions"][0]["last_changed"], change)
+        self.assertNotIn("last_changed", code_structure["functions"][0])
+
+    def test_format_markdown_includes_last_changed(self):
+        change = {"commit": "abcdef1234", "author": "Alice", "date": "2024-01-02"}
+        docs = {"functions": [{"name": "f", "parameters": [], "last_changed": change}]}
+        md = self.docgen.format_markdown(docs)
+        self.assertIn("**Last changed:** abcdef1 by Alice on 2024-01-02", md)
+
+    def test_format_docs_renders_without_writing(self):
+        self.docgen.generated_docs = {"title": "test.py"}
+        self.assertIn("# Documentation", self.docgen.format_docs("markdown"))
+        self.assertIn('"title": "test.py"', self.docgen.format_docs("json"))
+        with self.assertRaises(ValueError):
+            self.docgen.format_docs("pdf")
+
+    @patch("genny.docgen.Templater.get_template_metadata", return_value={"sections": [], "style": {}})
+    def test_export_docs_sqlite_writes_symbol_index(self, _):
+        self.file_system.write_file(self.sample_file_path, "class A:\n    def m(self):\n        pass\n")
+        self.docgen.generate_docs(self.sample_file_path)
+        db_path = os.path.join(self.temp_dir.name, "symbols.db")
+
+        self.assertTrue(self.docgen.export_docs("sqlite", db_path))
+
+        from genny.symbolindex import SymbolIndex
+        with SymbolIndex(db_path) as index:
+            rows = index.connection.execute("SELECT kind, name, lineno FROM symbols ORDER BY id").fetchall()
+        self.assertEqual(rows[1:], [("class", "A", 1), ("method", "m", 2)])
+
+    def test_format_html_adds_page_context(self):
+        mock_templater = MagicMock()
+        self.docgen.templater = mock_templater
+        self.docgen.current_template = "standard"
+        self.docgen.page_context = {"site_root": "../", "search": True}
+
+        self.docgen.format_html({"title": "test.py"})
+
+        mock_templater.render_template.assert_called_once_with(
+            "standard", {"title": "test.py", "site_root": "../", "search": True})
+
+    def test_format_html_reuses_cached_fragments(self):
+        self.docgen.cache = Cache(os.path.join(self.temp_dir.name, "cache"))
+        self.docgen.fragment_cache = True
+        self.docgen.code_file = self.sample_file_path
+        self.docgen.current_template = "standard"
+        docs = {"title": "sample_code.py",
+                "functions": [{"name": "a", "parameters": [], "docstring": "A."},
+                              {"name": "b", "parameters": [], "docstring": "B."}]}
+        first = self.docgen.format_html(docs)
+
+        with patch("jinja2.environment.Template.render", return_value="<li>rendered</li>") as mock_render:
+            self.docgen.format_html(dict(docs, functions=[docs["functions"][0],
+                                                          dict(docs["functions"][1], docstring="Changed.")]))
+        # Only the changed function and the page itself were rendered again
+        self.assertEqual(mock_render.call_count, 2)
+        self.assertIn('id="a"', first)
+
+    def test_format_html_splits_large_pages(self):
+        self.docgen.code_file = os.path.join(self.temp_dir.name, "big.py")
+        self.docgen.current_template = "standard"
+        self.docgen.split_pages = 3
+        docs = {"title": "big.py",
+                "classes": [{"name": "A", "docstring": None, "methods": [
+                    {"name": "m", "parameters": ["self"], "docstring": None},
+                    {"name": "n", "parameters": ["self"], "docstring": None}]}],
+                "functions": [{"name": f"f{i}", "parameters": [], "docstring": None} for i in range(4)]}
+
+        html = self.docgen.format_html(docs)
+
+        self.assertEqual(sorted(self.docgen.parts),
+                         ["big.parts/anchors.json", "big.parts/part-1.json", "big.parts/part-2.json",
+                          "big.parts/part-3.json"])
+        self.assertIn('data-part="big.parts/part-1.json"', html)
+        self.assertNotIn('id="f0"', html)
+        self.assertIn('id="A.m"', json.loads(self.docgen.parts["big.parts/part-1.json"])["html"])
+        self.assertEqual(json.loads(self.docgen.parts["big.parts/anchors.json"])["f3"], 3)
+
+    def test_format_html_does_not_split_small_pages(self):
+        self.docgen.code_file = os.path.join(self.temp_dir.name, "small.py")
+        self.docgen.current_template = "standard"
+        self.docgen.split_pages = 3
+        html = self.docgen.format_html({"title": "small.py", "functions": [
+            {"name": "f", "parameters": [], "docstring": None}]})
+
+        self.assertEqual(self.docgen.parts, {})
+        self.assertIn('id="f"', html)
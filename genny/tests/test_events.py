@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+from genny import events
+from genny.events import Event
+from genny.cache import Cache
+from genny.versioncontrol import VersionControl
+
+
+class TestEvents(unittest.TestCase):
+
+    def tearDown(self):
+        events.unsubscribe_all()
+
+    def test_subscribe_by_name(self):
+        parsed, everything = [], []
+        events.subscribe(parsed.append, events.PARSED)
+        events.subscribe(everything.append)
+
+        events.emit(events.PARSED, "a.py", 0.5, 120)
+        events.emit(events.WRITTEN, "a.md", size=80, changed=True)
+
+        self.assertEqual([event.file for event in parsed], ["a.py"])
+        self.assertEqual([event.name for event in everything], ["parsed", "written"])
+        self.assertEqual(everything[1].details, {"changed": True})
+
+        events.unsubscribe(everything.append)
+        events.unsubscribe(parsed.append)
+        self.assertFalse(events.has_subscribers())
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            Event("exploded")
+        with self.assertRaises(ValueError):
+            events.subscribe(print, "exploded")
+
+    def test_round_trip(self):
+        event = Event(events.RENDERED, "a.py", 0.1, 42, format="html")
+        self.assertEqual(Event.from_dict(event.to_dict()).to_dict(), event.to_dict())
+
+    def test_timed_reports_errors(self):
+        received = []
+        with events.subscribed(received.append):
+            with self.assertRaises(RuntimeError):
+                with events.timed(events.GIT_CALL, command="blame"):
+                    raise RuntimeError("git failed")
+        self.assertEqual(received[0].details, {"command": "blame", "error": "git failed"})
+        self.assertIsNotNone(received[0].duration)
+        self.assertFalse(events.has_subscribers())
+
+    def test_git_call_event(self):
+        received = []
+        with events.subscribed(received.append), patch("subprocess.run") as mock_run:
+            mock_run.return_value.stdout = "100644 blob abc123\tmodule.py\n"
+            VersionControl("/repo").list_tree("HEAD")
+        self.assertEqual([(event.name, event.size, event.details["command"]) for event in received],
+                         [("git_call", 29, "ls-tree")])
+
+    def test_cache_events(self):
+        received = []
+        with tempfile.TemporaryDirectory() as cache_dir, events.subscribed(received.append):
+            cache = Cache(cache_dir)
+            cache.get("blame", "ab12")
+            cache.set("blame", "ab12", [])
+            cache.get("blame", "ab12")
+        self.assertEqual([event.name for event in received], ["cache_miss", "cache_hit"])
+        self.assertEqual(received[0].details, {"namespace": "blame"})
@@ -1,6 +1,7 @@
 import unittest
 import os
 import tempfile
+import unittest.mock
 from genny.filesystem import FileSystem
 
 class TestFileSystem(unittest.TestCase):
@@ -52,3 +53,24 @@ class TestFileSystem(unittest.TestCase):
         read_data = self.file_system.read_file(file_path)
         
         self.assertEqual(read_data, data)
+
+    def test_write_file_skips_identical_content(self):
+        file_path = os.path.join(self.temp_dir.name, "unchanged.txt")
+        self.assertTrue(self.file_system.write_file(file_path, "Same content"))
+        os.utime(file_path, (0, 0))
+
+        self.assertFalse(self.file_system.write_file(file_path, "Same content"))
+        self.assertEqual(os.path.getmtime(file_path), 0)
+        self.assertTrue(self.file_system.write_file(file_path, "New content!"))
+        self.assertEqual(self.file_system.read_file(file_path), "New content!")
+
+    def test_write_file_is_atomic_and_leaves_no_temp_files(self):
+        file_path = os.path.join(self.temp_dir.name, "atomic.bin")
+        self.file_system.write_file(file_path, b"\x00binary")
+        with unittest.mock.patch("genny.filesystem.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.file_system.write_file(file_path, b"\x00replacement")
+
+        with open(file_path, "rb") as file:
+            self.assertEqual(file.read(), b"\x00binary")
+        self.assertEqual(os.listdir(self.temp_dir.name), ["atomic.bin"])
@@ -0,0 +1,72 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from genny.guards import ResourceLimits, LimitExceeded, count_nodes, time_limit, summary_structure
+from genny.codeparser import CodeParser
+from genny.filesystem import FileSystem
+import ast
+
+SOURCE = '''
+class Model(Base):
+    """A model."""
+    def save(self):
+        return 1
+
+async def fetch(url):
+    pass
+
+def helper(value):
+    def inner():
+        pass
+    return value
+'''
+
+
+class TestResourceLimits(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = CodeParser(FileSystem())
+
+    def test_parse_within_limits(self):
+        structure, line_numbers = ResourceLimits(max_bytes=10000, max_nodes=1000, timeout=5).parse(
+            self.parser, SOURCE)
+        self.assertEqual(structure["classes"][0]["name"], "Model")
+        self.assertIn("Model.save", line_numbers)
+
+    def test_max_bytes(self):
+        with self.assertRaisesRegex(LimitExceeded, "bytes exceeds the limit of 10"):
+            ResourceLimits(max_bytes=10).parse(self.parser, SOURCE)
+
+    def test_max_nodes(self):
+        with self.assertRaisesRegex(LimitExceeded, "more than 5 AST nodes"):
+            ResourceLimits(max_nodes=5).parse(self.parser, SOURCE)
+        self.assertEqual(count_nodes(ast.parse("x = 1"), 100), 5)
+
+    def test_timeout_interrupts_extraction(self):
+        parser = MagicMock()
+        parser.build_code_structure.side_effect = lambda tree, source_code: time.sleep(5)
+        start = time.perf_counter()
+        with self.assertRaisesRegex(LimitExceeded, "took longer than 0.1s"):
+            ResourceLimits(timeout=0.1).parse(parser, SOURCE)
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_time_limit_is_cleared(self):
+        with time_limit(0.05):
+            pass
+        time.sleep(0.1)
+
+    def test_recursion_error_is_a_limit(self):
+        parser = MagicMock()
+        parser.build_code_structure.side_effect = RecursionError
+        with self.assertRaisesRegex(LimitExceeded, "too deeply nested"):
+            ResourceLimits(timeout=1).parse(parser, SOURCE)
+
+    def test_invalid_action(self):
+        with self.assertRaises(ValueError):
+            ResourceLimits(on_limit="ignore")
+        self.assertFalse(ResourceLimits())
+
+    def test_summary_structure(self):
+        structure = summary_structure(SOURCE)
+        self.assertEqual(structure["classes"], [{"name": "Model"}])
+        self.assertEqual([func["name"] for func in structure["functions"]], ["fetch", "helper"])
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+from genny import events
+from genny.events import Event
+from genny.metrics import MetricsSink
+
+
+class TestMetricsSink(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def feed(self, sink):
+        sink(Event(events.PARSED, "a.py", 0.25, 100))
+        sink(Event(events.PARSED, "b.py", 0.5, 300))
+        sink(Event(events.FILE_FINISHED, "b.py", 1.0, 300, error="boom"))
+
+    def test_prometheus(self):
+        path = os.path.join(self.temp_dir.name, "genny.prom")
+        sink = MetricsSink(path)
+        self.feed(sink)
+        sink.write()
+
+        with open(path) as file:
+            text = file.read()
+        self.assertIn('genny_events_total{event="parsed"} 2\n', text)
+        self.assertIn('genny_event_duration_seconds_total{event="parsed"} 0.75\n', text)
+        self.assertIn('genny_event_bytes_total{event="parsed"} 400\n', text)
+        self.assertIn("genny_errors_total 1\n", text)
+        self.assertIn("# TYPE genny_events_total counter\n", text)
+
+    def test_json(self):
+        path = os.path.join(self.temp_dir.name, "genny.json")
+        sink = MetricsSink(path)
+        self.feed(sink)
+        sink.write()
+
+        with open(path) as file:
+            metrics = json.load(file)
+        self.assertEqual(metrics["events"]["parsed"], {"count": 2, "duration_seconds": 0.75, "bytes": 400})
+        self.assertEqual(metrics["errors"], 1)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            MetricsSink("metrics.txt", "csv")
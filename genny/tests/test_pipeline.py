@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from genny.pipeline import AsyncPipeline
+
+
+class TestAsyncPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_results_are_handled_in_task_order(self):
+        handled = []
+
+        def process(task):
+            # Later tasks finish first
+            time.sleep((10 - task) * 0.002)
+            return task * 2
+
+        AsyncPipeline(self.executor, workers=3).run(range(10), lambda task: task, process, handled.append)
+
+        self.assertEqual(handled, [task * 2 for task in range(10)])
+
+    def test_tasks_in_flight_are_bounded(self):
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def read(task):
+            with lock:
+                in_flight.append(task)
+                peak.append(len(in_flight))
+            return task
+
+        def handle(result):
+            with lock:
+                in_flight.remove(result)
+
+        AsyncPipeline(self.executor, workers=2, io_threads=4, queue_size=3).run(
+            range(20), read, lambda task: task, handle)
+
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(in_flight, [])
+
+    def test_writes_finish_before_run_returns(self):
+        written = []
+        pipeline = AsyncPipeline(self.executor, workers=3)
+
+        def slow_write(value):
+            time.sleep(0.01)
+            written.append(value)
+
+        pipeline.run(range(5), lambda task: task, lambda task: task,
+                     lambda result: pipeline.write(slow_write, result))
+
+        self.assertEqual(sorted(written), list(range(5)))
+        self.assertEqual(len(pipeline.pending), 0)
+
+    def test_errors_are_raised(self):
+        def process(task):
+            if task == 3:
+                raise ValueError("bad task")
+            return task
+
+        with self.assertRaisesRegex(ValueError, "bad task"):
+            AsyncPipeline(self.executor, workers=2).run(range(6), lambda task: task, process, lambda result: None)
+
+        def fail(value):
+            raise OSError("disk full")
+
+        pipeline = AsyncPipeline(self.executor)
+        with self.assertRaisesRegex(OSError, "disk full"):
+            pipeline.run(range(2), lambda task: task, lambda task: task,
+                         lambda result: pipeline.write(fail, result))
@@ -0,0 +1,66 @@
+import os
+import pstats
+import tempfile
+import unittest
+from genny import profiling
+from genny.profiling import Profiler
+from genny.codeparser import CodeParser
+from genny.filesystem import FileSystem
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_summary_and_slowest_files(self):
+        profiler = Profiler()
+        for i in range(1, 21):
+            profiler.add("parse", i / 1000, f"file{i}.py")
+        profiler.add("read", 0.5, "file1.py")
+
+        rows = {row["stage"]: row for row in profiler.summary()}
+        self.assertEqual([row["stage"] for row in profiler.summary()], ["read", "parse"])
+        self.assertEqual(rows["parse"]["calls"], 20)
+        self.assertAlmostEqual(rows["parse"]["total"], 0.21)
+        self.assertAlmostEqual(rows["parse"]["p95"], 0.019)
+        self.assertEqual(profiler.slowest_files(2), [("file1.py", 0.501), ("file20.py", 0.02)])
+        self.assertIn("Slowest files:", profiler.report())
+
+    def test_stages_are_only_recorded_when_enabled(self):
+        parser = CodeParser(FileSystem())
+        parser.parse_source("def f():\n    pass\n").to_dict()
+
+        profiler = Profiler()
+        with profiling.enabled(profiler), profiling.current_file("module.py"):
+            parser.parse_source("def f():\n    pass\n").to_dict()
+
+        self.assertIsNone(profiling.active())
+        self.assertEqual([(stage, file) for stage, file, *_ in profiler.samples],
+                         [("parse", "module.py"), ("build", "module.py"), ("to_dict", "module.py"),
+                          ("file", "module.py")])
+        self.assertEqual(len(profiler.drain()), 4)
+        self.assertEqual(profiler.samples, [])
+
+    def test_trace_events(self):
+        profiler = Profiler()
+        with profiling.enabled(profiler), profiling.current_file("module.py"):
+            with profiling.stage("parse"):
+                pass
+        profiler.merge([("render", "other.py", 0.002, profiler.started_at + 1, 4242, 7)])
+
+        events = profiler.trace_events()
+        names = {event["args"]["name"] for event in events if event["ph"] == "M"}
+        self.assertIn("genny worker 4242", names)
+        spans = {event["name"]: event for event in events if event["ph"] == "X"}
+        self.assertEqual(set(spans), {"parse", "module.py", "render"})
+        self.assertEqual(spans["module.py"]["cat"], "file")
+        self.assertLessEqual(spans["module.py"]["ts"], spans["parse"]["ts"])
+        self.assertEqual((spans["render"]["pid"], spans["render"]["tid"]), (4242, 7))
+        self.assertAlmostEqual(spans["render"]["ts"], 1e6)
+        self.assertAlmostEqual(spans["render"]["dur"], 2000)
+        self.assertEqual(spans["render"]["args"], {"file": "other.py"})
+
+    def test_cprofiled_writes_stats(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "out.prof")
+            with profiling.cprofiled(path):
+                sum(range(100))
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
@@ -0,0 +1,73 @@
+import io
+import unittest
+from unittest.mock import patch
+from genny import events
+from genny.events import Event
+from genny.progress import PlainProgress, RichProgress, create_progress, format_bytes, format_duration, Live
+
+
+def feed(display):
+    display(Event(events.RUN_STARTED, "src", size=3000, files=3))
+    display(Event(events.FILE_STARTED, "a.py", size=1000, worker=11))
+    display(Event(events.FILE_STARTED, "b.py", size=2000, worker=12))
+    display(Event(events.CACHE_HIT, namespace="blame"))
+    display(Event(events.CACHE_MISS, namespace="blame"))
+    display(Event(events.FILE_FINISHED, "a.py", 0.1, 1000, worker=11, error=None))
+
+
+class TestProgress(unittest.TestCase):
+
+    def test_stats(self):
+        display = PlainProgress(io.StringIO(), interval=float("inf"))
+        feed(display)
+        display(Event(events.FILE_FINISHED, "b.py", 0.1, 2000, worker=12, error="boom"))
+        display(Event(events.FILE_STARTED, "c.py", size=0, worker=11))
+        display.started = 0.0
+        with patch("genny.progress.time.perf_counter", return_value=2.0):
+            stats = display.stats()
+
+        self.assertEqual((stats["files"], stats["bytes"], stats["errors"]), (2, 3000, 1))
+        self.assertEqual(stats["active"], {11: "c.py"})
+        self.assertEqual(stats["cache_hit_rate"], 0.5)
+        self.assertEqual(stats["files_per_second"], 1.0)
+        self.assertEqual(stats["bytes_per_second"], 1500.0)
+        self.assertEqual(stats["eta"], 0.0)
+
+    def test_eta_from_sizes(self):
+        display = PlainProgress(io.StringIO(), interval=float("inf"))
+        feed(display)
+        display.started = 0.0
+        with patch("genny.progress.time.perf_counter", return_value=1.0):
+            self.assertEqual(display.stats()["eta"], 2.0)
+
+    def test_plain_progress_prints_lines(self):
+        stream = io.StringIO()
+        display = PlainProgress(stream, interval=0)
+        feed(display)
+        display(Event(events.RUN_FINISHED, "src", 1.0, files=3, errors=0))
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("[1/3]  33%"))
+        self.assertIn("cache 50%", lines[0])
+
+    def test_create_progress_without_terminal(self):
+        self.assertIsInstance(create_progress(io.StringIO()), PlainProgress)
+
+    @unittest.skipIf(Live is None, "rich is not installed")
+    def test_rich_progress_shows_active_workers(self):
+        stream = io.StringIO()
+        display = RichProgress(stream)
+        feed(display)
+        display.live.console.print(display.renderable())
+
+        output = stream.getvalue()
+        self.assertIn("1/3", output)
+        self.assertIn("b.py", output)
+        self.assertNotIn("a.py", output)
+
+    def test_formatting(self):
+        self.assertEqual(format_bytes(512), "512 B")
+        self.assertEqual(format_bytes(1536), "1.5 KB")
+        self.assertEqual(format_duration(3725), "1:02:05")
+        self.assertEqual(format_duration(None), "--:--")
@@ -0,0 +1,66 @@
+import unittest
+import json
+from genny.searchindex import SearchIndexBuilder, DOCS_PER_BLOCK
+
+STRUCTURE = {
+    "classes": [{
+        "name": "BatchGenerator",
+        "docstring": "Generate documentation for every file.",
+        "methods": [{"name": "write_search_index", "parameters": ["self", "destination"]}]
+    }],
+    "functions": [{"name": "parse_shard", "parameters": ["shard"], "docstring": "Parse a shard specification."}]
+}
+
+
+class TestSearchIndexBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = SearchIndexBuilder()
+
+    def test_tokenize_names_splits_camel_and_snake_case(self):
+        self.assertEqual(self.builder.tokenize("BatchGenerator", "name"),
+                         {"batchgenerator", "batch", "generator"})
+        self.assertEqual(self.builder.tokenize("write_search_index", "name"),
+                         {"write_search_index", "write", "search", "index"})
+        self.assertIn("html", self.builder.tokenize("HTMLParser", "name"))
+
+    def test_tokenize_docstring_skips_short_and_stop_words(self):
+        self.assertEqual(self.builder.tokenize("Parse the shard of a run.", "docstring"),
+                         {"parse", "shard", "run"})
+
+    def test_add_module_indexes_symbols_with_anchors(self):
+        self.builder.add_module("genny.batch", STRUCTURE, "genny/batch.html")
+        self.assertEqual([doc[:3] for doc in self.builder.docs], [
+            ["genny.batch", "module", "genny/batch.html"],
+            ["genny.batch.BatchGenerator", "class", "genny/batch.html#BatchGenerator"],
+            ["genny.batch.BatchGenerator.write_search_index", "method",
+             "genny/batch.html#BatchGenerator.write_search_index"],
+            ["genny.batch.parse_shard", "function", "genny/batch.html#parse_shard"],
+        ])
+        self.assertEqual(self.builder.docs[3][3], "Parse a shard specification.")
+        # A name match outweighs a docstring match
+        self.assertIn([3, 3], self.builder.postings["shard"])
+        self.assertIn([2, 2], self.builder.postings["destination"])
+
+    def test_build_shards_postings_by_prefix(self):
+        self.builder.add_module("genny.batch", STRUCTURE, "genny/batch.html")
+        files = self.builder.build()
+        manifest = json.loads(files["search/manifest.json"])
+        self.assertEqual(manifest["docs_per_block"], DOCS_PER_BLOCK)
+        self.assertIn("ba", manifest["prefixes"])
+
+        shard = json.loads(files["search/idx-ba.json"])
+        self.assertTrue(all(token.startswith("ba") for token in shard))
+        self.assertIn("batch", shard)
+        self.assertEqual(len(json.loads(files["search/docs-0.json"])), 4)
+
+    def test_merge_json_offsets_document_ids(self):
+        other = SearchIndexBuilder()
+        other.add_module("genny.batch", STRUCTURE, "genny/batch.html")
+        self.builder.add_module("genny.cli", {}, "genny/cli.html")
+
+        self.builder.merge_json(other.to_json())
+
+        self.assertEqual(len(self.builder.docs), 5)
+        self.assertEqual(self.builder.postings["cli"], [[0, 3]])
+        self.assertIn([4, 3], self.builder.postings["shard"])
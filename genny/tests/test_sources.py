@@ -0,0 +1,64 @@
+import unittest
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+from genny.sources import SourceArchive, is_source_archive
+
+
+class TestSourceArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_zip(self, name, members):
+        path = os.path.join(self.temp_dir.name, name)
+        with zipfile.ZipFile(path, "w") as archive:
+            for member, content in members.items():
+                archive.writestr(member, content)
+        return path
+
+    def make_tar(self, name, members):
+        path = os.path.join(self.temp_dir.name, name)
+        with tarfile.open(path, "w:gz") as archive:
+            for member, content in members.items():
+                info = tarfile.TarInfo(member)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+        return path
+
+    def test_wheel_members(self):
+        path = self.make_zip("pkg-1.0-py3-none-any.whl", {
+            "pkg/__init__.py": "",
+            "pkg/mod.py": "def f():\n    pass\n",
+            "pkg/__pycache__/mod.cpython-311.py": "",
+            "pkg-1.0.dist-info/METADATA": "Name: pkg",
+            "../evil.py": "x = 1\n"
+        })
+        archive = SourceArchive(path)
+
+        self.assertTrue(is_source_archive(path))
+        self.assertEqual(archive.list_files(), [("pkg/__init__.py", 0), ("pkg/mod.py", 18)])
+        self.assertEqual(dict(archive.read_files(["pkg/mod.py"])), {"pkg/mod.py": "def f():\n    pass\n"})
+
+    def test_sdist_top_level_directory_is_stripped(self):
+        path = self.make_tar("pkg-1.0.tar.gz", {
+            "pkg-1.0/PKG-INFO": b"Name: pkg",
+            "pkg-1.0/pkg/mod.py": b"# -*- coding: latin-1 -*-\nname = '\xe9'\n"
+        })
+        sources = dict(SourceArchive(path).read_files())
+        self.assertEqual(list(sources), ["pkg/mod.py"])
+        self.assertIn("name = 'é'", sources["pkg/mod.py"])
+
+    def test_plain_zip_keeps_its_top_level_directory(self):
+        path = self.make_zip("src.zip", {"pkg/mod.py": "", "pkg/util.py": ""})
+        self.assertEqual([rel_path for rel_path, _ in SourceArchive(path).list_files()],
+                         ["pkg/mod.py", "pkg/util.py"])
+
+    def test_unsupported_archive(self):
+        with self.assertRaises(ValueError):
+            SourceArchive("pkg.rar")
@@ -0,0 +1,175 @@
+import unittest
+import os
+import tempfile
+import sqlite3
+from unittest.mock import MagicMock
+from genny.codeparser import CodeParser
+from genny.symbolindex import SymbolIndex, SCHEMA_VERSION
+
+STRUCTURE = {
+    "imports": [["os", "sys.path as sys_path"]],
+    "classes": [{
+        "name": "A",
+        "docstring": "Class A.",
+        "base_classes": ["Base"],
+        "methods": [{"name": "m", "parameters": ["self", "x"], "docstring": "Method m."}],
+        "attributes": [{"name": "size", "value": "3"}]
+    }],
+    "functions": [{"name": "f", "parameters": [], "docstring": None}]
+}
+
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "symbols.db")
+        self.index = SymbolIndex(self.db_path)
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def rows(self, index=None):
+        index = index or self.index
+        return index.connection.execute(
+            "SELECT kind, name, qualname, parent, signature, lineno FROM symbols ORDER BY id").fetchall()
+
+    def build_index(self):
+        self.index.update_module("genny/docgen.py", "sha1", {
+            "classes": [{"name": "Docgen", "docstring": "Generates docs.", "methods": [
+                {"name": "format_markdown", "parameters": ["self", "docs"], "docstring": "Markdown.\nMore."},
+                {"name": "export_docs", "parameters": ["self", "f"]}]}],
+            "functions": [{"name": "format_size", "parameters": ["n"]}]
+        }, {"Docgen.format_markdown": (10, 20)}, "genny/docgen.md")
+        self.index.update_module("genny/cli.py", "sha1", {"functions": [{"name": "gen", "parameters": []}]})
+        self.index.connection.commit()
+
+    def test_module_name(self):
+        self.assertEqual(SymbolIndex.module_name("pkg/mod.py"), "pkg.mod")
+        self.assertEqual(SymbolIndex.module_name("pkg/__init__.py"), "pkg")
+        self.assertEqual(SymbolIndex.module_name("../other/mod.py"), "other.mod")
+
+    def test_update_module_writes_every_kind(self):
+        self.index.update_module("pkg/mod.py", "sha1", STRUCTURE, {"A": (3, 9), "A.m": (5, 9)}, "pkg/mod.md")
+        self.assertEqual(self.rows(), [
+            ("module", "mod", "pkg.mod", None, None, None),
+            ("import", "os", "os", "pkg.mod", None, None),
+            ("import", "sys_path", "sys.path", "pkg.mod", None, None),
+            ("class", "A", "pkg.mod.A", "pkg.mod", "class A(Base)", 3),
+            ("method", "m", "pkg.mod.A.m", "pkg.mod.A", "m(self, x)", 5),
+            ("attribute", "size", "pkg.mod.A.size", "pkg.mod.A", "size = 3", None),
+            ("function", "f", "pkg.mod.f", "pkg.mod", "f()", None),
+        ])
+
+    def test_imports_are_indexed_by_the_name_they_bind(self):
+        structure = CodeParser(MagicMock()).parse_source("import os.path\nfrom sys import path as sys_path\n")
+        self.index.update_module("pkg/mod.py", "sha1", structure.to_dict())
+        self.assertEqual(self.rows()[1:], [
+            ("import", "os", "os", "pkg.mod", None, None),
+            ("import", "sys_path", "sys.path", "pkg.mod", None, None),
+        ])
+
+    def test_name_and_qualname_are_indexed(self):
+        plan = self.index.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM symbols WHERE qualname = 'pkg.mod.A'").fetchall()
+        self.assertIn("symbols_qualname", str(plan))
+        plan = self.index.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM symbols WHERE name = 'A'").fetchall()
+        self.assertIn("symbols_name", str(plan))
+
+    def test_update_replaces_previous_symbols(self):
+        self.index.update_module("pkg/mod.py", "sha1", STRUCTURE)
+        self.index.update_module("pkg/mod.py", "sha2", {"functions": [{"name": "g", "parameters": []}]})
+        self.assertEqual([row[1] for row in self.rows()], ["mod", "g"])
+
+    def test_is_current(self):
+        self.index.update_module("pkg/mod.py", "sha1", STRUCTURE, output="pkg/mod.md")
+        self.assertTrue(self.index.is_current("pkg/mod.py", "sha1", "pkg/mod.md"))
+        self.assertFalse(self.index.is_current("pkg/mod.py", "sha2", "pkg/mod.md"))
+        self.assertFalse(self.index.is_current("pkg/mod.py", "sha1", "pkg/mod.html"))
+        self.assertFalse(self.index.is_current("other.py", "sha1"))
+
+    def test_remove_files_cascades_to_symbols(self):
+        self.index.update_module("a.py", "sha1", STRUCTURE)
+        self.index.update_module("b.py", "sha1", STRUCTURE)
+        self.index.remove_files(["a.py"])
+        self.assertEqual(self.index.indexed_paths(), ["b.py"])
+        count = self.index.connection.execute("SELECT COUNT(*) FROM symbols WHERE path = 'a.py'").fetchone()
+        self.assertEqual(count, (0,))
+
+    def test_merge_from(self):
+        other_path = os.path.join(self.temp_dir.name, "other.db")
+        with SymbolIndex(other_path) as other:
+            other.update_module("b.py", "sha1", STRUCTURE)
+            other.update_module("a.py", "sha2", {})
+        self.index.update_module("a.py", "sha1", STRUCTURE)
+
+        self.index.merge_from(other_path)
+        self.assertEqual(sorted(self.index.indexed_paths()), ["a.py", "b.py"])
+        self.assertTrue(self.index.is_current("a.py", "sha2"))
+        self.assertEqual(len([row for row in self.rows() if row[2].startswith("a")]), 1)
+
+    def test_query_by_local_and_qualified_name(self):
+        self.build_index()
+        local = [s["qualname"] for s in self.index.query("Docgen.*")]
+        self.assertEqual(local, ["genny.docgen.Docgen.export_docs", "genny.docgen.Docgen.format_markdown"])
+        qualified = [s["qualname"] for s in self.index.query("genny.cli.*")]
+        self.assertEqual(qualified, ["genny.cli.gen"])
+
+    def test_query_by_kind_and_name(self):
+        self.build_index()
+        results = self.index.query(kind="function", name="format_*")
+        self.assertEqual([s["qualname"] for s in results], ["genny.docgen.format_size"])
+        method = self.index.query("Docgen.format_markdown")[0]
+        self.assertEqual(method["signature"], "format_markdown(self, docs)")
+        self.assertEqual(method["docstring"], "Markdown.\nMore.")
+        self.assertEqual((method["path"], method["lineno"], method["output"]),
+                         ("genny/docgen.py", 10, "genny/docgen.md"))
+
+    def test_query_respects_limit(self):
+        self.build_index()
+        self.assertEqual(len(self.index.query("*", limit=2)), 2)
+
+    def test_query_limit_skips_symbols_already_found(self):
+        self.build_index()
+        self.index.update_module("other/fmt.py", "sha1", {"functions": [{"name": "gformat", "parameters": []}]})
+        results = self.index.query("[gD]*format*", limit=3)
+        self.assertEqual([s["qualname"] for s in results],
+                         ["genny.docgen.Docgen.format_markdown", "genny.docgen.format_size", "other.fmt.gformat"])
+
+    def test_query_limit_above_the_variable_limit(self):
+        for path in ("pkg/many.py", "other/more.py"):
+            self.index.update_module(path, "sha1", {
+                "functions": [{"name": f"f{i}", "parameters": []} for i in range(1200)]})
+        # Older SQLite builds bind at most 999 variables per statement
+        self.index.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        self.assertEqual(len(self.index.query("[pf]*", limit=1500)), 1500)
+
+    def test_query_patterns_use_indexes(self):
+        for column in ("qualname", "local_name"):
+            plan = self.index.connection.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM symbols WHERE {column} GLOB 'Docgen.*'").fetchall()
+            self.assertIn(f"symbols_{column}", str(plan))
+        plan = self.index.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM symbols WHERE kind = 'function' AND name GLOB 'format_*'").fetchall()
+        self.assertIn("symbols_kind_name", str(plan))
+
+    def test_read_only_index_must_exist(self):
+        with self.assertRaises(FileNotFoundError):
+            SymbolIndex(os.path.join(self.temp_dir.name, "missing.db"), read_only=True)
+
+    def test_outdated_index_is_rebuilt_or_rejected(self):
+        old_path = os.path.join(self.temp_dir.name, "old.db")
+        connection = sqlite3.connect(old_path)
+        connection.execute("CREATE TABLE symbols (id INTEGER PRIMARY KEY, name TEXT)")
+        connection.commit()
+        connection.close()
+
+        with self.assertRaises(ValueError):
+            SymbolIndex(old_path, read_only=True)
+        with SymbolIndex(old_path) as index:
+            index.update_module("a.py", "sha1", STRUCTURE)
+        with SymbolIndex(old_path, read_only=True) as index:
+            self.assertEqual(index.connection.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+            self.assertEqual(len(index.query("A.*")), 2)
@@ -310,3 +310,49 @@ class TestTemplater(unittest.TestCase):
         self.assertIn("template1", result)
         self.assertIn("template2", result)
         self.assertEqual(len(result), 2)
+
+    def test_site_assets_are_content_hashed(self):
+        templater = Templater()
+        assets = templater.site_assets("html2", ["search.js", "missing.js"])
+
+        self.assertEqual(sorted(assets), ["html2.css", "search.js"])
+        path, content = assets["html2.css"]
+        self.assertRegex(path, r"^assets/html2\.[0-9a-f]{12}\.css$")
+        self.assertEqual(content, templater.read_static("html2.css"))
+        self.assertEqual(templater.site_assets("html2")["html2.css"][0], path)
+
+    def test_site_assets_skip_templates_without_stylesheet(self):
+        self.assertEqual(Templater().site_assets("fallback"), {})
+
+    def test_render_with_fragments_matches_full_render(self):
+        templater = Templater()
+        context = {
+            "title": "mod.py",
+            "classes": [{"name": "A", "docstring": "Doc.", "methods": [
+                {"name": "m", "parameters": ["self"], "docstring": None}]}],
+            "functions": [{"name": "f", "parameters": ["x"], "docstring": "F."}]
+        }
+        fragment_cache = {}
+
+        for template_name in ("standard", "html1", "html2"):
+            self.assertEqual(templater.render_template(template_name, context, fragment_cache=fragment_cache),
+                             templater.render_template(template_name, context))
+        self.assertEqual(len(fragment_cache), 2)
+
+    def test_render_fragments_only_renders_changed_symbols(self):
+        templater = Templater()
+        functions = [{"name": "f", "parameters": [], "docstring": "F."},
+                     {"name": "g", "parameters": [], "docstring": "G."}]
+        fragment_cache = {}
+        templater.render_fragments("standard", {"functions": functions}, fragment_cache)
+        stale = dict(fragment_cache)
+
+        changed = [functions[0], dict(functions[1], docstring="Changed.")]
+        fragments = templater.render_fragments("standard", {"functions": changed}, fragment_cache)
+
+        self.assertIn("Changed.", fragments["functions"][1])
+        self.assertEqual(len(set(stale) & set(fragment_cache)), 1)
+        self.assertEqual(len(fragment_cache), 2)
+
+    def test_render_fragments_without_fragment_templates(self):
+        self.assertIsNone(Templater().render_fragments("fallback", {"functions": []}, {}))
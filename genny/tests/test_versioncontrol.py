@@ -137,3 +137,106 @@ class TestVersionControl(unittest.TestCase):
         self.assertIn("Failed to retrieve commit history", result)
         log.assert_called_once()
         self.assertIn("Failed to retrieve commit history", log.call_args[0][0])
+
+    def test_blame_maps_line_ranges_to_symbols(self):
+        file_path = os.path.join(self.repo_path, 'module.py')
+        with open(file_path, 'w') as f:
+            f.write("def first():\n    pass\n\n\ndef second():\n    pass\n")
+        subprocess.run(['git', '-C', self.repo_path, 'add', file_path], check=True)
+        subprocess.run(['git', '-C', self.repo_path, 'commit', '-m', 'Add module'], check=True)
+
+        hunks = self.vc.blame(file_path)
+        self.assertEqual(sum(hunk['count'] for hunk in hunks), 6)
+
+        last_changed = self.vc.map_blame_to_symbols(hunks, {'first': (1, 2), 'second': (5, 6)})
+        self.assertEqual(set(last_changed), {'first', 'second'})
+        self.assertEqual(len(last_changed['first']['commit']), 40)
+        self.assertRegex(last_changed['second']['date'], r"^\d{4}-\d{2}-\d{2}$")
+
+    def test_blame_uses_cache_by_blob_sha(self):
+        cache = MagicMock()
+        cache.get.return_value = [{'start': 1, 'count': 1, 'commit': 'abc', 'author': 'me', 'time': 0}]
+        vc = VersionControl(self.repo_path, cache=cache)
+        file_path = os.path.join(self.repo_path, 'test.txt')
+
+        key = vc.blame_key(file_path)
+        with patch("subprocess.run") as mock_run:
+            hunks = vc.blame(file_path)
+
+        mock_run.assert_not_called()
+        self.assertEqual(hunks[0]['commit'], 'abc')
+        cache.get.assert_called_once_with('blame', key)
+
+    def test_blame_key_depends_on_path_and_last_commit(self):
+        copy_path = os.path.join(self.repo_path, 'copy.txt')
+        with open(copy_path, 'w') as f:
+            f.write("Test content")
+        file_path = os.path.join(self.repo_path, 'test.txt')
+        key = self.vc.blame_key(file_path)
+        self.assertEqual(self.vc.get_blob_sha(copy_path), self.vc.get_blob_sha(file_path))
+        self.assertNotEqual(self.vc.blame_key(copy_path), key)
+
+        # Commits to other files keep the key
+        self.vc.commit_changes("Add copy")
+        self.assertEqual(self.vc.blame_key(file_path), key)
+
+        # The same content with another history does not
+        for content in ("Changed", "Test content"):
+            with open(file_path, 'w') as f:
+                f.write(content)
+            self.vc.commit_changes(f"Write {content}")
+        self.assertNotEqual(self.vc.blame_key(file_path), key)
+
+    def test_blame_without_git_returns_no_hunks(self):
+        log = MagicMock()
+        vc = VersionControl(self.repo_path, log_callback=log, cache=MagicMock())
+        with patch("subprocess.run", side_effect=FileNotFoundError("git")):
+            self.assertEqual(vc.blame(os.path.join(self.repo_path, 'test.txt')), [])
+        self.assertIn("Failed to blame", log.call_args[0][0])
+
+    def test_blame_tolerates_non_utf8_authors(self):
+        file_path = os.path.join(self.repo_path, 'test.txt')
+        with open(file_path, 'a') as f:
+            f.write("\nMore")
+        subprocess.run(['git', '-C', self.repo_path, 'commit', '-am', 'café',
+                        '--author', 'José <j@example.com>'], check=True)
+        # Makes blame print the author and summary as latin-1, which is not valid UTF-8
+        subprocess.run(['git', '-C', self.repo_path, 'config', 'i18n.logOutputEncoding', 'latin-1'], check=True)
+
+        hunks = self.vc.blame(file_path)
+
+        self.assertEqual(sum(hunk['count'] for hunk in hunks), 2)
+        self.assertIn('Jos\ufffd', {hunk['author'] for hunk in hunks})
+
+    def test_get_blob_sha_matches_git(self):
+        file_path = os.path.join(self.repo_path, 'test.txt')
+        expected = subprocess.run(['git', 'hash-object', file_path],
+                                  text=True, capture_output=True, check=True).stdout.strip()
+        self.assertEqual(self.vc.get_blob_sha(file_path), expected)
+
+    def test_parse_incremental_blame_reuses_commit_headers(self):
+        output = (
+            "a" * 40 + " 1 1 2\nauthor Alice\nauthor-time 100\nfilename m.py\n"
+            + "b" * 40 + " 3 3 1\nauthor Bob\nauthor-time 200\nfilename m.py\n"
+            + "a" * 40 + " 4 4 1\nfilename m.py\n"
+        )
+        hunks = self.vc._parse_incremental_blame(output)
+        self.assertEqual([h['author'] for h in hunks], ['Alice', 'Bob', 'Alice'])
+        self.assertEqual(hunks[2]['time'], 100)
+
+        last_changed = self.vc.map_blame_to_symbols(hunks, {'f': (1, 3), 'g': (4, 4)})
+        self.assertEqual(last_changed['f']['author'], 'Bob')
+        self.assertEqual(last_changed['g']['author'], 'Alice')
+
+    def test_list_tree_and_read_blobs(self):
+        file_path = os.path.join(self.repo_path, 'module.py')
+        with open(file_path, 'w') as f:
+            f.write("x = 1\n")
+        subprocess.run(['git', '-C', self.repo_path, 'add', file_path], check=True)
+        subprocess.run(['git', '-C', self.repo_path, 'commit', '-m', 'Add module'], check=True)
+
+        tree = self.vc.list_tree('HEAD')
+        self.assertEqual(list(tree), ['module.py'])
+        blobs = self.vc.read_blobs([tree['module.py'], tree['module.py']])
+        self.assertEqual(blobs, {tree['module.py']: "x = 1\n"})
+        self.assertEqual(self.vc.read_blobs([]), {})
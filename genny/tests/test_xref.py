@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import MagicMock
+from genny.codeparser import CodeParser
+from genny.xref import SymbolTable
+
+
+class TestSymbolTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = SymbolTable()
+        self.table.add_module("pkg.base", "pkg/base.html", {
+            "classes": [{"name": "Base"}],
+            "functions": [{"name": "helper"}]
+        })
+        self.table.add_module("pkg.sub.models", "pkg/sub/models.html", {"classes": [{"name": "Model"}]})
+
+    def test_resolve(self):
+        aliases = self.table.aliases({"imports": [["pkg.base.Base as B"], ["pkg.base"]]})
+
+        self.assertEqual(self.table.resolve("B", "pkg.sub.models", aliases), "pkg/base.html#Base")
+        self.assertEqual(self.table.resolve("base.helper", "pkg.sub.models", aliases), "pkg/base.html#helper")
+        self.assertEqual(self.table.resolve("Model", "pkg.sub.models", aliases), "pkg/sub/models.html#Model")
+        self.assertEqual(self.table.resolve("pkg.base.Base", "other", {}), "pkg/base.html#Base")
+        self.assertIsNone(self.table.resolve("object", "pkg.sub.models", aliases))
+
+    def test_plain_imports_bind_their_first_component(self):
+        source = "import pkg.base\nimport pkg.sub.models as m\nfrom pkg import base as b\n"
+        aliases = self.table.aliases(CodeParser(MagicMock()).parse_source(source).to_dict())
+
+        self.assertEqual(aliases, {"pkg": "pkg", "m": "pkg.sub.models", "b": "pkg.base"})
+        self.assertEqual(self.table.resolve("pkg.base.Base", "other", aliases), "pkg/base.html#Base")
+        self.assertEqual(self.table.resolve("m.Model", "other", aliases), "pkg/sub/models.html#Model")
+        self.assertEqual(self.table.resolve("b.helper", "other", aliases), "pkg/base.html#helper")
+        self.assertIsNone(self.table.resolve("base.Base", "other", aliases))
+
+    def test_link_module_uses_page_relative_urls(self):
+        structure = {
+            "imports": [["pkg.base.Base"], ["os"]],
+            "classes": [{"name": "Model", "base_classes": ["Base", None]},
+                        {"name": "Plain", "base_classes": ["object"]}]
+        }
+        linked, import_links = self.table.link_module("pkg.sub.models", "pkg/sub/models.html", structure)
+
+        self.assertEqual(linked["classes"][0]["base_links"], {"Base": "../base.html#Base"})
+        self.assertNotIn("base_links", linked["classes"][1])
+        self.assertEqual(import_links, {"pkg.base.Base": "../base.html#Base"})
+        self.assertNotIn("base_links", structure["classes"][0])
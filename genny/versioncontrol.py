@@ -1,11 +1,22 @@
+from genny import events, profiling
 import subprocess
+import hashlib
+import os
+from datetime import datetime, timezone
+
+UNCOMMITTED_SHA = '0' * 40
 
 
 class VersionControl:
-    def __init__(self, repo_path, log_callback=None):
+    def __init__(self, repo_path, log_callback=None, cache=None):
         self.log_callback = log_callback
         self.repo_path = repo_path
         self.branch_name = 'main'
+        self.cache = cache
+        # Top-level directory and the last commit of each path, looked up once
+        # for the blame cache keys
+        self._top_level = None
+        self._last_commits = {}
 
     def checkout(self, branch_name):
         """Checkout a specific branch."""
@@ -25,6 +36,7 @@ class VersionControl:
                 message = f"Created and switched to new branch '{branch_name}'"
     
             self.branch_name = branch_name
+            self._last_commits = {}
         except subprocess.CalledProcessError as e:
                 message = f"Failed to checkout branch '{branch_name}': {e}"
         if self.log_callback:
@@ -52,6 +64,7 @@ class VersionControl:
             # Add and commit changes
             subprocess.run(['git', '-C', self.repo_path, 'add', '.'], check=True)
             subprocess.run(['git', '-C', self.repo_path, 'commit', '-m', message], check=True)
+            self._last_commits = {}
 
             # Log success message
             message = "Changes committed successfully."
@@ -80,3 +93,175 @@ class VersionControl:
             if self.log_callback:
                 self.log_callback(message)
             return message
+
+
+    def get_blob_sha(self, file_path):
+        """Compute the git blob SHA of a file without spawning git."""
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+    def blame_key(self, file_path):
+        """
+        The cache key of a file's blame: its path in the repository, its blob
+        SHA and the last commit that touched the path, which together fix the
+        history blame reads. Commits to other files keep the key.
+        """
+        if self._top_level is None:
+            with profiling.stage('git'), events.timed(events.GIT_CALL, command='rev-parse'):
+                completed_process = subprocess.run(
+                    ['git', '-C', self.repo_path, 'rev-parse', '--show-toplevel'],
+                    check=True, text=True, errors='replace', capture_output=True)
+            self._top_level = completed_process.stdout.strip()
+        rel_path = os.path.relpath(os.path.realpath(file_path), os.path.realpath(self._top_level))
+        rel_path = rel_path.replace(os.sep, '/')
+        if rel_path not in self._last_commits:
+            with profiling.stage('git'), events.timed(events.GIT_CALL, file_path, command='log'):
+                completed_process = subprocess.run(
+                    ['git', '-C', self._top_level, 'log', '-1', '--format=%H', '--', rel_path],
+                    check=True, text=True, errors='replace', capture_output=True)
+            self._last_commits[rel_path] = completed_process.stdout.strip()
+        key = f"{rel_path}\0{self.get_blob_sha(file_path)}\0{self._last_commits[rel_path]}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def blame(self, file_path):
+        """
+        Run a single `git blame --incremental` over a file.
+
+        Results are cached by path, blob SHA and the last commit that touched
+        the path, so an unchanged file only costs a `git log -1` on later runs,
+        even after commits to other files. Files with uncommitted lines are not cached.
+        If git fails or is not installed, the file is reported and not blamed.
+
+        Returns:
+            A list of hunks: dicts with 'start', 'count', 'commit',
+            'author' and 'time' (author time in unix seconds).
+        """
+        try:
+            key = self.blame_key(file_path) if self.cache else None
+            if key:
+                hunks = self.cache.get('blame', key)
+                if hunks is not None:
+                    return hunks
+
+            with profiling.stage('git'), events.timed(events.GIT_CALL, file_path, command='blame') as call:
+                # Author names and summaries are not always UTF-8
+                completed_process = subprocess.run(
+                    ['git', '-C', self.repo_path, 'blame', '--incremental', '--', file_path],
+                    check=True, text=True, errors='replace', capture_output=True)
+                call['size'] = len(completed_process.stdout)
+        except (subprocess.CalledProcessError, OSError) as e:
+            message = f"Failed to blame '{file_path}': {getattr(e, 'stderr', None) or e}"
+            if self.log_callback:
+                self.log_callback(message)
+            return []
+
+        hunks = self._parse_incremental_blame(completed_process.stdout)
+        if key and all(hunk['commit'] != UNCOMMITTED_SHA for hunk in hunks):
+            self.cache.set('blame', key, hunks)
+        return hunks
+
+    def _parse_incremental_blame(self, output):
+        # Commit headers (author, author-time, ...) are only printed the first
+        # time a commit appears, so they are remembered per commit.
+        commits = {}
+        hunks = []
+        current = None
+        for line in output.splitlines():
+            parts = line.split(' ')
+            if current is None:
+                commit, _, start, count = parts[:4]
+                current = {'start': int(start), 'count': int(count), 'commit': commit}
+                commits.setdefault(commit, {})
+            elif parts[0] == 'filename':
+                info = commits[current['commit']]
+                current['author'] = info.get('author', '')
+                current['time'] = int(info.get('author-time', 0))
+                hunks.append(current)
+                current = None
+            else:
+                commits[current['commit']][parts[0]] = ' '.join(parts[1:])
+        return hunks
+
+    def map_blame_to_symbols(self, hunks, line_numbers):
+        """
+        Find the most recent commit touching each symbol.
+
+        Parameters:
+            - hunks: Blame hunks as returned by blame().
+            - line_numbers: A mapping of symbol name to (first, last) line.
+
+        Returns:
+            - A mapping of symbol name to a dict with 'commit', 'author' and 'date'.
+        """
+        if not hunks:
+            return {}
+        last_line = max(hunk['start'] + hunk['count'] - 1 for hunk in hunks)
+        line_hunks = [None] * (last_line + 1)
+        for hunk in hunks:
+            for line in range(hunk['start'], hunk['start'] + hunk['count']):
+                line_hunks[line] = hunk
+
+        last_changed = {}
+        for name, (first, last) in line_numbers.items():
+            touched = [hunk for hunk in line_hunks[first:last + 1] if hunk]
+            if not touched:
+                continue
+            hunk = max(touched, key=lambda h: h['time'])
+            last_changed[name] = {
+                'commit': hunk['commit'],
+                'author': hunk['author'],
+                'date': datetime.fromtimestamp(hunk['time'], timezone.utc).strftime('%Y-%m-%d')
+            }
+        return last_changed
+
+    def list_tree(self, ref, suffix='.py'):
+        """
+        List the files of a revision without checking it out.
+
+        Returns:
+            A mapping of path to blob SHA for every file ending with suffix.
+        """
+        with profiling.stage('git'), events.timed(events.GIT_CALL, command='ls-tree') as call:
+            completed_process = subprocess.run(
+                ['git', '-C', self.repo_path, 'ls-tree', '-r', '--full-tree', ref],
+                check=True, text=True, capture_output=True)
+            call['size'] = len(completed_process.stdout)
+        tree = {}
+        for line in completed_process.stdout.splitlines():
+            info, path = line.split('\t', 1)
+            _, object_type, sha = info.split()
+            if object_type == 'blob' and path.endswith(suffix):
+                tree[path] = sha
+        return tree
+
+    def read_blobs(self, shas):
+        """
+        Read many blobs through a single `git cat-file --batch` process.
+
+        Returns:
+            A mapping of blob SHA to its decoded content.
+        """
+        shas = list(dict.fromkeys(shas))
+        if not shas:
+            return {}
+        with profiling.stage('git'), events.timed(events.GIT_CALL, command='cat-file') as call:
+            completed_process = subprocess.run(
+                ['git', '-C', self.repo_path, 'cat-file', '--batch'],
+                input=''.join(f"{sha}\n" for sha in shas).encode(),
+                check=True, capture_output=True)
+            call['size'] = len(completed_process.stdout)
+        output = completed_process.stdout
+        blobs = {}
+        position = 0
+        for sha in shas:
+            header_end = output.index(b'\n', position)
+            header = output[position:header_end].split()
+            if header[-1] == b'missing':
+                position = header_end + 1
+                continue
+            size = int(header[2])
+            content = output[header_end + 1:header_end + 1 + size]
+            blobs[sha] = content.decode('utf-8', errors='replace')
+            position = header_end + 1 + size + 1
+        return blobs
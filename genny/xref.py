@@ -0,0 +1,90 @@
+from genny.codeparser import import_bindings
+import posixpath
+
+
+class SymbolTable:
+    """
+    A project-wide map of qualified names (modules, classes and functions) to
+    the URL of their documentation, relative to the site root.
+
+    It is filled once per run from the parsed structures, before any page is
+    rendered, so base classes and imports can be linked with dict lookups
+    instead of a second pass over the generated files.
+    """
+
+    def __init__(self):
+        self.urls = {}
+
+    def add_module(self, module, url, code_structure=None):
+        """
+        Register a module page and, if its structure is known, its classes and functions.
+
+        Parameters:
+            - module: The dotted module name.
+            - url: The module's output path, relative to the site root.
+            - code_structure: The module's CodeStructure.to_dict() output.
+        """
+        self.urls[module] = url
+        for cl in (code_structure or {}).get('classes', []):
+            self.urls[f"{module}.{cl['name']}"] = f"{url}#{cl['name']}"
+        for func in (code_structure or {}).get('functions', []):
+            self.urls[f"{module}.{func['name']}"] = f"{url}#{func['name']}"
+
+    def aliases(self, code_structure):
+        """Map the names bound by a module's imports to the qualified names they refer to."""
+        return import_bindings(code_structure)
+
+    def resolve(self, name, module, aliases):
+        """
+        Find the URL of a name used in a module: a local definition, an imported
+        name (or an attribute of one, like 'mod.Base'), or a qualified name.
+
+        Returns:
+            - The URL relative to the site root, or None if the name is not documented.
+        """
+        local = f"{module}.{name}"
+        if local in self.urls:
+            return self.urls[local]
+        head, _, rest = name.partition('.')
+        if head in aliases:
+            imported = aliases[head] + (f".{rest}" if rest else "")
+            if imported in self.urls:
+                return self.urls[imported]
+        return self.urls.get(name)
+
+    def link_module(self, module, out_path, code_structure):
+        """
+        Resolve the base classes and imports of one module for its page.
+
+        Each class with resolvable bases gets a 'base_links' dict (base name to
+        URL); the import links are returned. URLs are relative to the page.
+
+        Returns:
+            - A (linked code structure, import links) tuple.
+        """
+        aliases = self.aliases(code_structure)
+        page_dir = posixpath.dirname(out_path)
+
+        def relative(url):
+            path, _, anchor = url.partition('#')
+            relative_url = posixpath.relpath(path, page_dir or '.')
+            return f"{relative_url}#{anchor}" if anchor else relative_url
+
+        classes = []
+        for cl in code_structure.get('classes', []):
+            base_links = {}
+            for base in cl.get('base_classes') or []:
+                url = self.resolve(base, module, aliases) if base else None
+                if url:
+                    base_links[base] = relative(url)
+            classes.append(dict(cl, base_links=base_links) if base_links else cl)
+
+        import_links = {}
+        for imports in code_structure.get('imports', []):
+            for item in imports:
+                url = self.urls.get(item.partition(' as ')[0])
+                if url:
+                    import_links[item] = relative(url)
+
+        linked = dict(code_structure, classes=classes) if 'classes' in code_structure else code_structure
+        return linked, import_links